@@ -1,11 +1,8 @@
 # ПИТОН СКРИПТ: СОЗДАНИЕ СПЕЦИФИКАЦИИ НАГРУЗОК
 import clr
+import os
 import sys
-clr.AddReference('RevitAPI')
 clr.AddReference('RevitServices')
-clr.AddReference('RevitAPIUI')
-from Autodesk.Revit.DB import *
-from Autodesk.Revit.UI import *
 from RevitServices.Persistence import DocumentManager
 from RevitServices.Transactions import TransactionManager
 
@@ -15,31 +12,84 @@ uidoc = DocumentManager.Instance.CurrentUIApplication.ActiveUIDocument
 # ===================== НАСТРОЙКИ =====================
 # Исправлено: имя параметра соответствует файлу общих параметров
 PARAM_NAME = "ADSK_Нагрузка_Полезная"
+# GUID параметра (пусто - по имени из файла общих параметров)
+PARAM_GUID = ""
+# Файл общих параметров (пусто - 02_Resources/SharedParameters.txt)
+SHARED_PARAMETERS_FILE = r""
+# Привязать параметр из ФОП к категориям BIND_CATEGORIES, если привязки нет
+# или не хватает категорий
+BIND_PARAMETER = True
+BIND_CATEGORIES = ("OST_Rooms", "OST_MEPSpaces", "OST_Areas")
 SCHEDULE_NAME = "00_Контроль нагрузок (Авто)"
-CATEGORY = Category.GetCategory(doc, BuiltInCategory.OST_Rooms)
+# Сводка нагрузок по уровням и назначениям (пусто - не создавать)
+SUMMARY_NAME = "00_Сводка нагрузок (Авто)"
+# Категория: OST_Rooms (помещения), OST_MEPSpaces (пространства - для
+# связанных моделей), OST_Areas (зоны)
+CATEGORY_NAME = "OST_Rooms"
+# Замеры фаз в OUT["timings"]; TIMINGS_LOG - файл JSONL для журнала запусков
+TIMINGS = True
+TIMINGS_LOG = r""
+# Папка Python_Source с пакетом loadplan (пусто - папка этого файла; в .dyn обязательна)
+LIB_PATH = r""
+# =====================================================
+
+if not LIB_PATH:
+    try:
+        LIB_PATH = os.path.dirname(os.path.abspath(__file__))
+    except NameError:
+        raise Exception("Укажите в LIB_PATH путь к папке Python_Source с пакетом loadplan")
+if LIB_PATH not in sys.path:
+    sys.path.append(LIB_PATH)
+from loadplan import timing
+from loadplan.aggregate import LoadSummary, extract_columns, summary_rows
+from loadplan.snapshot import get_snapshot
+from loadplan.schedule import (NOTE_FIELD_NAME, create_schedule, ensure_summary_schedule,
+                               load_field_specs, reconcile_fields, schedule_category,
+                               summary_table_matches, write_summary_table)
+from loadplan.sharedparams import audit_binding, bind_parameter, read_file
+
+timing.start(TIMINGS)
+CATEGORY = schedule_category(doc, CATEGORY_NAME)
 
 # ===================== ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ =====================
+def audit_parameter():
+    """Сверка параметра с ФОП и привязками проекта, при необходимости - привязка.
+
+    Возвращает (сообщения, GUID параметра или None).
+    """
+    try:
+        shared_file = read_file(SHARED_PARAMETERS_FILE or None)
+        audit = audit_binding(doc, shared_file, PARAM_NAME, PARAM_GUID or None, BIND_CATEGORIES)
+    except OSError as e:
+        return ["ФОП не прочитан ({}), проверка привязки пропущена".format(e)], PARAM_GUID or None
+    except Exception as e:
+        return ["Предупреждение: {}".format(e)], PARAM_GUID or None
+
+    messages = audit.messages()
+    if BIND_PARAMETER and audit.needs_binding:
+        TransactionManager.Instance.EnsureInTransaction(doc)
+        try:
+            bind_parameter(doc, audit, BIND_CATEGORIES)
+            TransactionManager.Instance.TransactionTaskDone()
+        except Exception:
+            TransactionManager.Instance.ForceCloseTransaction()
+            raise
+        messages.append("Параметр '{}' привязан к категориям: {}".format(
+            audit.parameter.name, ", ".join(BIND_CATEGORIES)))
+    return messages, audit.parameter.guid
+
 def schedule_exists(schedule_name, category_id):
     """Проверка существования спецификации с указанным именем и категорией"""
     try:
-        collector = FilteredElementCollector(doc).OfClass(ViewSchedule)
-        for schedule in collector:
-            if schedule.Name == schedule_name and schedule.Definition.CategoryId == category_id:
-                return schedule
-        return None
+        return get_snapshot(doc).schedule(schedule_name, category_id)
     except:
         return None
 
 def create_new_schedule():
-    """Создание новой спецификации для помещений"""
+    """Создание новой спецификации для выбранной категории"""
     try:
-        # Проверяем, поддерживает ли категория спецификации
-        if not CategoryAllowsSchedules(CATEGORY.Id):
-            raise Exception("Категория '{}' не поддерживает создание спецификаций".format(CATEGORY.Name))
-        
-        # Создаем спецификацию
-        schedule = ViewSchedule.CreateSchedule(doc, CATEGORY.Id)
-        schedule.Name = SCHEDULE_NAME
+        # Создаем спецификацию (категория проверяется без пробного создания)
+        schedule = create_schedule(doc, CATEGORY, SCHEDULE_NAME)
         
         # Базовые настройки
         schedule_def = schedule.Definition
@@ -52,117 +102,96 @@ def create_new_schedule():
     except Exception as e:
         raise Exception("Ошибка создания спецификации: {}".format(str(e)))
 
-def CategoryAllowsSchedules(category_id):
-    """Проверка, поддерживает ли категория создание спецификаций"""
-    try:
-        # Проверяем, можно ли создать спецификацию для этой категории
-        schedule = ViewSchedule.CreateSchedule(doc, category_id)
-        doc.Delete(schedule.Id)
-        return True
-    except:
-        return False
-
 def configure_schedule_fields(schedule):
-    """Настройка полей спецификации по ГОСТ 21.501-2018 (форма 2)"""
+    """Настройка полей спецификации по ГОСТ 21.501-2018 (форма 2)
+
+    Поля не пересоздаются: добавляются недостающие и меняются только
+    отличающиеся свойства, пользовательские столбцы сохраняются.
+    Возвращает (успех, сообщение, число изменений, предупреждения).
+    """
     try:
-        schedule_def = schedule.Definition
-        
-        # Удаляем все существующие поля
-        field_order = schedule_def.GetFieldOrder()
-        for field_id in list(field_order):  # Создаем копию списка для безопасного удаления
-            schedule_def.RemoveField(field_id)
-        
-        # Добавляем обязательные поля по ГОСТ
-        # 1. Номер помещения
-        room_number_field = schedule_def.AddField(
-            ScheduleFieldType.Instance, 
-            ElementId(BuiltInParameter.ROOM_NUMBER)
-        )
-        room_number_field.ColumnHeading = "№ п/п"
-        room_number_field.Width = 30
+        load_def = get_snapshot(doc).parameter(PARAM_NAME, LOAD_GUID)
+        specs = load_field_specs(load_def, PARAM_NAME)
+        # Примечание об отсутствии параметра больше не нужно, если он найден
+        remove_names = [NOTE_FIELD_NAME] if load_def is not None else []
+        changes, warnings = reconcile_fields(schedule.Definition, specs, remove_names)
+        warnings = ["Предупреждение: {}".format(warning) for warning in warnings]
         
-        # 2. Наименование помещения
-        room_name_field = schedule_def.AddField(
-            ScheduleFieldType.Instance, 
-            ElementId(BuiltInParameter.ROOM_NAME)
-        )
-        room_name_field.ColumnHeading = "Наименование помещения"
-        room_name_field.Width = 150
-        
-        # 3. Полезная нагрузка (ищем параметр из общего файла)
-        param_found = False
-        try:
-            # Ищем параметр по имени, как указано в файле общих параметров
-            binding_map = doc.ParameterBindings
-            iterator = binding_map.ForwardIterator()
-            while iterator.MoveNext():
-                if iterator.Key.Name == PARAM_NAME:
-                    load_field = schedule_def.AddField(
-                        ScheduleFieldType.Instance, 
-                        iterator.Key.Id
-                    )
-                    load_field.ColumnHeading = "Нагрузка, кг/м²"
-                    load_field.Width = 60
-                    load_field.DisplayType = ScheduleFieldDisplayType.Decimal
-                    load_field.Accuracy = 0.1
-                    load_field.HorizontalAlignment = HorizontalAlignmentStyle.Right
-                    param_found = True
-                    break
-        
-        except Exception as e:
-            # Не прерываем работу, если параметр не найден
-            print("Предупреждение: {}".format(str(e)))
-        
-        # Если параметр не найден, добавляем примечание
-        if not param_found:
-            note_field = schedule_def.AddCalculatedField("Примечание")
-            note_field.Formula = "\"Параметр '" + PARAM_NAME + "' не найден. Добавьте его из общего файла параметров\""
-            note_field.ColumnHeading = "Примечание"
-            note_field.Width = 200
-            note_field.HorizontalAlignment = HorizontalAlignmentStyle.Left
-        
-        return True, "Поля спецификации настроены"
+        if not changes:
+            return True, "Поля спецификации актуальны, изменений нет", 0, warnings
+        return True, "Поля спецификации обновлены: {}".format("; ".join(changes)), len(changes), warnings
     
     except Exception as e:
-        return False, "Ошибка настройки полей: {}".format(str(e))
+        return False, "Ошибка настройки полей: {}".format(str(e)), 0, []
 
-def format_schedule_table(schedule):
-    """Форматирование таблицы спецификации"""
+def format_schedule_table(schedule, changed):
+    """Обновление таблицы спецификации (только если поля изменились)"""
     try:
-        # Принудительно обновляем данные
+        if not changed:
+            return True, "Обновление таблицы не требуется"
         schedule.Definition.Refresh()
-        
-        # Настраиваем форматирование
-        table_data = schedule.GetTableData()
-        if not table_data:
-            return True, "Данные таблицы недоступны для форматирования"
-        
-        # Настраиваем заголовки
-        title_section = table_data.GetSectionData(SectionType.Header)
-        if title_section:
-            title_section.SetColumnWidth(0, 30)  # № п/п
-            title_section.SetColumnWidth(1, 150)  # Наименование помещения
-            if title_section.NumberOfColumns > 2:
-                title_section.SetColumnWidth(2, 60)  # Нагрузка
-        
-        return True, "Форматирование таблицы выполнено"
+        return True, "Таблица спецификации обновлена"
     
     except Exception as e:
         return False, "Ошибка форматирования таблицы: {}".format(str(e))
 
+def update_load_summary():
+    """Сводка нагрузок: один проход по помещениям, итоги считаются массивами.
+
+    Возвращает (сообщение, итоги по группам для OUT).
+    """
+    load_def = get_snapshot(doc).parameter(PARAM_NAME, LOAD_GUID)
+    if load_def is None:
+        return "Сводка нагрузок не обновлена: параметр '{}' не найден".format(PARAM_NAME), None
+    with timing.span("extract"):
+        columns = extract_columns(doc, load_def, CATEGORY_NAME)
+    with timing.span("aggregate"):
+        summary = LoadSummary(columns)
+        rows = summary_rows(summary)
+
+    existing = get_snapshot(doc).schedule(SUMMARY_NAME, CATEGORY.Id)
+    total = ", всего {:.2f} т на {} помещений".format(summary.total.total, summary.total.rooms)
+    if existing is not None and summary_table_matches(existing, rows):
+        return "Сводка '{}' актуальна".format(SUMMARY_NAME) + total, summary.as_dict()
+
+    TransactionManager.Instance.EnsureInTransaction(doc)
+    try:
+        with timing.span("write"):
+            schedule, created = ensure_summary_schedule(doc, CATEGORY, SUMMARY_NAME, existing)
+            written = write_summary_table(schedule, rows)
+        TransactionManager.Instance.TransactionTaskDone()
+    except Exception:
+        TransactionManager.Instance.ForceCloseTransaction()
+        raise
+
+    if created:
+        message = "Сводка '{}' создана".format(SUMMARY_NAME)
+    else:
+        message = "Сводка '{}' обновлена: ячеек {}".format(SUMMARY_NAME, written)
+    return message + total, summary.as_dict()
+
 # ===================== ОСНОВНОЙ БЛОК КОДА =====================
+LOAD_GUID = PARAM_GUID or None
 try:
+    # Сверяем параметр с ФОП и привязываем его
+    with timing.span("parameter"):
+        audit_messages, LOAD_GUID = audit_parameter()
+
     # Проверяем, существует ли уже спецификация
-    existing_schedule = schedule_exists(SCHEDULE_NAME, CATEGORY.Id)
+    with timing.span("find_schedule"):
+        existing_schedule = schedule_exists(SCHEDULE_NAME, CATEGORY.Id)
     
     if existing_schedule:
         # Если спецификация существует, просто активируем ее
         TransactionManager.Instance.EnsureInTransaction(doc)
         try:
             # Обновляем поля существующей спецификации
-            field_success, field_result = configure_schedule_fields(existing_schedule)
-            format_success, format_result = format_schedule_table(existing_schedule)
-            TransactionManager.Instance.TransactionTaskDone()
+            with timing.span("fields"):
+                field_success, field_result, field_changes, field_warnings = configure_schedule_fields(existing_schedule)
+            with timing.span("refresh"):
+                format_success, format_result = format_schedule_table(existing_schedule, field_changes)
+            with timing.span("commit"):
+                TransactionManager.Instance.TransactionTaskDone()
             
             # Активируем вид
             uidoc.ActiveView = existing_schedule
@@ -173,7 +202,7 @@ try:
                     "Спецификация '{}' уже существует".format(SCHEDULE_NAME),
                     field_result,
                     format_result
-                ],
+                ] + field_warnings,
                 "schedule_id": existing_schedule.Id.ToString(),
                 "schedule_name": SCHEDULE_NAME
             }
@@ -186,21 +215,25 @@ try:
         TransactionManager.Instance.EnsureInTransaction(doc)
         try:
             # Шаг 1: Создаем спецификацию
-            schedule, create_result = create_new_schedule()
+            with timing.span("create_schedule"):
+                schedule, create_result = create_new_schedule()
             
             # Шаг 2: Настраиваем поля
-            field_success, field_result = configure_schedule_fields(schedule)
+            with timing.span("fields"):
+                field_success, field_result, field_changes, field_warnings = configure_schedule_fields(schedule)
             
-            # Шаг 3: Форматируем таблицу
-            format_success, format_result = format_schedule_table(schedule)
+            # Шаг 3: Обновляем таблицу
+            with timing.span("refresh"):
+                format_success, format_result = format_schedule_table(schedule, field_changes)
             
-            TransactionManager.Instance.TransactionTaskDone()
+            with timing.span("commit"):
+                TransactionManager.Instance.TransactionTaskDone()
             
             # Активируем спецификацию в интерфейсе
             try:
                 uidoc.ActiveView = schedule
             except:
-                pass
+                timing.count("exceptions_swallowed")
             
             OUT = {
                 "status": "success",
@@ -208,7 +241,7 @@ try:
                     create_result,
                     field_result,
                     format_result
-                ],
+                ] + field_warnings,
                 "schedule_id": schedule.Id.ToString(),
                 "schedule_name": SCHEDULE_NAME
             }
@@ -217,10 +250,18 @@ try:
             TransactionManager.Instance.ForceCloseTransaction()
             raise e
 
+    OUT["messages"][:0] = audit_messages
+    if SUMMARY_NAME:
+        with timing.span("summary"):
+            summary_message, OUT["summary"] = update_load_summary()
+        OUT["messages"].append(summary_message)
+
 except Exception as e:
     error_msg = "Ошибка выполнения скрипта: {}".format(str(e))
     OUT = {
         "status": "error",
         "error_message": error_msg,
         "stack_trace": str(sys.exc_info()[2])
-    }
\ No newline at end of file
+    }
+
+OUT["timings"] = timing.finish(TIMINGS_LOG, script="01_setup_params", document=doc.Title)
\ No newline at end of file
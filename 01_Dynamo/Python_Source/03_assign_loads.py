@@ -0,0 +1,73 @@
+# ПИТОН СКРИПТ 3: НАЗНАЧЕНИЕ НАГРУЗОК ПО ТАБЛИЦЕ ПРАВИЛ
+import clr
+import os
+import sys
+clr.AddReference('RevitAPI')
+from RevitServices.Persistence import DocumentManager
+
+# === НАСТРОЙКИ ===
+PARAM_NAME = "ADSK_Нагрузка_Полезная"
+# GUID параметра (пусто - по имени из файла общих параметров)
+PARAM_GUID = ""
+# Файл общих параметров (пусто - 02_Resources/SharedParameters.txt)
+SHARED_PARAMETERS_FILE = r""
+# Категория: OST_Rooms (помещения), OST_MEPSpaces (пространства), OST_Areas (зоны)
+CATEGORY_NAME = "OST_Rooms"
+# Таблица правил CSV (пусто - 02_Resources/LoadRules.csv)
+RULES_PATH = r""
+# True - только отчет, без записи значений
+DRY_RUN = False
+# Папка Python_Source с пакетом loadplan (пусто - папка этого файла; в .dyn обязательна)
+LIB_PATH = r""
+# =================
+
+doc = DocumentManager.Instance.CurrentDBDocument
+
+try:
+    if not LIB_PATH:
+        try:
+            LIB_PATH = os.path.dirname(os.path.abspath(__file__))
+        except NameError:
+            raise Exception("Укажите в LIB_PATH путь к папке Python_Source с пакетом loadplan")
+    if LIB_PATH not in sys.path:
+        sys.path.append(LIB_PATH)
+    from loadplan.rooms import room_label
+    from loadplan.rules import RuleTable, assign_loads
+    from loadplan.snapshot import get_snapshot
+    from loadplan.sharedparams import resolve_guid
+
+    if not RULES_PATH:
+        RULES_PATH = os.path.join(LIB_PATH, "..", "..", "02_Resources", "LoadRules.csv")
+    table = RuleTable.from_csv(RULES_PATH)
+
+    load_guid = PARAM_GUID or resolve_guid(PARAM_NAME, SHARED_PARAMETERS_FILE or None)
+    load_def = get_snapshot(doc).parameter(PARAM_NAME, load_guid)
+    if load_def is None:
+        raise Exception(f"Параметр '{PARAM_NAME}' не найден. Выполните сначала скрипт создания спецификации.")
+
+    report = assign_loads(doc, table, load_def, CATEGORY_NAME, DRY_RUN)
+
+    unmatched = [room_label(room) for room, param in report.unmatched]
+
+    verb = "Будет записано" if DRY_RUN else "Записано"
+    OUT = {
+        "status": "success",
+        "messages": [
+            f"Правил в таблице: {len(table)}",
+            f"Помещений: {report.total}",
+            f"{verb} значений: {len(report.changes)}",
+            f"Без изменений: {report.unchanged}",
+            f"Без подходящего правила: {len(report.unmatched)}",
+            f"Без параметра нагрузки или только для чтения: {len(report.skipped)}",
+        ],
+        "unmatched": unmatched,
+        "skipped": [room_label(room) for room in report.skipped],
+    }
+
+except Exception as e:
+    import traceback
+    OUT = {
+        "status": "error",
+        "error_message": f"Ошибка выполнения скрипта: {str(e)}",
+        "stack_trace": traceback.format_exc(),
+    }
@@ -0,0 +1,91 @@
+# ПИТОН СКРИПТ 4: ЭКСПОРТ/ИМПОРТ НАГРУЗОК (CSV/XLSX)
+import clr
+import os
+import sys
+clr.AddReference('RevitAPI')
+from RevitServices.Persistence import DocumentManager
+
+# === НАСТРОЙКИ ===
+PARAM_NAME = "ADSK_Нагрузка_Полезная"
+# GUID параметра (пусто - по имени из файла общих параметров)
+PARAM_GUID = ""
+# Файл общих параметров (пусто - 02_Resources/SharedParameters.txt)
+SHARED_PARAMETERS_FILE = r""
+# Категория: OST_Rooms (помещения), OST_MEPSpaces (пространства), OST_Areas (зоны)
+CATEGORY_NAME = "OST_Rooms"
+# "export" - выгрузить нагрузки в файл, "import" - загрузить из файла
+MODE = "export"
+# Файл .csv или .xlsx (вход IN[0] переопределяет путь)
+FILE_PATH = r""
+# True - при импорте только отчет, без записи значений
+DRY_RUN = False
+# Папка Python_Source с пакетом loadplan (пусто - папка этого файла; в .dyn обязательна)
+LIB_PATH = r""
+# =================
+
+doc = DocumentManager.Instance.CurrentDBDocument
+
+try:
+    if not LIB_PATH:
+        try:
+            LIB_PATH = os.path.dirname(os.path.abspath(__file__))
+        except NameError:
+            raise Exception("Укажите в LIB_PATH путь к папке Python_Source с пакетом loadplan")
+    if LIB_PATH not in sys.path:
+        sys.path.append(LIB_PATH)
+    from loadplan.exchange import export_loads, import_loads
+    from loadplan.rooms import room_label
+    from loadplan.snapshot import get_snapshot
+    from loadplan.sharedparams import resolve_guid
+
+    path = (IN[0] if IN and IN[0] else None) or FILE_PATH
+    if not path:
+        raise Exception("Укажите файл в FILE_PATH или на входе IN[0]")
+
+    load_guid = PARAM_GUID or resolve_guid(PARAM_NAME, SHARED_PARAMETERS_FILE or None)
+    load_def = get_snapshot(doc).parameter(PARAM_NAME, load_guid)
+    if load_def is None:
+        raise Exception(f"Параметр '{PARAM_NAME}' не найден. Выполните сначала скрипт создания спецификации.")
+
+    if MODE == "export":
+        count = export_loads(doc, path, load_def, CATEGORY_NAME)
+        OUT = {
+            "status": "success",
+            "messages": [f"Выгружено помещений: {count}", f"Файл: {path}"],
+        }
+    elif MODE == "import":
+        report = import_loads(doc, path, load_def, CATEGORY_NAME, DRY_RUN)
+        verb = "Будет записано" if DRY_RUN else "Записано"
+        OUT = {
+            "status": "success",
+            "messages": [
+                f"Строк в файле: {report.rows}",
+                f"{verb} значений: {len(report.changes)}",
+                f"Без изменений: {report.unchanged}",
+                f"Пустых значений: {report.empty}",
+                f"Не найдено в модели: {len(report.not_found)}",
+                f"Неоднозначных (несколько помещений): {len(report.ambiguous)}",
+                f"Повторных строк: {len(report.duplicates)}",
+                f"Некорректных значений: {len(report.invalid)}",
+                f"Помещений без параметра нагрузки или только для чтения: {len(report.skipped)}",
+            ],
+            "not_found": [f"строка {line}: {uid or number}" for line, uid, number in report.not_found],
+            "ambiguous": [f"строка {line}: {uid or number}" for line, uid, number in report.ambiguous],
+            "duplicates": [f"строка {line}: {uid or number} (уже в строке {first})"
+                           for line, first, uid, number in report.duplicates],
+            "invalid": [f"строка {line}: '{value}'" for line, value in report.invalid],
+            "skipped": [room_label(room) for room in report.skipped],
+        }
+        if report.conflicts:
+            OUT["messages"].append(f"⚠️ Разные значения в повторных строках, помещения не изменены: "
+                                   f"{report.conflicts}")
+    else:
+        raise Exception(f"Неизвестный режим MODE = '{MODE}': ожидается 'export' или 'import'")
+
+except Exception as e:
+    import traceback
+    OUT = {
+        "status": "error",
+        "error_message": f"Ошибка выполнения скрипта: {str(e)}",
+        "stack_trace": traceback.format_exc(),
+    }
@@ -0,0 +1,77 @@
+# ПИТОН СКРИПТ 5: ПЕРЕНОС НАГРУЗОК ИЗ ПОМЕЩЕНИЙ СВЯЗИ В ПРОСТРАНСТВА
+import clr
+import os
+import re
+import sys
+clr.AddReference('RevitAPI')
+from RevitServices.Persistence import DocumentManager
+
+# === НАСТРОЙКИ ===
+PARAM_NAME = "ADSK_Нагрузка_Полезная"
+# GUID параметра (пусто - по имени из файла общих параметров)
+PARAM_GUID = ""
+# Файл общих параметров (пусто - 02_Resources/SharedParameters.txt)
+SHARED_PARAMETERS_FILE = r""
+# Регулярное выражение по имени связи (пусто - все загруженные связи)
+LINK_FILTER = r""
+# True - только отчет, без записи значений
+DRY_RUN = False
+# Папка Python_Source с пакетом loadplan (пусто - папка этого файла; в .dyn обязательна)
+LIB_PATH = r""
+# =================
+
+doc = DocumentManager.Instance.CurrentDBDocument
+
+try:
+    if not LIB_PATH:
+        try:
+            LIB_PATH = os.path.dirname(os.path.abspath(__file__))
+        except NameError:
+            raise Exception("Укажите в LIB_PATH путь к папке Python_Source с пакетом loadplan")
+    if LIB_PATH not in sys.path:
+        sys.path.append(LIB_PATH)
+    from loadplan.rooms import room_label
+    from loadplan.snapshot import get_snapshot
+    from loadplan.sharedparams import resolve_guid
+    from loadplan.spatial import link_instances, transfer_loads
+
+    load_guid = PARAM_GUID or resolve_guid(PARAM_NAME, SHARED_PARAMETERS_FILE or None)
+    load_def = get_snapshot(doc).parameter(PARAM_NAME, load_guid)
+    if load_def is None:
+        raise Exception(f"Параметр '{PARAM_NAME}' не привязан к пространствам. "
+                        "Добавьте его из файла общих параметров для категории 'Пространства'.")
+
+    links = link_instances(doc, re.compile(LINK_FILTER).search if LINK_FILTER else None)
+    if not links:
+        raise Exception("Не найдено загруженных связанных моделей.")
+
+    report = transfer_loads(doc, load_def, load_guid, PARAM_NAME, links, DRY_RUN)
+
+    verb = "Будет записано" if DRY_RUN else "Записано"
+    OUT = {
+        "status": "success",
+        "messages": [
+            f"Связей: {len(links)}",
+            f"Пространств: {report.total}",
+            f"{verb} значений: {len(report.changes)}",
+            f"Без изменений: {report.unchanged}",
+            f"Вне помещений связи: {len(report.unmatched)}",
+            f"В нескольких помещениях с разной нагрузкой: {len(report.ambiguous)}",
+            f"Помещение связи без нагрузки: {len(report.no_load)}",
+            f"Без параметра нагрузки или только для чтения: {len(report.skipped)}",
+        ],
+        "unmatched": [room_label(space) for space, param in report.unmatched],
+        "ambiguous": [f"{room_label(space)}: " + ", ".join(f"{link} / {number}" for link, number in rooms)
+                      for (space, param), rooms in report.ambiguous],
+        "no_load": [f"{room_label(space)}: {link} / {number}"
+                    for (space, param), (link, number) in report.no_load],
+        "skipped": [room_label(space) for space in report.skipped],
+    }
+
+except Exception as e:
+    import traceback
+    OUT = {
+        "status": "error",
+        "error_message": f"Ошибка выполнения скрипта: {str(e)}",
+        "stack_trace": traceback.format_exc(),
+    }
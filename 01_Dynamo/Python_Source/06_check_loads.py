@@ -0,0 +1,111 @@
+# ПИТОН СКРИПТ 6: ПРОВЕРКА НАГРУЗОК ПОМЕЩЕНИЙ
+import clr
+import os
+import sys
+clr.AddReference('RevitAPI')
+from RevitServices.Persistence import DocumentManager
+
+# === НАСТРОЙКИ ===
+PARAM_NAME = "ADSK_Нагрузка_Полезная"
+# GUID параметра (пусто - по имени из файла общих параметров)
+PARAM_GUID = ""
+# Файл общих параметров (пусто - 02_Resources/SharedParameters.txt)
+SHARED_PARAMETERS_FILE = r""
+# Категория: OST_Rooms (помещения), OST_MEPSpaces (пространства), OST_Areas (зоны)
+CATEGORY_NAME = "OST_Rooms"
+# Правдоподобные нагрузки (от, до), кг/м²; вне диапазона - замечание
+LOAD_RANGE = (50.0, 5000.0)
+# Планы с подсветкой помещений с замечаниями (пусто - не подсвечивать):
+# по виду "<QC_VIEW> - <уровень>" на каждый уровень с замечаниями, копия
+# плана этажа этого уровня
+QC_VIEW = "Контроль нагрузок"
+# True - проверить все помещения заново, а не только измененные
+FULL_SCAN = False
+# Замеры фаз в OUT["timings"]; TIMINGS_LOG - файл JSONL для журнала запусков
+TIMINGS = True
+TIMINGS_LOG = r""
+# Папка Python_Source с пакетом loadplan (пусто - папка этого файла; в .dyn обязательна)
+LIB_PATH = r""
+# =================
+
+doc = DocumentManager.Instance.CurrentDBDocument
+timing = None
+
+try:
+    if not LIB_PATH:
+        try:
+            LIB_PATH = os.path.dirname(os.path.abspath(__file__))
+        except NameError:
+            raise Exception("Укажите в LIB_PATH путь к папке Python_Source с пакетом loadplan")
+    if LIB_PATH not in sys.path:
+        sys.path.append(LIB_PATH)
+    from loadplan import api, timing
+    from loadplan.colors import solid_fill_id
+    from loadplan.qc import ISSUE_LABELS, ensure_qc_view, highlight, qc_plans, qc_view_name, reset, scan
+    from loadplan.snapshot import get_snapshot
+    from loadplan.sharedparams import resolve_guid
+
+    timing.start(TIMINGS)
+    load_guid = PARAM_GUID or resolve_guid(PARAM_NAME, SHARED_PARAMETERS_FILE or None)
+    load_def = get_snapshot(doc).parameter(PARAM_NAME, load_guid)
+    if load_def is None:
+        raise Exception(f"Параметр '{PARAM_NAME}' не найден. Выполните сначала скрипт создания спецификации.")
+
+    with timing.span("scan"):
+        report = scan(doc, load_def, CATEGORY_NAME, LOAD_RANGE, FULL_SCAN)
+    issues = report.by_issue()
+
+    messages = [
+        f"Помещений: {report.total}",
+        ("Полная проверка" if report.full else "Проверено измененных") + f": {report.checked}",
+    ]
+    messages.extend(f"{ISSUE_LABELS[code]}: {len(labels)}" for code, labels in issues.items())
+    if not issues:
+        messages.append("Замечаний нет")
+
+    if QC_VIEW:
+        plans = qc_plans(doc, QC_VIEW)
+        issue_levels = report.issue_levels()
+        # Вид уровня создается при первом замечании на уровне, существующие
+        # обновляются, только если результат проверки изменился
+        pending = [(level, source, view) for level_id, (level, source, view) in plans.items()
+                   if (view is None and level_id in issue_levels)
+                   or (view is not None and (report.full or report.changed))]
+        if pending:
+            tm = api.transactions()
+            tm.EnsureInTransaction(doc)
+            try:
+                with timing.span("highlight"):
+                    solid_id = solid_fill_id(doc)
+                    for level, source, existing in pending:
+                        name = qc_view_name(QC_VIEW, level.Name)
+                        view, created = ensure_qc_view(doc, source, name, existing)
+                        written = highlight(doc, view, report, created, level.Id, solid_id)
+                        if created or written:
+                            messages.append(f"Вид '{name}': " + ("создан" if created else f"обновлено помещений {written}"))
+                tm.TransactionTaskDone()
+            except Exception:
+                tm.ForceCloseTransaction()
+                # scan() уже забыл измененные помещения: следующий запуск -
+                # полная проверка с перерисовкой видов
+                reset(doc)
+                raise
+        missing = issue_levels - set(plans)
+        if missing:
+            messages.append(f"⚠️ Уровней с замечаниями без плана этажа: {len(missing)}")
+
+    OUT = {
+        "status": "success",
+        "messages": messages,
+        "issues": {ISSUE_LABELS[code]: labels for code, labels in issues.items()},
+    }
+
+except Exception as e:
+    import traceback
+    OUT = {
+        "status": "error",
+        "error_message": f"Ошибка выполнения скрипта: {str(e)}",
+        "stack_trace": traceback.format_exc(),
+    }
+
+OUT["timings"] = timing.finish(TIMINGS_LOG, script="06_check_loads", document=doc.Title) if timing else {}
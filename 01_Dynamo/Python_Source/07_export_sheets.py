@@ -0,0 +1,92 @@
+# ПИТОН СКРИПТ 7: ЭКСПОРТ ЛИСТОВ НАГРУЗОК В PDF И PNG
+import clr
+import os
+import sys
+clr.AddReference('RevitAPI')
+from RevitServices.Persistence import DocumentManager
+
+# === НАСТРОЙКИ ===
+# Листы плана нагрузок (префикс номера из скрипта 2)
+SHEET_PREFIX = "Н-"
+# Папка экспорта (пусто - "<модель>_Листы" рядом с моделью)
+EXPORT_FOLDER = r""
+# Разрешение PNG, dpi: экран/веб 150-300, печать 600; 0 - только PDF
+DPI = 300
+# Растеризатор PDF -> PNG: пусто - PyMuPDF, pdftoppm, mutool или Ghostscript
+# (что найдется); путь к программе или команда с {pdf}, {prefix}, {dpi}
+RASTERIZER = r""
+# Параллельных растеризаций (0 - по числу ядер)
+RASTER_WORKERS = 0
+# True - экспортировать все листы заново, не сверяясь с manifest.json
+FORCE = False
+PARAM_NAME = "ADSK_Нагрузка_Полезная"
+# GUID параметра (пусто - по имени из файла общих параметров)
+PARAM_GUID = ""
+# Файл общих параметров (пусто - 02_Resources/SharedParameters.txt)
+SHARED_PARAMETERS_FILE = r""
+# Категория: OST_Rooms (помещения), OST_MEPSpaces (пространства), OST_Areas (зоны)
+CATEGORY_NAME = "OST_Rooms"
+# Замеры фаз в OUT["timings"]; TIMINGS_LOG - файл JSONL для журнала запусков
+TIMINGS = True
+TIMINGS_LOG = r""
+# Папка Python_Source с пакетом loadplan (пусто - папка этого файла; в .dyn обязательна)
+LIB_PATH = r""
+# =================
+
+doc = DocumentManager.Instance.CurrentDBDocument
+timing = None
+
+try:
+    if not LIB_PATH:
+        try:
+            LIB_PATH = os.path.dirname(os.path.abspath(__file__))
+        except NameError:
+            raise Exception("Укажите в LIB_PATH путь к папке Python_Source с пакетом loadplan")
+    if LIB_PATH not in sys.path:
+        sys.path.append(LIB_PATH)
+    from loadplan import export, timing
+    from loadplan.fingerprint import level_fingerprints
+    from loadplan.snapshot import get_snapshot
+    from loadplan.sharedparams import resolve_guid
+
+    timing.start(TIMINGS)
+    if doc.IsModifiable:
+        raise Exception("Экспорт PDF невозможен при открытой транзакции. Запускайте скрипт "
+                        "отдельно от узлов, изменяющих модель (после их завершения)")
+    snap = get_snapshot(doc)
+    sheets = export.collect_sheets(snap, SHEET_PREFIX)
+    if not sheets:
+        raise Exception(f"Нет листов с номером на '{SHEET_PREFIX}'. Выполните сначала скрипт создания видов.")
+
+    messages = []
+    with timing.span("checksums"):
+        load_guid = PARAM_GUID or resolve_guid(PARAM_NAME, SHARED_PARAMETERS_FILE or None)
+        load_def = snap.parameter(PARAM_NAME, load_guid)
+        if load_def is not None:
+            fingerprints = level_fingerprints(doc, load_def, CATEGORY_NAME)
+        else:
+            fingerprints = {}
+            messages.append(f"⚠️ Параметр '{PARAM_NAME}' не найден: изменения нагрузок не отслеживаются")
+        checksums = export.sheet_checksums(doc, sheets, fingerprints, CATEGORY_NAME)
+
+    rasterizer = export.find_rasterizer(RASTERIZER) if DPI else None
+    report = export.export_sheets(
+        sheets, EXPORT_FOLDER or export.default_folder(doc), checksums,
+        export.RevitPdfExporter(doc), rasterizer, DPI, RASTER_WORKERS, FORCE)
+
+    OUT = {
+        "status": "success",
+        "messages": report.messages() + messages,
+        "folder": report.folder,
+        "sheets": report.sheets,
+    }
+
+except Exception as e:
+    import traceback
+    OUT = {
+        "status": "error",
+        "error_message": f"Ошибка выполнения скрипта: {str(e)}",
+        "stack_trace": traceback.format_exc(),
+    }
+
+OUT["timings"] = timing.finish(TIMINGS_LOG, script="07_export_sheets", document=doc.Title) if timing else {}
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""Пакет loadplan: логика скриптов Dynamo для плана полезных нагрузок.
+
+Модули пакета не импортируют Revit API при загрузке: сборки подключаются
+через loadplan.api при первом обращении, поэтому код можно запускать и вне
+Revit с подменённым бэкендом.
+"""
+
+__version__ = "1.1.0"
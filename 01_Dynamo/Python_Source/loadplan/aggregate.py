@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""Сводка нагрузок по уровням и назначениям (скрипт 1, сводная спецификация).
+
+Площадь, уровень, назначение и нагрузка помещений извлекаются одним
+проходом коллектора в столбцы; дальше элементы Revit не нужны. Суммы,
+максимумы и средневзвешенные по площади нагрузки по группам считаются
+векторно (np.bincount, np.maximum.at). Если NumPy в среде Dynamo не
+установлен, тот же расчет выполняется на чистом Python.
+"""
+import math
+
+from . import api
+from .rooms import spatial_elements
+from .units import area_from_internal, load_from_internal
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class LoadColumns(object):
+    """Столбцы данных помещений; группы закодированы индексами в *_names"""
+
+    def __init__(self):
+        self.level_codes = []
+        self.department_codes = []
+        self.areas = []          # м²
+        self.loads = []          # кг/м², nan - не заполнено
+        self.level_names = []
+        self.level_elevations = []
+        self.department_names = []
+
+    def __len__(self):
+        return len(self.areas)
+
+
+def extract_columns(doc, load_def, category_name="OST_Rooms"):
+    """Один проход коллектора: столбцы площади, уровня, назначения и нагрузки"""
+    DB = api.db()
+    department_id = DB.BuiltInParameter.ROOM_DEPARTMENT
+    columns = LoadColumns()
+    level_codes = {}
+    department_codes = {}
+    nan = float("nan")
+
+    for room in spatial_elements(doc, category_name):
+        area = room.Area
+        if area <= 0:
+            continue  # не размещено или не окружено
+        level_id = room.LevelId
+        level_code = level_codes.get(level_id)
+        if level_code is None:
+            level = doc.GetElement(level_id)
+            level_code = level_codes[level_id] = len(columns.level_names)
+            columns.level_names.append(level.Name if level is not None else "")
+            columns.level_elevations.append(level.Elevation if level is not None else 0.0)
+
+        department_param = room.get_Parameter(department_id)
+        department = (department_param.AsString() if department_param else None) or ""
+        department_code = department_codes.get(department)
+        if department_code is None:
+            department_code = department_codes[department] = len(columns.department_names)
+            columns.department_names.append(department)
+
+        param = room.get_Parameter(load_def)
+        columns.level_codes.append(level_code)
+        columns.department_codes.append(department_code)
+        columns.areas.append(area_from_internal(area))
+        columns.loads.append(load_from_internal(param.AsDouble())
+                             if param is not None and param.HasValue else nan)
+    return columns
+
+
+class GroupSummary(object):
+    """Итог по группе помещений"""
+
+    __slots__ = ("name", "rooms", "area", "loaded_area", "total", "max_load", "avg_load")
+
+    def __init__(self, name, rooms, area, loaded_area, total, max_load):
+        self.name = name
+        self.rooms = int(rooms)
+        self.area = float(area)                  # м², все помещения
+        self.loaded_area = float(loaded_area)    # м², с заданной нагрузкой
+        self.total = float(total) / 1000.0       # т (Σ площадь × нагрузка)
+        self.max_load = float(max_load) if max_load is not None else None  # кг/м²
+        self.avg_load = float(total) / self.loaded_area if self.loaded_area > 0 else None  # кг/м²
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+def _group_numpy(codes, count, areas, loads):
+    codes = np.asarray(codes, dtype=np.intp)
+    areas = np.asarray(areas, dtype=float)
+    loads = np.asarray(loads, dtype=float)
+    loaded = ~np.isnan(loads)
+    loaded_areas = np.where(loaded, areas, 0.0)
+
+    rooms = np.bincount(codes, minlength=count)
+    area = np.bincount(codes, weights=areas, minlength=count)
+    loaded_area = np.bincount(codes, weights=loaded_areas, minlength=count)
+    total = np.bincount(codes, weights=np.where(loaded, areas * loads, 0.0), minlength=count)
+    maxima = np.full(count, -np.inf)
+    np.maximum.at(maxima, codes[loaded], loads[loaded])
+    return [(rooms[i], area[i], loaded_area[i], total[i],
+             maxima[i] if np.isfinite(maxima[i]) else None) for i in range(count)]
+
+
+def _group_python(codes, count, areas, loads):
+    rooms = [0] * count
+    area = [0.0] * count
+    loaded_area = [0.0] * count
+    total = [0.0] * count
+    maxima = [None] * count
+    for code, a, load in zip(codes, areas, loads):
+        rooms[code] += 1
+        area[code] += a
+        if not math.isnan(load):
+            loaded_area[code] += a
+            total[code] += a * load
+            if maxima[code] is None or load > maxima[code]:
+                maxima[code] = load
+    return list(zip(rooms, area, loaded_area, total, maxima))
+
+
+def group_by(codes, names, areas, loads):
+    """GroupSummary по каждой группе names (коды - индексы в names)"""
+    group = _group_numpy if np is not None else _group_python
+    return [GroupSummary(name, *values)
+            for name, values in zip(names, group(codes, len(names), areas, loads))]
+
+
+class LoadSummary(object):
+    """Итоги по уровням (по отметке), назначениям и по всему зданию"""
+
+    def __init__(self, columns):
+        areas, loads = columns.areas, columns.loads
+        level_codes, department_codes = columns.level_codes, columns.department_codes
+        total_codes = [0] * len(columns)
+        if np is not None:
+            # Столбцы переводятся в массивы один раз для всех группировок
+            areas, loads = np.asarray(areas, dtype=float), np.asarray(loads, dtype=float)
+            level_codes = np.asarray(level_codes, dtype=np.intp)
+            department_codes = np.asarray(department_codes, dtype=np.intp)
+            total_codes = np.zeros(len(columns), dtype=np.intp)
+
+        by_level = group_by(level_codes, columns.level_names, areas, loads)
+        order = sorted(range(len(by_level)), key=lambda i: columns.level_elevations[i])
+        self.levels = [by_level[i] for i in order]
+        self.departments = sorted(group_by(department_codes, columns.department_names, areas, loads),
+                                  key=lambda g: g.name)
+        self.total = group_by(total_codes, ["Итого"], areas, loads)[0]
+
+    def as_dict(self):
+        return {
+            "levels": [g.as_dict() for g in self.levels],
+            "departments": [g.as_dict() for g in self.departments],
+            "total": self.total.as_dict(),
+        }
+
+
+# ===================== ТАБЛИЦА СВОДКИ =====================
+SUMMARY_COLUMNS = ("Группа", "Помещений", "Площадь, м²", "Площадь с нагрузкой, м²",
+                   "Средняя нагрузка, кг/м²", "Макс. нагрузка, кг/м²", "Суммарная нагрузка, т")
+
+
+def _number(value, digits):
+    if value is None:
+        return "-"
+    return "{:.{}f}".format(value, digits).replace(".", ",")
+
+
+def _row(group, name=None):
+    return (group.name if name is None else name, str(group.rooms),
+            _number(group.area, 1), _number(group.loaded_area, 1),
+            _number(group.avg_load, 1), _number(group.max_load, 1), _number(group.total, 2))
+
+
+def summary_rows(summary):
+    """Строки текстовой таблицы сводки: заголовок, уровни, назначения, итог"""
+    blank = ("",) * (len(SUMMARY_COLUMNS) - 1)
+    rows = [SUMMARY_COLUMNS, ("По уровням",) + blank]
+    rows.extend(_row(group) for group in summary.levels)
+    rows.append(("По назначениям",) + blank)
+    rows.extend(_row(group, group.name or "<без назначения>") for group in summary.departments)
+    rows.append(_row(summary.total))
+    return rows
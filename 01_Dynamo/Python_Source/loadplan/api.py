@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Ленивый доступ к Revit API.
+
+Сборки RevitAPI/RevitServices подключаются при первом вызове backend().
+Вне Revit можно подставить свою реализацию через use_backend().
+
+Разрешенные по имени категории хранятся в кэше модуля: пакет остается в
+sys.modules движка Python Dynamo, поэтому кэш переживает повторные запуски
+узлов и сбрасывается только при смене бэкенда.
+"""
+
+_backend = None
+_category_ids = {}   # имя BuiltInCategory -> ElementId
+_categories = {}     # (ключ документа, имя BuiltInCategory) -> Category
+
+
+class RevitBackend(object):
+    """Настоящий Revit API (скрипт запущен из Dynamo внутри Revit)"""
+
+    def __init__(self):
+        import clr
+        clr.AddReference('RevitAPI')
+        clr.AddReference('RevitServices')
+        import Autodesk.Revit.DB as DB
+        from RevitServices.Transactions import TransactionManager
+        from System.Collections.Generic import List
+        self.DB = DB
+        self.TransactionManager = TransactionManager
+        self.List = List
+
+
+def backend():
+    """Текущий бэкенд (создается при первом обращении)"""
+    global _backend
+    if _backend is None:
+        _backend = RevitBackend()
+    return _backend
+
+
+def use_backend(new_backend):
+    """Подмена бэкенда; None - вернуться к Revit API"""
+    global _backend
+    _backend = new_backend
+    _category_ids.clear()
+    _categories.clear()
+
+
+def db():
+    """Пространство имен Autodesk.Revit.DB текущего бэкенда"""
+    return backend().DB
+
+
+def transactions():
+    """TransactionManager.Instance текущего бэкенда"""
+    return backend().TransactionManager.Instance
+
+
+def net_list(item_type, items):
+    """List<item_type> .NET для методов API, принимающих IList/ICollection"""
+    return backend().List[item_type](items)
+
+
+def category_id(name):
+    """ElementId категории по имени BuiltInCategory (OST_Rooms и т.п.)"""
+    result = _category_ids.get(name)
+    if result is None:
+        DB = db()
+        result = _category_ids[name] = DB.ElementId(getattr(DB.BuiltInCategory, name))
+    return result
+
+
+def category(doc, name):
+    """Category документа по имени BuiltInCategory или None"""
+    key = (doc.GetHashCode(), name)
+    if key in _categories:
+        return _categories[key]
+    DB = db()
+    result = _categories[key] = DB.Category.GetCategory(doc, getattr(DB.BuiltInCategory, name))
+    return result
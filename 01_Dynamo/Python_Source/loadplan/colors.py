@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""Цветовая схема и легенда нагрузок (скрипт 2, шаг 3).
+
+Значения нагрузок собираются одним проходом по помещениям, по ним строятся
+записи ColorFillScheme с детерминированной палитрой: от зеленого (малые
+нагрузки) к красному (большие). Схема одна на документ, все планы пакета
+используют ее общей; при каждом запуске ее записи сверяются с нужными и
+меняются только отличающиеся.
+
+ColorFillScheme и ColorFillLegend доступны в API начиная с Revit 2022;
+в более ранних версиях available() возвращает False и легенда остается
+ручным шагом.
+"""
+from . import api
+from . import timing
+from .rooms import spatial_elements
+from .units import load_from_internal, load_to_internal
+
+LEGEND_TITLE = "Легенда нагрузок, кг/м²"
+VALUE_DIGITS = 2  # округление значений при сборе, кг/м²
+
+# Опорные цвета палитры (RGB): зеленый -> желтый -> оранжевый -> красный
+PALETTE_STOPS = ((76, 175, 80), (255, 235, 59), (255, 152, 0), (229, 57, 53))
+
+
+def available():
+    """Поддерживает ли текущий Revit API схемы и легенды заливки"""
+    DB = api.db()
+    return hasattr(DB, "ColorFillScheme") and hasattr(DB, "ColorFillLegend")
+
+
+# ===================== ЗНАЧЕНИЯ И ПАЛИТРА =====================
+def distinct_loads(doc, load_def, category_name="OST_Rooms"):
+    """Отсортированные различные нагрузки помещений, кг/м²"""
+    values = set()
+    for room in spatial_elements(doc, category_name):
+        param = room.get_Parameter(load_def)
+        if param is not None and param.HasValue:
+            values.add(round(load_from_internal(param.AsDouble()), VALUE_DIGITS))
+    return tuple(sorted(values))
+
+
+def gradient_palette(count):
+    """count цветов, равномерно распределенных по PALETTE_STOPS"""
+    if count <= 0:
+        return []
+    if count == 1:
+        return [PALETTE_STOPS[0]]
+    colors = []
+    segments = len(PALETTE_STOPS) - 1
+    for i in range(count):
+        position = i * segments / (count - 1)
+        index = min(int(position), segments - 1)
+        t = position - index
+        start, end = PALETTE_STOPS[index], PALETTE_STOPS[index + 1]
+        colors.append(tuple(int(round(a + (b - a) * t)) for a, b in zip(start, end)))
+    return colors
+
+
+def scheme_entries(values, ranges=None):
+    """Записи схемы [(значение кг/м², (r, g, b))].
+
+    Без ranges - по одному цвету на значение; с ranges (нижние границы
+    диапазонов, кг/м²) - по цвету на диапазон.
+    """
+    keys = tuple(sorted(set(ranges))) if ranges else tuple(values)
+    return list(zip(keys, gradient_palette(len(keys))))
+
+
+# ===================== REVIT =====================
+def solid_fill_id(doc):
+    """Id образца сплошной заливки или InvalidElementId"""
+    DB = api.db()
+    timing.count("collector_scans")
+    for pattern in DB.FilteredElementCollector(doc).OfClass(DB.FillPatternElement):
+        if pattern.GetFillPattern().IsSolidFill:
+            return pattern.Id
+    return DB.ElementId.InvalidElementId
+
+
+def _find_scheme(doc, category_id, title):
+    """Схема категории с заголовком title или первая схема категории"""
+    DB = api.db()
+    first = None
+    timing.count("collector_scans")
+    for scheme in DB.FilteredElementCollector(doc).OfClass(DB.ColorFillScheme):
+        if scheme.CategoryId != category_id:
+            continue
+        if scheme.Name == title:
+            return scheme, True
+        if first is None:
+            first = scheme
+    return first, False
+
+
+def ensure_load_scheme(doc, load_def, entries, by_range=False,
+                       category_name="OST_Rooms", title=LEGEND_TITLE):
+    """Схема заливки по параметру нагрузки с записями entries.
+
+    Возвращает (схема, изменена ли). Записи сверяются с scheme.GetEntries()
+    при каждом вызове (их могли изменить вручную или откатить вместе с
+    транзакцией), записываются только отличающиеся.
+    """
+    DB = api.db()
+    category_id = api.category_id(category_name)
+    scheme, own = _find_scheme(doc, category_id, title)
+    if scheme is None:
+        raise Exception("В проекте нет цветовых схем для категории - создайте одну через 'Изменить схему'")
+    if not own:
+        scheme = doc.GetElement(scheme.Duplicate(title))
+        timing.count("elements_created")
+
+    changed = not own
+    if scheme.ParameterDefinition != load_def.Id:
+        scheme.ParameterDefinition = load_def.Id
+        changed = True
+    if scheme.Title != title:
+        scheme.Title = title
+        changed = True
+    if scheme.IsByRange != bool(by_range):
+        scheme.IsByRange = bool(by_range)
+        changed = True
+
+    solid_id = None
+    existing = {}
+    for entry in scheme.GetEntries():
+        existing[round(load_from_internal(entry.GetDoubleValue()), VALUE_DIGITS)] = entry
+    wanted = {}
+    for value, (r, g, b) in entries:
+        wanted[round(value, VALUE_DIGITS)] = DB.Color(r, g, b)
+
+    for value, entry in existing.items():
+        if value not in wanted and not entry.IsInUse:
+            scheme.RemoveEntry(entry)
+            changed = True
+    for value, color in wanted.items():
+        entry = existing.get(value)
+        if entry is not None and entry.Color.IsValid and \
+                (entry.Color.Red, entry.Color.Green, entry.Color.Blue) == (color.Red, color.Green, color.Blue):
+            continue
+        if solid_id is None:
+            solid_id = solid_fill_id(doc)
+        changed = True
+        if entry is None:
+            entry = DB.ColorFillSchemeEntry(DB.StorageType.Double)
+            entry.SetDoubleValue(load_to_internal(value))
+            entry.Color = color
+            entry.FillPatternId = solid_id
+            scheme.AddEntry(entry)
+        else:
+            entry.Color = color
+            entry.FillPatternId = solid_id
+            scheme.UpdateEntry(entry)
+    return scheme, changed
+
+
+def find_legend(doc, view, category_id):
+    """Легенда заливки категории на виде или None"""
+    DB = api.db()
+    timing.count("collector_scans")
+    for legend in DB.FilteredElementCollector(doc, view.Id).OfClass(DB.ColorFillLegend):
+        if legend.CategoryId == category_id:
+            return legend
+    return None
+
+
+def apply_scheme(doc, view, scheme, category_name="OST_Rooms", reuse_legend=False):
+    """Назначение схемы виду и размещение легенды в левом верхнем углу подрезки.
+
+    reuse_legend - не создавать легенду, если на виде она уже есть
+    (обновление ранее созданного плана). Возвращает (легенда, создана).
+    """
+    DB = api.db()
+    category_id = api.category_id(category_name)
+    if view.GetColorFillSchemeId(category_id) != scheme.Id:
+        view.SetColorFillSchemeId(category_id, scheme.Id)
+    if reuse_legend:
+        legend = find_legend(doc, view, category_id)
+        if legend is not None:
+            return legend, False
+    crop = view.CropBox
+    # Min/Max подрезки заданы в ее системе координат: у повернутого или
+    # смещенного плана левый верхний угол переводится в модель
+    corner = crop.Transform.OfPoint(DB.XYZ(crop.Min.X, crop.Max.Y, crop.Min.Z))
+    origin = DB.XYZ(corner.X, corner.Y, 0)
+    return DB.ColorFillLegend.Create(doc, view.Id, category_id, origin), True
@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+"""Экспорт и импорт нагрузок помещений в CSV/XLSX (скрипт 4).
+
+Экспорт пишет строки по мере чтения модели, без промежуточной таблицы.
+Импорт читает файл построчно и сопоставляет строки с помещениями через
+индекс модели: по UniqueId, затем по паре (номер, уровень), затем по
+номеру. Если паре или номеру соответствует несколько помещений, строка не
+применяется и попадает в отчет как неоднозначная; так же отчет показывает
+строки, повторно указывающие на одно помещение (при разных значениях
+помещение не меняется). В память попадают только строки, где значение
+действительно меняется; они записываются в одной транзакции.
+
+XLSX читается и пишется стандартной библиотекой (zipfile + iterparse),
+поэтому openpyxl в среде Dynamo не нужен.
+"""
+import csv
+import os
+import re
+import zipfile
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from . import api
+from .rooms import level_namer, room_name, spatial_elements
+from .units import load_from_internal, load_to_internal
+
+COLUMNS = ("UniqueId", "Номер", "Наименование", "Уровень", "Нагрузка, кг/м²")
+TOLERANCE = 1e-6  # кг/м²
+CSV_DELIMITER = ";"
+
+# Результат RoomIndex.find: строке соответствует несколько помещений
+AMBIGUOUS = object()
+
+
+# ===================== МОДЕЛЬ =====================
+def iter_room_rows(doc, load_def, category_name="OST_Rooms"):
+    """Строки экспорта по помещениям модели (генератор)"""
+    level_name = level_namer(doc)
+    for room in spatial_elements(doc, category_name):
+        param = room.get_Parameter(load_def)
+        load = load_from_internal(param.AsDouble()) if param is not None and param.HasValue else None
+        yield (room.UniqueId, room.Number, room_name(room), level_name(room.LevelId), load)
+
+
+class RoomIndex(object):
+    """Хеш-индекс помещений модели для сопоставления строк файла"""
+
+    def __init__(self):
+        self.by_unique_id = {}
+        self.by_number_level = {}
+        self.by_number = {}
+        self.skipped = []  # помещения без параметра нагрузки или только для чтения
+
+    def add(self, key, unique_id, number, level, current):
+        entry = (key, current)
+        self.by_unique_id[unique_id] = entry
+        by_number_level = self.by_number_level
+        by_number_level[(number, level)] = AMBIGUOUS if (number, level) in by_number_level else entry
+        self.by_number[number] = AMBIGUOUS if number in self.by_number else entry
+
+    def find(self, unique_id, number, level):
+        """(ключ, текущая нагрузка), AMBIGUOUS или None"""
+        if unique_id:
+            entry = self.by_unique_id.get(unique_id)
+            if entry is not None:
+                return entry
+        if number:
+            entry = self.by_number_level.get((number, level))
+            if entry is not None:
+                return entry
+            return self.by_number.get(number)
+        return None
+
+
+def build_room_index(doc, load_def, category_name="OST_Rooms"):
+    """Индекс помещений; ключ - параметр нагрузки помещения"""
+    index = RoomIndex()
+    level_name = level_namer(doc)
+    for room in spatial_elements(doc, category_name):
+        param = room.get_Parameter(load_def)
+        if param is None or param.IsReadOnly:
+            index.skipped.append(room)
+            continue
+        current = load_from_internal(param.AsDouble()) if param.HasValue else None
+        index.add(param, room.UniqueId, room.Number, level_name(room.LevelId), current)
+    return index
+
+
+# ===================== CSV =====================
+def _write_csv(path, rows):
+    count = 0
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f, delimiter=CSV_DELIMITER)
+        writer.writerow(COLUMNS)
+        for row in rows:
+            writer.writerow(["" if value is None else _format_number(value) for value in row])
+            count += 1
+    return count
+
+
+def _read_csv(path):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        delimiter = ";" if sample.count(";") >= sample.count(",") else ","
+        for row in csv.reader(f, delimiter=delimiter):
+            yield row
+
+
+def _format_number(value):
+    if isinstance(value, float):
+        return ("%.6f" % value).rstrip("0").rstrip(".")
+    return value
+
+
+# ===================== XLSX =====================
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Нагрузки" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'),
+}
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+def _xlsx_cell(value):
+    if value is None or value == "":
+        return "<c/>"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{_format_number(float(value))}</v></c>"
+    return f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+def _write_xlsx(path, rows):
+    count = 0
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, content in _XLSX_PARTS.items():
+            zf.writestr(name, content)
+        with zf.open("xl/worksheets/sheet1.xml", "w") as f:
+            f.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                    b'<sheetData>')
+            f.write(("<row>" + "".join(_xlsx_cell(c) for c in COLUMNS) + "</row>").encode("utf-8"))
+            for row in rows:
+                f.write(("<row>" + "".join(_xlsx_cell(c) for c in row) + "</row>").encode("utf-8"))
+                count += 1
+            f.write(b"</sheetData></worksheet>")
+    return count
+
+
+def _column_index(reference):
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - 64)
+    return index - 1
+
+
+def _shared_strings(zf):
+    try:
+        f = zf.open("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    strings = []
+    with f:
+        for _, elem in ElementTree.iterparse(f):
+            if elem.tag == _NS + "si":
+                strings.append("".join(t.text or "" for t in elem.iter(_NS + "t")))
+                elem.clear()
+    return strings
+
+
+def _read_xlsx(path):
+    with zipfile.ZipFile(path) as zf:
+        shared = _shared_strings(zf)
+        sheets = sorted(n for n in zf.namelist() if re.match(r"xl/worksheets/sheet\d+\.xml$", n))
+        if not sheets:
+            return
+        with zf.open(sheets[0]) as f:
+            sheet_data = None
+            for event, elem in ElementTree.iterparse(f, events=("start", "end")):
+                if event == "start":
+                    if elem.tag == _NS + "sheetData":
+                        sheet_data = elem
+                    continue
+                if elem.tag != _NS + "row":
+                    continue
+                row = []
+                for cell in elem.iter(_NS + "c"):
+                    reference = cell.get("r")
+                    if reference:
+                        column = _column_index(reference)
+                        row.extend([""] * (column - len(row)))
+                    kind = cell.get("t")
+                    if kind == "inlineStr":
+                        value = "".join(t.text or "" for t in cell.iter(_NS + "t"))
+                    else:
+                        v = cell.find(_NS + "v")
+                        value = v.text if v is not None and v.text is not None else ""
+                        if kind == "s" and value:
+                            value = shared[int(value)]
+                    row.append(value)
+                yield row
+                if sheet_data is not None:
+                    sheet_data.clear()
+
+
+# ===================== ФАЙЛЫ =====================
+def write_rows(path, rows):
+    """Запись строк в CSV или XLSX (по расширению); число строк"""
+    if os.path.splitext(path)[1].lower() == ".xlsx":
+        return _write_xlsx(path, rows)
+    return _write_csv(path, rows)
+
+
+def read_rows(path):
+    """Построчное чтение CSV или XLSX (по расширению), включая заголовок"""
+    if os.path.splitext(path)[1].lower() == ".xlsx":
+        return _read_xlsx(path)
+    return _read_csv(path)
+
+
+def _parse_load(text):
+    text = str(text).strip().replace("\u00a0", "").replace(" ", "").replace(",", ".")
+    if not text:
+        return None
+    return float(text)
+
+
+class ImportReport(object):
+    """Итог импорта"""
+
+    def __init__(self):
+        self.changes = []     # [(ключ, нагрузка кг/м²)]
+        self.rows = 0
+        self.unchanged = 0
+        self.empty = 0
+        self.not_found = []   # [(строка, UniqueId, номер)]
+        self.ambiguous = []   # [(строка, UniqueId, номер)] - несколько помещений
+        self.duplicates = []  # [(строка, первая строка, UniqueId, номер)]
+        self.conflicts = 0    # помещений с разными значениями в повторных строках
+        self.invalid = []     # [(строка, значение)]
+        self.skipped = []     # [помещение] без параметра нагрузки или только для чтения
+
+
+def plan_import(rows, index, tolerance=TOLERANCE):
+    """Сопоставление строк файла с индексом модели за один проход.
+
+    rows - строки файла с заголовком (столбцы ищутся по COLUMNS, нагрузка -
+    по началу "Нагрузка"). Возвращает ImportReport; помещение, на которое
+    указывают строки с разными значениями, не меняется.
+    """
+    report = ImportReport()
+    rows = iter(rows)
+    header = [str(cell).strip() for cell in next(rows, [])]
+
+    def column(prefix):
+        for i, name in enumerate(header):
+            if name.startswith(prefix):
+                return i
+        return None
+
+    uid_col, number_col, level_col, load_col = (
+        column("UniqueId"), column("Номер"), column("Уровень"), column("Нагрузка"))
+    if load_col is None or (uid_col is None and number_col is None):
+        raise ValueError("В файле нет столбцов нагрузки и UniqueId/номера помещения")
+
+    def cell(row, i):
+        return str(row[i]).strip() if i is not None and i < len(row) else ""
+
+    planned = {}      # id записи индекса -> (первая строка, нагрузка)
+    conflicts = set()
+    changes = []      # [(id записи индекса, ключ, нагрузка)]
+    for line, row in enumerate(rows, 2):
+        report.rows += 1
+        raw = cell(row, load_col)
+        try:
+            load = _parse_load(raw)
+        except ValueError:
+            report.invalid.append((line, raw))
+            continue
+        if load is None:
+            report.empty += 1
+            continue
+        unique_id, number = cell(row, uid_col), cell(row, number_col)
+        entry = index.find(unique_id, number, cell(row, level_col))
+        if entry is None:
+            report.not_found.append((line, unique_id, number))
+            continue
+        if entry is AMBIGUOUS:
+            report.ambiguous.append((line, unique_id, number))
+            continue
+        first = planned.get(id(entry))
+        if first is not None:
+            report.duplicates.append((line, first[0], unique_id, number))
+            if abs(first[1] - load) > tolerance:
+                conflicts.add(id(entry))
+            continue
+        planned[id(entry)] = (line, load)
+        key, current = entry
+        if current is not None and abs(current - load) <= tolerance:
+            report.unchanged += 1
+        else:
+            changes.append((id(entry), key, load))
+    report.changes = [(key, load) for entry_id, key, load in changes if entry_id not in conflicts]
+    report.conflicts = len(conflicts)
+    return report
+
+
+def export_loads(doc, path, load_def, category_name="OST_Rooms"):
+    """Экспорт нагрузок помещений в файл; число строк"""
+    return write_rows(path, iter_room_rows(doc, load_def, category_name))
+
+
+def import_loads(doc, path, load_def, category_name="OST_Rooms", dry_run=False):
+    """Импорт нагрузок из файла; запись только изменившихся значений"""
+    index = build_room_index(doc, load_def, category_name)
+    report = plan_import(read_rows(path), index)
+    report.skipped = index.skipped
+    if report.changes and not dry_run:
+        tm = api.transactions()
+        tm.EnsureInTransaction(doc)
+        try:
+            for param, load in report.changes:
+                param.Set(load_to_internal(load))
+        finally:
+            tm.TransactionTaskDone()
+    return report
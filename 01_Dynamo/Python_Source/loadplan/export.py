@@ -0,0 +1,528 @@
+# -*- coding: utf-8 -*-
+"""Пакетный экспорт листов нагрузок в PDF и PNG (скрипт 7, этап 8 MANUAL).
+
+Листы с префиксом SHEET_PREFIX собираются в комплект по номерам и
+экспортируются в PDF одним заданием Document.Export (Revit 2022+), по файлу
+на лист. Затем PDF растрируются в PNG внешней программой (pdftoppm, mutool,
+Ghostscript) или PyMuPDF параллельно в пуле процессов.
+
+Папка экспорта содержит manifest.json: порядок комплекта и для каждого
+листа отпечаток (SHA-1 номера, имени, видовых экранов, помещений уровней и
+спецификаций), имена PDF и PNG. Повторный запуск экспортирует только листы
+с новым отпечатком и растрирует только PDF, которые изменились или были
+получены с другим dpi.
+
+Revit нужен только RevitPdfExporter; очередь, манифест и растеризацию
+можно проверить без Revit, подставив свой SheetExporter (revitfake).
+"""
+import abc
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from importlib.util import find_spec
+
+from . import api
+from . import timing
+
+VERSION = 1
+MANIFEST_NAME = "manifest.json"
+FOLDER_SUFFIX = "_Листы"
+DPI = 300
+RASTER_TIMEOUT = 600  # секунд на один PDF
+DIGITS = 6            # округление координат в отпечатке
+
+# Внешние растеризаторы: (имя программы, шаблон команды) в порядке выбора
+RASTER_COMMANDS = (
+    ("pdftoppm", ("{exe}", "-r", "{dpi}", "-png", "{pdf}", "{prefix}")),
+    ("mutool", ("{exe}", "draw", "-q", "-r", "{dpi}", "-o", "{prefix}-%d.png", "{pdf}")),
+    ("gswin64c", ("{exe}", "-q", "-dSAFER", "-dBATCH", "-dNOPAUSE", "-sDEVICE=png16m",
+                  "-r{dpi}", "-dTextAlphaBits=4", "-dGraphicsAlphaBits=4",
+                  "-sOutputFile={prefix}-%d.png", "{pdf}")),
+    ("gs", ("{exe}", "-q", "-dSAFER", "-dBATCH", "-dNOPAUSE", "-sDEVICE=png16m",
+            "-r{dpi}", "-dTextAlphaBits=4", "-dGraphicsAlphaBits=4",
+            "-sOutputFile={prefix}-%d.png", "{pdf}")),
+)
+
+_UNSAFE = re.compile(r'[\\/:*?"<>|]')
+
+
+# ===================== КОМПЛЕКТ ЛИСТОВ =====================
+def _natural_key(text):
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", text)]
+
+
+def collect_sheets(snap, prefix):
+    """Листы снимка с номером на prefix в порядке номеров (Н-2 раньше Н-10)"""
+    sheets = [sheet for number, sheet in snap.sheets.items() if number.startswith(prefix)]
+    sheets.sort(key=lambda sheet: _natural_key(sheet.SheetNumber))
+    return sheets
+
+
+def file_stem(number):
+    """Имя файла листа без расширения: номер без запрещенных символов"""
+    return _UNSAFE.sub("_", number).strip() or "sheet"
+
+
+def default_folder(doc):
+    """Папка "<модель>_Листы" рядом с моделью; для несохраненной - во временной папке"""
+    path = doc.PathName
+    if path and os.path.isabs(path):
+        return os.path.splitext(path)[0] + FOLDER_SUFFIX
+    title = _UNSAFE.sub("_", doc.Title or "document")
+    return os.path.join(tempfile.gettempdir(), "loadplan", title + FOLDER_SUFFIX)
+
+
+def _round(*values):
+    return tuple(round(value, DIGITS) for value in values)
+
+
+def sheet_checksums(doc, sheets, fingerprints=None, category_name="OST_Rooms"):
+    """{UniqueId листа: отпечаток того, что видно на листе}.
+
+    fingerprints - {LevelId: отпечаток помещений} (fingerprint.level_fingerprints).
+    В отпечаток входят номер, имя и формат листа, видовые экраны (вид,
+    масштаб, подрезка, центр, цветовая схема, помещения уровня вида) и
+    спецификации. Спецификация нагрузок перечисляет помещения всех уровней,
+    поэтому ее содержимое представлено отпечатками всех уровней. Аннотации,
+    нарисованные прямо на листе, не учитываются - для них есть FORCE.
+    """
+    DB = api.db()
+    fingerprints = fingerprints or {}
+    rooms = hashlib.sha1(repr(sorted(fingerprints.values())).encode("utf-8")).hexdigest()
+    category_id = api.category_id(category_name)
+
+    schedules = {}
+    timing.count("collector_scans")
+    for instance in DB.FilteredElementCollector(doc).OfClass(DB.ScheduleSheetInstance):
+        schedules.setdefault(instance.OwnerViewId, []).append(instance)
+
+    result = {}
+    for sheet in sheets:
+        outline = sheet.Outline
+        viewports = []
+        for viewport_id in sheet.GetAllViewports():
+            viewport = doc.GetElement(viewport_id)
+            view = doc.GetElement(viewport.ViewId)
+            crop, center = view.CropBox, viewport.GetBoxCenter()
+            level = getattr(view, "GenLevel", None)
+            viewports.append((
+                view.UniqueId, view.Name, view.Scale, view.CropBoxActive,
+                _round(crop.Min.X, crop.Min.Y, crop.Max.X, crop.Max.Y, center.X, center.Y),
+                str(view.GetColorFillSchemeId(category_id)),
+                fingerprints.get(level.Id) if level is not None else None))
+        tables = []
+        for instance in schedules.get(sheet.Id, ()):
+            schedule = doc.GetElement(instance.ScheduleId)
+            point = instance.Point
+            tables.append((schedule.UniqueId, schedule.Name, _round(point.X, point.Y), rooms))
+        digest = hashlib.sha1(repr((
+            sheet.SheetNumber, sheet.Name,
+            _round(outline.Min.U, outline.Min.V, outline.Max.U, outline.Max.V),
+            sorted(viewports), sorted(tables))).encode("utf-8"))
+        result[sheet.UniqueId] = digest.hexdigest()
+    return result
+
+
+# ===================== МАНИФЕСТ =====================
+def _signature(path):
+    """[время изменения, размер] файла или None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime, stat.st_size]
+
+
+class ExportManifest(object):
+    """manifest.json папки экспорта: порядок комплекта и записи листов.
+
+    Запись {UniqueId листа: ...} - номер, имя, отпечаток (checksum), имя PDF,
+    dpi и имена PNG, png_source - [время, размер] PDF, из которого получены
+    PNG. Поврежденный или несовместимый файл читается как пустой.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = {}
+        self.order = []
+        self.dirty = False
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == VERSION:
+            self.records = data.get("sheets") or {}
+            self.order = data.get("order") or []
+
+    def get(self, sheet_uid):
+        return self.records.get(sheet_uid)
+
+    def set(self, sheet_uid, record):
+        if self.records.get(sheet_uid) != record:
+            self.records[sheet_uid] = record
+            self.dirty = True
+
+    def remove(self, sheet_uid):
+        if self.records.pop(sheet_uid, None) is not None:
+            self.dirty = True
+
+    def set_order(self, order):
+        if self.order != order:
+            self.order = order
+            self.dirty = True
+
+    def save(self):
+        """Запись файла (через временный, чтобы не оставить его обрезанным)"""
+        if not self.dirty:
+            return False
+        temp = self.path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "order": self.order, "sheets": self.records},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(temp, self.path)
+        self.dirty = False
+        return True
+
+
+def _remove_files(folder, names):
+    """Удаление созданных экспортом файлов (отсутствующие пропускаются)"""
+    for name in names:
+        try:
+            os.remove(os.path.join(folder, name))
+        except OSError:
+            pass
+
+
+# ===================== ЭКСПОРТ PDF =====================
+class SheetExporter(abc.ABC):
+    """Экспорт листов в PDF одним заданием, по файлу на лист.
+
+    Для Revit - RevitPdfExporter; без Revit подставляется своя реализация.
+    """
+
+    @abc.abstractmethod
+    def export(self, sheets, folder):
+        """{UniqueId листа: путь PDF} для sheets, выгруженных в folder"""
+
+
+class RevitPdfExporter(SheetExporter):
+    """Document.Export с PDFExportOptions (Revit 2022+) по настройкам этапа 8.1
+    MANUAL: формат бумаги по листу, масштаб 100 %, по центру, в цвете, без
+    границ подрезки, рабочих плоскостей и неиспользуемых марок видов.
+
+    Revit выполняет экспорт только вне транзакции; проверять это должен
+    вызывающий скрипт - транзакцию Dynamo здесь не закрывают."""
+
+    def __init__(self, doc):
+        self.doc = doc
+
+    def options(self):
+        DB = api.db()
+        if not hasattr(DB, "PDFExportOptions"):
+            raise Exception("Экспорт PDF через API доступен с Revit 2022; "
+                            "в более ранних версиях печатайте листы вручную (MANUAL, этап 8.1)")
+        options = DB.PDFExportOptions()
+        options.Combine = False
+        options.PaperFormat = DB.ExportPaperFormat.Default
+        options.PaperPlacement = DB.PaperPlacementType.Center
+        options.ZoomType = DB.ZoomType.Zoom
+        options.ZoomPercentage = 100
+        options.ColorDepth = DB.ColorDepthType.Color
+        options.HideCropBoundaries = True
+        options.HideReferencePlane = True
+        options.HideScopeBoxes = True
+        options.HideUnreferencedViewTags = True
+        # Имя файла - номер листа
+        rule = DB.TableCellCombinedParameterData.Create()
+        rule.CategoryId = api.category_id("OST_Sheets")
+        rule.ParamId = DB.ElementId(DB.BuiltInParameter.SHEET_NUMBER)
+        options.SetNamingRule(api.net_list(DB.TableCellCombinedParameterData, [rule]))
+        return options
+
+    def export(self, sheets, folder):
+        DB = api.db()
+        options = self.options()
+        ids = api.net_list(DB.ElementId, [sheet.Id for sheet in sheets])
+        if not self.doc.Export(folder, ids, options):
+            raise Exception("Revit не выполнил экспорт листов в PDF")
+        return {sheet.UniqueId: os.path.join(folder, file_stem(sheet.SheetNumber) + ".pdf")
+                for sheet in sheets}
+
+
+# ===================== РАСТЕРИЗАЦИЯ =====================
+def page_files(prefix):
+    """PNG страниц <prefix>-N.png по номерам страниц.
+
+    Имя файла сверяется целиком: для листа Н-1 не подходит Н-1-2-1.png
+    (страница 1 листа Н-1-2).
+    """
+    page = re.compile(r"^{}-(\d+)\.png$".format(re.escape(os.path.basename(prefix))),
+                      re.IGNORECASE if os.name == "nt" else 0)
+    found = []
+    for path in glob.glob(glob.escape(prefix) + "-*.png"):
+        match = page.match(os.path.basename(path))
+        if match is not None:
+            found.append((int(match.group(1)), path))
+    return [path for _, path in sorted(found)]
+
+
+class CommandRasterizer(object):
+    """Внешняя программа: args - шаблон команды с {exe}, {pdf}, {prefix}, {dpi};
+    страницы сохраняются как <prefix>-N.png"""
+
+    def __init__(self, name, args, executable=""):
+        self.name = name
+        self.args = tuple(args)
+        self.executable = executable
+
+    def __call__(self, pdf, prefix, dpi):
+        command = [arg.format(exe=self.executable, pdf=pdf, prefix=prefix, dpi=dpi)
+                   for arg in self.args]
+        completed = subprocess.run(command, capture_output=True, timeout=RASTER_TIMEOUT,
+                                   creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        if completed.returncode != 0:
+            lines = completed.stderr.decode("utf-8", "replace").strip().splitlines()
+            raise Exception(f"{self.name} завершился с кодом {completed.returncode}"
+                            + (f": {lines[-1]}" if lines else ""))
+        return page_files(prefix)
+
+
+class PyMuPdfRasterizer(object):
+    """Растеризация модулем fitz (PyMuPDF) в процессе Python"""
+
+    name = "PyMuPDF"
+
+    def __call__(self, pdf, prefix, dpi):
+        import fitz
+        outputs = []
+        with fitz.open(pdf) as document:
+            for number, page in enumerate(document, 1):
+                path = f"{prefix}-{number}.png"
+                page.get_pixmap(dpi=dpi).save(path)
+                outputs.append(path)
+        return outputs
+
+
+def find_rasterizer(command=""):
+    """Растеризатор по настройке RASTERIZER или None, если ничего не найдено.
+
+    command - пусто (PyMuPDF, затем pdftoppm, mutool, Ghostscript в PATH),
+    путь к одной из этих программ или шаблон команды с {pdf}, {prefix}, {dpi}.
+    """
+    if command:
+        if "{pdf}" in command:
+            args = command.split() if os.name != "nt" else \
+                [arg.strip('"') for arg in re.findall(r'"[^"]*"|\S+', command)]
+            return CommandRasterizer(os.path.basename(args[0]), args)
+        tool = os.path.splitext(os.path.basename(command))[0].lower()
+        for name, args in RASTER_COMMANDS:
+            if tool == name or (name.startswith("gs") and tool.startswith("gs")):
+                return CommandRasterizer(name, args, command)
+        raise Exception(f"Неизвестный растеризатор '{command}': укажите pdftoppm, mutool, "
+                        "Ghostscript или команду с {pdf}, {prefix} и {dpi}")
+    if find_spec("fitz") is not None:
+        return PyMuPdfRasterizer()
+    for name, args in RASTER_COMMANDS:
+        executable = shutil.which(name)
+        if executable:
+            return CommandRasterizer(name, args, executable)
+    return None
+
+
+def _rasterize(rasterizer, pdf, prefix, dpi):
+    """Задание пула: (PNG, None) или ([], ошибка); прежние страницы удаляются"""
+    try:
+        for path in page_files(prefix):
+            os.remove(path)
+        return rasterizer(pdf, prefix, dpi), None
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+
+
+def can_use_processes():
+    """Пул процессов возможен, если sys.executable - интерпретатор Python.
+
+    В Dynamo это Revit или DynamoSandbox: новый процесс запустил бы их;
+    внешние растеризаторы и так работают в своих процессах, поэтому там
+    задания раздаются потокам.
+    """
+    return os.path.basename(sys.executable or "").lower().startswith("python")
+
+
+def rasterize_all(jobs, rasterizer, workers=0, processes=None):
+    """{ключ: (PNG, ошибка)} для jobs [(ключ, pdf, префикс PNG, dpi)].
+
+    workers - число параллельных заданий (0 - по числу ядер); processes -
+    пул процессов (True) или потоков (False), None - can_use_processes().
+    rasterizer в пуле процессов должен сериализоваться pickle.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        return {key: _rasterize(rasterizer, pdf, prefix, dpi) for key, pdf, prefix, dpi in jobs}
+    if processes is None:
+        processes = can_use_processes()
+    pool_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    results = {}
+    with pool_class(max_workers=workers) as pool:
+        futures = {pool.submit(_rasterize, rasterizer, pdf, prefix, dpi): key
+                   for key, pdf, prefix, dpi in jobs}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+
+# ===================== КОНВЕЙЕР =====================
+class ExportReport(object):
+    """Итог export_sheets(): листы комплекта и счетчики"""
+
+    def __init__(self, folder, dpi, rasterizer):
+        self.folder = folder
+        self.dpi = dpi
+        self.rasterizer = rasterizer
+        self.sheets = []        # [{number, name, pdf, png, action}] в порядке комплекта
+        self.exported = 0
+        self.rasterized = 0
+        self.skipped = 0
+        self.removed = 0
+        self.errors = []
+
+    def messages(self):
+        result = [f"Листов в комплекте: {len(self.sheets)}",
+                  f"Экспортировано в PDF: {self.exported}"]
+        if self.dpi and self.rasterizer is not None:
+            result.append(f"Растрировано в PNG ({self.dpi} dpi, {self.rasterizer.name}): "
+                          f"{self.rasterized}")
+        elif self.dpi:
+            result.append("⚠️ Растеризатор PDF не найден, PNG не созданы: установите poppler, "
+                          "MuPDF, Ghostscript или PyMuPDF либо укажите RASTERIZER")
+        result.append(f"Без изменений: {self.skipped}")
+        if self.removed:
+            result.append(f"Удалено из комплекта: {self.removed}")
+        result.extend(self.errors)
+        result.append(f"Папка: {self.folder}")
+        return result
+
+
+def export_sheets(sheets, folder, checksums, exporter, rasterizer=None, dpi=DPI,
+                  workers=0, force=False):
+    """Экспорт комплекта sheets в folder с учетом манифеста; ExportReport.
+
+    checksums - sheet_checksums(); force - экспортировать все листы заново.
+    """
+    os.makedirs(folder, exist_ok=True)
+    manifest = ExportManifest(os.path.join(folder, MANIFEST_NAME))
+    report = ExportReport(folder, dpi, rasterizer)
+    actions = {}
+
+    # Листы, которых больше нет в комплекте
+    current = {sheet.UniqueId for sheet in sheets}
+    for sheet_uid in list(manifest.records):
+        if sheet_uid not in current:
+            record = manifest.get(sheet_uid)
+            _remove_files(folder, [record["pdf"]] + record["png"])
+            manifest.remove(sheet_uid)
+            report.removed += 1
+
+    # 1. PDF: измененные листы одним заданием
+    stale = []
+    for sheet in sheets:
+        sheet_uid = sheet.UniqueId
+        record = manifest.get(sheet_uid)
+        pdf_name = file_stem(sheet.SheetNumber) + ".pdf"
+        if not force and record is not None and record["checksum"] == checksums[sheet_uid] \
+                and record["pdf"] == pdf_name and os.path.isfile(os.path.join(folder, pdf_name)):
+            continue
+        if record is not None:
+            _remove_files(folder, [record["pdf"]] + record["png"])
+        try:
+            if os.path.exists(os.path.join(folder, pdf_name)):
+                os.remove(os.path.join(folder, pdf_name))
+        except OSError as e:
+            report.errors.append(f"⚠️ Лист {sheet.SheetNumber}: PDF занят другой программой ({e})")
+            actions[sheet_uid] = "failed"
+            continue
+        stale.append(sheet)
+
+    if stale:
+        with timing.span("export"):
+            paths = exporter.export(stale, folder)
+        for sheet in stale:
+            path = paths.get(sheet.UniqueId)
+            if path is None or not os.path.isfile(path):
+                report.errors.append(f"⚠️ Лист {sheet.SheetNumber}: PDF не создан")
+                manifest.remove(sheet.UniqueId)
+                actions[sheet.UniqueId] = "failed"
+                continue
+            manifest.set(sheet.UniqueId, {
+                "number": sheet.SheetNumber,
+                "name": sheet.Name,
+                "checksum": checksums[sheet.UniqueId],
+                "pdf": os.path.basename(path),
+                "dpi": None,
+                "png": [],
+                "png_source": None,
+            })
+            actions[sheet.UniqueId] = "exported"
+            report.exported += 1
+        timing.count("sheets_exported", report.exported)
+
+    # 2. PNG: новые и измененные PDF, другой dpi, удаленные страницы
+    if dpi and rasterizer is not None:
+        jobs = []
+        sources = {}
+        for sheet in sheets:
+            record = manifest.get(sheet.UniqueId)
+            if record is None:
+                continue
+            pdf = os.path.join(folder, record["pdf"])
+            sources[sheet.UniqueId] = _signature(pdf)
+            if record["dpi"] == dpi and record["png_source"] == sources[sheet.UniqueId] \
+                    and record["png"] \
+                    and all(os.path.isfile(os.path.join(folder, name)) for name in record["png"]):
+                continue
+            jobs.append((sheet.UniqueId, pdf, os.path.splitext(pdf)[0], dpi))
+        if jobs:
+            with timing.span("rasterize"):
+                results = rasterize_all(jobs, rasterizer, workers)
+            for sheet in sheets:
+                if sheet.UniqueId not in results:
+                    continue
+                outputs, error = results[sheet.UniqueId]
+                record = dict(manifest.get(sheet.UniqueId))
+                if error is not None or not outputs:
+                    report.errors.append(f"⚠️ Лист {sheet.SheetNumber}: PNG не созданы "
+                                         f"({error or 'нет страниц'})")
+                    record.update(dpi=None, png=[], png_source=None)
+                    actions[sheet.UniqueId] = "failed"
+                else:
+                    record.update(dpi=dpi, png=[os.path.basename(path) for path in outputs],
+                                  png_source=sources[sheet.UniqueId])
+                    actions.setdefault(sheet.UniqueId, "rasterized")
+                    report.rasterized += 1
+                    timing.count("pages_rasterized", len(outputs))
+                manifest.set(sheet.UniqueId, record)
+
+    manifest.set_order([sheet.UniqueId for sheet in sheets])
+    manifest.save()
+
+    for sheet in sheets:
+        record = manifest.get(sheet.UniqueId)
+        action = actions.get(sheet.UniqueId, "skipped")
+        if action == "skipped":
+            report.skipped += 1
+        report.sheets.append({
+            "number": sheet.SheetNumber,
+            "name": sheet.Name,
+            "pdf": os.path.join(folder, record["pdf"]) if record else None,
+            "png": [os.path.join(folder, name) for name in record["png"]] if record else [],
+            "action": action,
+        })
+    return report
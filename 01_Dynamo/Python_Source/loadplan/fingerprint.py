@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""Отпечатки уровней для режима обновления планов нагрузок (скрипт 2).
+
+Отпечаток уровня - SHA-1 от помещений уровня (UniqueId, нагрузка, площадь,
+периметр, точка размещения) и настроек схемы. Границы помещений не
+перебираются: их изменение почти всегда меняет площадь, периметр или точку,
+а GetBoundarySegments на тысячах помещений дороже всего расчета.
+
+Отпечатки и UniqueId созданных видов и листов хранятся в JSON рядом с
+файлом модели (<модель>.loadplan.json): повторный запуск находит свои виды
+и листы, пропускает уровни с прежним отпечатком и обновляет остальные.
+Файл записывается только после фиксации транзакции (save_after_commit):
+под Dynamo она происходит по завершении узла, и при откате файл должен
+остаться прежним.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+from . import api
+from . import timing
+from .rooms import spatial_elements
+from .snapshot import add_listener
+
+VERSION = 1
+FILE_SUFFIX = ".loadplan.json"
+DIGITS = 6  # округление чисел в отпечатке
+
+# Отложенная запись: ключ документа -> (хранилище, {Id элементов запуска})
+_deferred = {}
+
+
+def default_path(doc):
+    """Файл отпечатков рядом с моделью; для несохраненной - во временной папке"""
+    path = doc.PathName
+    if path and os.path.isabs(path):
+        return os.path.splitext(path)[0] + FILE_SUFFIX
+    title = re.sub(r'[\\/:*?"<>|]', "_", doc.Title or "document")
+    return os.path.join(tempfile.gettempdir(), "loadplan", title + FILE_SUFFIX)
+
+
+def level_fingerprints(doc, load_def, category_name="OST_Rooms", scheme=()):
+    """{LevelId: отпечаток} одним проходом коллектора.
+
+    scheme - кортеж настроек схемы (категория, диапазоны, заголовок...),
+    входит в отпечаток каждого уровня.
+    """
+    by_level = {}
+    for room in spatial_elements(doc, category_name):
+        param = room.get_Parameter(load_def)
+        load = round(param.AsDouble(), DIGITS) if param is not None and param.HasValue else None
+        location = room.Location
+        point = getattr(location, "Point", None)
+        by_level.setdefault(room.LevelId, []).append((
+            room.UniqueId, load, round(room.Area, DIGITS), round(room.Perimeter, DIGITS),
+            (round(point.X, DIGITS), round(point.Y, DIGITS)) if point is not None else None))
+
+    settings = repr(tuple(scheme)).encode("utf-8")
+    result = {}
+    for level_id, rooms in by_level.items():
+        digest = hashlib.sha1(settings)
+        rooms.sort()
+        digest.update(repr(rooms).encode("utf-8"))
+        result[level_id] = digest.hexdigest()
+    return result
+
+
+def empty_fingerprint(scheme=()):
+    """Отпечаток уровня без помещений"""
+    return hashlib.sha1(repr(tuple(scheme)).encode("utf-8") + b"[]").hexdigest()
+
+
+class FingerprintStore(object):
+    """Записи о созданных видах: {UniqueId исходного плана: запись}.
+
+    Запись - словарь с ключами fingerprint, view, sheet (UniqueId) и
+    source_name. Поврежденный или несовместимый файл читается как пустой.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = {}
+        self.dirty = False
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == VERSION:
+            self.records = data.get("views") or {}
+
+    def get(self, source_uid):
+        return self.records.get(source_uid)
+
+    def set(self, source_uid, record):
+        if self.records.get(source_uid) != record:
+            self.records[source_uid] = record
+            self.dirty = True
+
+    def prune(self, doc):
+        """Удаление записей об исходных планах, которых нет в модели"""
+        for source_uid in list(self.records):
+            if doc.GetElement(source_uid) is None:
+                del self.records[source_uid]
+                self.dirty = True
+
+    def save(self):
+        """Запись файла (через временный, чтобы не оставить его обрезанным)"""
+        if not self.dirty:
+            return False
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        temp = self.path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "views": self.records}, f, ensure_ascii=False, indent=1)
+        os.replace(temp, self.path)
+        self.dirty = False
+        return True
+
+
+def _on_document_changed(doc, args):
+    key = doc.GetHashCode()
+    pending = _deferred.get(key)
+    if pending is None:
+        return
+    store, element_ids = pending
+    changed = {i.ToString() for i in args.GetAddedElementIds()}
+    changed.update(i.ToString() for i in args.GetModifiedElementIds())
+    if changed.isdisjoint(element_ids):
+        return
+    del _deferred[key]
+    try:
+        store.save()
+    except OSError:
+        timing.count("exceptions_swallowed")
+
+
+def save_after_commit(store, doc, element_ids):
+    """Запись store после фиксации транзакции, создавшей element_ids (Id строкой).
+
+    TransactionTaskDone в Dynamo транзакцию не фиксирует, это происходит по
+    завершении узла. Файл пишется из DocumentChanged, в котором есть
+    элементы запуска; если фиксация не состоится, файл остается прежним, и
+    следующий запуск создаст планы заново. Без element_ids файл пишется
+    сразу. Возвращает True, если запись выполнена или отложена.
+    """
+    key = doc.GetHashCode()
+    _deferred.pop(key, None)
+    if not store.dirty:
+        return False
+    if not element_ids:
+        return store.save()
+    add_listener(doc, _on_document_changed)
+    _deferred[key] = (store, set(element_ids))
+    return True
+
+
+def discard_pending(doc):
+    """Отмена отложенной записи прошлого запуска (его транзакция не зафиксирована)"""
+    _deferred.pop(doc.GetHashCode(), None)
+
+
+def placed_sheets(doc):
+    """{Id вида: Id листа} по видовым экранам документа (один проход)"""
+    DB = api.db()
+    timing.count("collector_scans")
+    result = {}
+    for viewport in DB.FilteredElementCollector(doc).OfClass(DB.Viewport):
+        result[viewport.ViewId] = viewport.SheetId
+    return result
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""Раскладка планов нагрузок и спецификации по листам (скрипт 2, шаги 5-6).
+
+Размер плана на листе - подрезка вида, деленная на масштаб, плюс место
+под подпись видового экрана; размер спецификации - сумма ширин столбцов
+и число строк на высоту строки таблицы. Оба считаются по свойствам
+элементов без регенерации документа. Легенда заливки принадлежит виду и
+стоит в левом верхнем углу подрезки, поэтому входит в размер плана.
+
+Раскладка - чистая геометрия в футах листа: спецификация прижимается к
+правому верхнему углу поля листа, основная надпись резервирует правый
+нижний угол, а планы в порядке уровней укладываются алгоритмом MaxRects
+(максимальные свободные прямоугольники, позиция "выше, затем левее").
+План, не поместившийся на лист, открывает следующий.
+"""
+from . import api
+
+MM = 1.0 / 304.8               # фут в миллиметре
+FRAME_MARGINS = (20, 5, 5, 5)  # поля рамки (слева, сверху, справа, снизу), мм
+STAMP_SIZE = (185, 55)         # основная надпись (ширина, высота), мм
+GAP = 10                       # зазор между элементами, мм
+LABEL_HEIGHT = 12              # подпись видового экрана под планом, мм
+ROW_HEIGHT = 8                 # строка спецификации, если таблица пуста, мм
+EPS = 1e-9
+
+
+# ===================== ГЕОМЕТРИЯ =====================
+class SheetFrame(object):
+    """Поле листа внутри рамки (футы листа, начало - левый нижний угол поля)"""
+
+    def __init__(self, min_u, min_v, max_u, max_v, margins=FRAME_MARGINS, stamp=STAMP_SIZE):
+        left, top, right, bottom = (value * MM for value in margins)
+        self.x0 = min_u + left
+        self.y0 = min_v + bottom
+        self.width = max(0.0, max_u - right - self.x0)
+        self.height = max(0.0, max_v - top - self.y0)
+        self.stamp = (min(stamp[0] * MM, self.width), min(stamp[1] * MM, self.height))
+
+    @classmethod
+    def from_outline(cls, outline, **options):
+        """Поле по Outline листа (BoundingBoxUV основной надписи)"""
+        return cls(outline.Min.U, outline.Min.V, outline.Max.U, outline.Max.V, **options)
+
+
+class Placement(object):
+    """Прямоугольник key на листе: левый нижний угол и размер, футы"""
+
+    __slots__ = ("key", "x", "y", "width", "height", "oversized")
+
+    def __init__(self, key, x, y, width, height, oversized=False):
+        self.key = key
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.oversized = oversized  # не помещается в поле листа
+
+    @property
+    def center(self):
+        return (self.x + self.width / 2.0, self.y + self.height / 2.0)
+
+    @property
+    def top_left(self):
+        return (self.x, self.y + self.height)
+
+    def __repr__(self):
+        return "Placement({!r}, {:.3f}, {:.3f}, {:.3f}, {:.3f})".format(
+            self.key, self.x, self.y, self.width, self.height)
+
+
+class MaxRectsBin(object):
+    """Свободная область W×H как набор максимальных прямоугольников.
+
+    Прямоугольники набора могут пересекаться; занятие области вырезает ее
+    из каждого пересекаемого, вложенные прямоугольники удаляются.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.free = [(0.0, 0.0, width, height)]
+
+    def find(self, width, height):
+        """Левый нижний угол для width×height: как можно выше, затем левее"""
+        best = None
+        best_key = None
+        for fx, fy, fw, fh in self.free:
+            if width > fw + EPS or height > fh + EPS:
+                continue
+            key = (-(fy + fh), fx, fw * fh)
+            if best_key is None or key < best_key:
+                best_key = key
+                best = (fx, fy + fh - height)
+        return best
+
+    def occupy(self, x, y, width, height):
+        """Исключение прямоугольника из свободной области"""
+        right, top = x + width, y + height
+        result = []
+        for rect in self.free:
+            fx, fy, fw, fh = rect
+            f_right, f_top = fx + fw, fy + fh
+            if x >= f_right - EPS or right <= fx + EPS or y >= f_top - EPS or top <= fy + EPS:
+                result.append(rect)
+                continue
+            if x > fx + EPS:
+                result.append((fx, fy, x - fx, fh))
+            if right < f_right - EPS:
+                result.append((right, fy, f_right - right, fh))
+            if y > fy + EPS:
+                result.append((fx, fy, fw, y - fy))
+            if top < f_top - EPS:
+                result.append((fx, top, fw, f_top - top))
+        self.free = _prune(result)
+
+
+def _contains(outer, inner):
+    return (inner[0] >= outer[0] - EPS and inner[1] >= outer[1] - EPS
+            and inner[0] + inner[2] <= outer[0] + outer[2] + EPS
+            and inner[1] + inner[3] <= outer[1] + outer[3] + EPS)
+
+
+def _prune(rects):
+    rects = sorted(set(rects), key=lambda r: r[2] * r[3], reverse=True)
+    kept = []
+    for rect in rects:
+        if not any(_contains(other, rect) for other in kept):
+            kept.append(rect)
+    return kept
+
+
+class SheetLayout(object):
+    """Раскладка одного листа: спецификация и планы"""
+
+    def __init__(self):
+        self.schedule = None   # Placement или None
+        self.plans = []        # [Placement] в порядке укладки
+
+    @property
+    def keys(self):
+        return [placement.key for placement in self.plans]
+
+
+class _Page(object):
+    """Лист в процессе укладки: MaxRects с зазором справа и снизу от элементов"""
+
+    def __init__(self, frame, gap):
+        self.frame = frame
+        self.gap = gap
+        self.bin = MaxRectsBin(frame.width + gap, frame.height)
+        self.layout = SheetLayout()
+        stamp_w, stamp_h = frame.stamp
+        if stamp_w > 0 and stamp_h > 0:
+            self.reserve(frame.width - stamp_w, 0.0, stamp_w, stamp_h)
+
+    def reserve(self, x, y, width, height):
+        """Занятие прямоугольника (координаты поля) вместе с зазором вокруг"""
+        gap = self.gap
+        bottom = max(0.0, y - gap)
+        self.bin.occupy(x, bottom, min(width + gap, self.bin.width - x), y + height - bottom)
+
+    def place(self, key, width, height, force=False):
+        """Placement в координатах листа или None; force - вплотную к верху
+        слева, даже если не помещается (пустой лист)"""
+        gap = self.gap
+        spot = self.bin.find(width + gap, height + gap)
+        oversized = False
+        if spot is None:
+            if not force:
+                return None
+            oversized = True
+            spot = (0.0, self.frame.height - height - gap)
+        x, y = spot[0], spot[1] + gap
+        self.reserve(x, y, width, height)
+        return Placement(key, self.frame.x0 + x, self.frame.y0 + y, width, height, oversized)
+
+
+def layout_sheets(frame, plans, schedule=None, per_sheet=None, gap=GAP * MM):
+    """Раскладка планов по листам в порядке списка.
+
+    plans - [(ключ, ширина, высота)] в футах листа; schedule - (ключ,
+    ширина, высота) спецификации, размещаемой на каждом листе в правом
+    верхнем углу поля; per_sheet - не более стольких планов на лист
+    (None - сколько поместится). Возвращает [SheetLayout]; элемент больше
+    пустого листа ставится в левый верхний угол с oversized=True.
+    """
+    pages = []
+    page = None
+    for key, width, height in plans:
+        placement = None
+        if page is not None and (per_sheet is None or len(page.layout.plans) < per_sheet):
+            placement = page.place(key, width, height)
+        if placement is None:
+            page = _new_page(frame, schedule, gap)
+            pages.append(page.layout)
+            placement = page.place(key, width, height, force=True)
+        page.layout.plans.append(placement)
+    return pages
+
+
+def _new_page(frame, schedule, gap):
+    page = _Page(frame, gap)
+    if schedule is not None:
+        key, width, height = schedule
+        x = max(0.0, frame.width - width)
+        y = max(0.0, frame.height - height)
+        page.reserve(x, y, min(width, frame.width), min(height, frame.height))
+        page.layout.schedule = Placement(key, frame.x0 + x, frame.y0 + frame.height - height,
+                                         width, height, width > frame.width or height > frame.height)
+    return page
+
+
+# ===================== РАЗМЕРЫ ЭЛЕМЕНТОВ =====================
+def plan_size(view):
+    """(ширина, высота) плана на листе по подрезке и масштабу, футы"""
+    crop = view.CropBox
+    scale = float(view.Scale or 1)
+    width = (crop.Max.X - crop.Min.X) / scale
+    height = (crop.Max.Y - crop.Min.Y) / scale
+    return width, height + LABEL_HEIGHT * MM
+
+
+def schedule_size(schedule):
+    """(ширина, высота) спецификации на листе: столбцы тела и строки
+    заголовка и тела таблицы, футы"""
+    DB = api.db()
+    table = schedule.GetTableData()
+    body = table.GetSectionData(DB.SectionType.Body)
+    header = table.GetSectionData(DB.SectionType.Header)
+    width = sum(body.GetColumnWidth(i) for i in range(body.NumberOfColumns))
+    rows = header.NumberOfRows + body.NumberOfRows
+    row_height = body.GetRowHeight(0) if body.NumberOfRows else ROW_HEIGHT * MM
+    return width, rows * row_height
+
+
+def viewport_center(placement):
+    """Центр видового экрана: прямоугольник плана без подписи снизу"""
+    label = min(LABEL_HEIGHT * MM, placement.height)
+    return (placement.x + placement.width / 2.0,
+            placement.y + label + (placement.height - label) / 2.0)
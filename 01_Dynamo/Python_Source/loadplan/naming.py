@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Реестр занятых имен: свободное имя без перебора через исключения Revit.
+
+Занятые имена собираются один раз в множество. Для каждой основы реестр
+помнит последний выданный номер, поэтому следующее свободное имя
+находится за O(1) даже после тысяч совпадений. Номера имен, освобожденных
+после отката, хранятся в куче основы и выдаются снова (меньший первым),
+чтобы откат не оставлял пропусков в нумерации; счетчик при этом назад не
+сдвигается.
+"""
+import heapq
+
+
+class NameRegistry(object):
+    """Занятые значения одного пространства имен (имена видов, номера листов)"""
+
+    def __init__(self, names=(), pattern="{base}_{n}"):
+        self._taken = set(names)
+        self._next = {}
+        self._claimed = {}  # выданное имя по шаблону -> (основа, номер)
+        self._released = {}  # основа -> куча освобожденных номеров
+        self._pattern = pattern
+
+    def __contains__(self, name):
+        return name in self._taken
+
+    def __len__(self):
+        return len(self._taken)
+
+    def is_free(self, name):
+        """Имя свободно"""
+        return name not in self._taken
+
+    def reserve(self, name):
+        """Занять имя; False, если оно уже занято"""
+        if name in self._taken:
+            return False
+        self._taken.add(name)
+        return True
+
+    def release(self, name):
+        """Освободить имя (например, после отката подтранзакции)"""
+        self._taken.discard(name)
+        claimed = self._claimed.pop(name, None)
+        if claimed is not None:
+            base, n = claimed
+            heapq.heappush(self._released.setdefault(base, []), n)
+
+    def claim(self, base):
+        """Занять base или первый свободный вариант по шаблону"""
+        if base not in self._taken:
+            self._taken.add(base)
+            return base
+        pattern = self._pattern
+        released = self._released.get(base)
+        while released:
+            n = heapq.heappop(released)
+            name = pattern.format(base=base, n=n)
+            if name not in self._taken:
+                self._claimed[name] = (base, n)
+                self._taken.add(name)
+                return name
+        n = self._next.get(base, 1)
+        name = pattern.format(base=base, n=n)
+        while name in self._taken:
+            n += 1
+            name = pattern.format(base=base, n=n)
+        self._next[base] = n + 1
+        self._claimed[name] = (base, n)
+        self._taken.add(name)
+        return name
+
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""Проверка нагрузок помещений (скрипт 6): пустые, нулевые, неправдоподобные
+значения и неразмещенные/неокруженные помещения.
+
+Первый запуск проверяет все помещения и сохраняет результат по каждому
+элементу в кэше модуля. Через DocumentChanged (см. snapshot.add_listener)
+накапливаются Id добавленных, измененных и удаленных элементов, и
+следующий запуск перепроверяет только их. Кэш сбрасывается, если сменились
+категория, параметр или диапазон нагрузок; при перезапуске движка Python
+проверка снова будет полной.
+
+Подсветка выполняется на видах проверки по уровням ("<имя> - <уровень>"):
+вид уровня создается копией его плана этажа при первом замечании на уровне.
+"""
+from . import api
+from . import timing
+from .colors import solid_fill_id
+from .rooms import room_label, spatial_elements
+from .snapshot import add_listener, get_snapshot
+from .units import load_from_internal
+
+LOAD_RANGE = (50.0, 5000.0)  # правдоподобные нагрузки, кг/м² (архивы и склады - 5000)
+QC_VIEW_NAME = "Контроль нагрузок"
+
+# Коды замечаний в порядке вывода
+UNPLACED = "unplaced"
+NOT_ENCLOSED = "not_enclosed"
+MISSING = "missing"
+ZERO = "zero"
+OUTLIER = "outlier"
+ISSUE_LABELS = {
+    UNPLACED: "Не размещено",
+    NOT_ENCLOSED: "Не окружено",
+    MISSING: "Нагрузка не заполнена",
+    ZERO: "Нулевая или отрицательная нагрузка",
+    OUTLIER: "Нагрузка вне диапазона",
+}
+# Цвет заливки на виде проверки (RGB)
+ISSUE_COLORS = {
+    NOT_ENCLOSED: (156, 39, 176),
+    MISSING: (229, 57, 53),
+    ZERO: (229, 57, 53),
+    OUTLIER: (255, 152, 0),
+}
+
+# Состояние проверки по документам: {ключ документа: QcState}
+_states = {}
+
+
+def check_room(room, load_def, load_range=LOAD_RANGE):
+    """Код замечания по помещению или None"""
+    if room.Area <= 0:
+        return UNPLACED if room.Location is None else NOT_ENCLOSED
+    param = room.get_Parameter(load_def)
+    if param is None or not param.HasValue:
+        return MISSING
+    load = load_from_internal(param.AsDouble())
+    if load <= 0:
+        return ZERO
+    low, high = load_range
+    if load < low or load > high:
+        return OUTLIER
+    return None
+
+
+class QcState(object):
+    """Результаты проверки документа и элементы, измененные после нее"""
+
+    def __init__(self, settings):
+        self.settings = settings   # (категория, Id параметра, диапазон)
+        self.rooms = set()         # Id проверенных помещений
+        self.issues = {}           # Id -> (код, подпись помещения)
+        self.levels = {}           # Id -> LevelId
+        self.dirty = set()         # измененные/удаленные помещения
+        self.added = set()         # добавленные элементы (категория не проверена)
+
+
+def _on_document_changed(doc, args):
+    state = _states.get(doc.GetHashCode())
+    if state is None:
+        return
+    rooms = state.rooms
+    state.dirty.update(i for i in args.GetModifiedElementIds() if i in rooms)
+    state.dirty.update(i for i in args.GetDeletedElementIds() if i in rooms)
+    state.added.update(args.GetAddedElementIds())
+
+
+class QcReport(object):
+    """Итог запуска: замечания, объем проверки и изменившиеся элементы"""
+
+    def __init__(self, state, full, checked, changed):
+        self.issues = state.issues
+        self.rooms = state.rooms
+        self.levels = state.levels
+        self.total = len(state.rooms)
+        self.full = full
+        self.checked = checked
+        self.changed = changed     # {Id: новый код или None} - для подсветки
+
+    def by_issue(self):
+        """{код: [подписи помещений]} в порядке ISSUE_LABELS"""
+        groups = {code: [] for code in ISSUE_LABELS}
+        for code, label in self.issues.values():
+            groups[code].append(label)
+        return {code: sorted(labels) for code, labels in groups.items() if labels}
+
+    def issue_levels(self):
+        """Уровни помещений с замечаниями, которые видны на плане"""
+        return {self.levels.get(element_id) for element_id, (code, label) in self.issues.items()
+                if code != UNPLACED}
+
+
+def _recheck(state, room, load_def, load_range, changed):
+    previous = state.issues.get(room.Id)
+    state.levels[room.Id] = room.LevelId
+    code = check_room(room, load_def, load_range)
+    if code is None:
+        state.issues.pop(room.Id, None)
+    else:
+        state.issues[room.Id] = (code, room_label(room))
+    if (previous[0] if previous else None) != code and code != UNPLACED:
+        changed[room.Id] = code  # неразмещенных помещений нет ни на одном виде
+
+
+def scan(doc, load_def, category_name="OST_Rooms", load_range=LOAD_RANGE, full=False):
+    """Полная проверка при первом запуске, дальше - только измененные элементы"""
+    key = doc.GetHashCode()
+    settings = (category_name, load_def.Id, tuple(load_range))
+    state = _states.get(key)
+    changed = {}
+
+    if full or state is None or state.settings != settings:
+        add_listener(doc, _on_document_changed)
+        previous = state.issues if state is not None else {}
+        state = _states[key] = QcState(settings)
+        with timing.span("full_scan"):
+            for room in spatial_elements(doc, category_name):
+                state.rooms.add(room.Id)
+                _recheck(state, room, load_def, load_range, changed)
+        for element_id in previous:
+            if element_id in state.rooms and element_id not in state.issues:
+                changed[element_id] = None
+        return QcReport(state, True, len(state.rooms), changed)
+
+    with timing.span("incremental"):
+        category_id = api.category_id(category_name)
+        pending = state.dirty | state.added
+        state.dirty, state.added = set(), set()
+        checked = 0
+        for element_id in pending:
+            element = doc.GetElement(element_id)
+            if element is None or element.Category is None or element.Category.Id != category_id:
+                # Удаленное помещение исчезает с вида само, подсветка не нужна
+                state.rooms.discard(element_id)
+                state.issues.pop(element_id, None)
+                state.levels.pop(element_id, None)
+                continue
+            state.rooms.add(element_id)
+            _recheck(state, element, load_def, load_range, changed)
+            checked += 1
+        timing.count("qc_rechecked", checked)
+    return QcReport(state, False, checked, changed)
+
+
+def reset(doc=None):
+    """Сброс результатов проверки документа (None - всех документов)"""
+    if doc is None:
+        _states.clear()
+    else:
+        _states.pop(doc.GetHashCode(), None)
+
+
+# ===================== ВИД ПРОВЕРКИ =====================
+def _overrides(color, solid_id):
+    DB = api.db()
+    overrides = DB.OverrideGraphicSettings()
+    if color is not None:
+        revit_color = DB.Color(*color)
+        overrides.SetSurfaceForegroundPatternId(solid_id)
+        overrides.SetSurfaceForegroundPatternColor(revit_color)
+        overrides.SetProjectionLineColor(revit_color)
+    return overrides
+
+
+def qc_view_name(name, level_name):
+    """Имя вида проверки уровня"""
+    return f"{name} - {level_name}"
+
+
+def qc_plans(doc, name, exclude="_НАГРУЗКИ"):
+    """{LevelId: (уровень, исходный план, вид проверки или None)} по планам этажей.
+
+    Исходный план - план уровня для копирования, если вида проверки еще нет;
+    планы нагрузок (exclude в имени) берутся, только если других нет.
+    """
+    DB = api.db()
+    result = {}
+    for view in get_snapshot(doc).all_views():
+        level = getattr(view, "GenLevel", None)
+        if view.ViewType != DB.ViewType.FloorPlan or level is None:
+            continue
+        _, source, qc_view = result.get(level.Id, (level, None, None))
+        if view.Name == qc_view_name(name, level.Name):
+            qc_view = view
+        elif not view.Name.startswith(name) and (
+                source is None or (exclude in source.Name and exclude not in view.Name)):
+            source = view
+        result[level.Id] = (level, source, qc_view)
+    return result
+
+
+def ensure_qc_view(doc, source_view, name, existing=None):
+    """План проверки: существующий вид или копия source_view. (вид, создан)"""
+    DB = api.db()
+    if existing is not None:
+        return existing, False
+    if source_view is None or source_view.ViewType != DB.ViewType.FloorPlan:
+        raise Exception(f"Вид '{name}' не найден, и нет плана этажа для его создания")
+    view = doc.GetElement(source_view.Duplicate(DB.ViewDuplicateOption.Duplicate))
+    timing.count("elements_created")
+    view.Name = name
+    return view, True
+
+
+def highlight(doc, view, report, created=False, level_id=None, solid_id=None):
+    """Переопределение графики помещений с замечаниями на виде.
+
+    Обычно пишутся только помещения, чей результат изменился с прошлого
+    запуска. На новом виде - все замечания; после полной проверки
+    существующего вида - все помещения, т.к. прежняя подсветка неизвестна.
+    level_id - только помещения этого уровня (вид проверки уровня);
+    solid_id - образец сплошной заливки, если уже найден.
+    Возвращает число записей.
+    """
+    if created:
+        targets = {element_id: code for element_id, (code, label) in report.issues.items()}
+    elif report.full:
+        targets = dict.fromkeys(report.rooms)
+        targets.update((element_id, code) for element_id, (code, label) in report.issues.items())
+    else:
+        targets = report.changed
+    levels = report.levels
+    targets = {element_id: code for element_id, code in targets.items()
+               if code != UNPLACED and (level_id is None or levels.get(element_id) == level_id)}
+    if not targets:
+        return 0
+    if solid_id is None:
+        solid_id = solid_fill_id(doc)
+    cache = {}
+    for element_id, code in targets.items():
+        overrides = cache.get(code)
+        if overrides is None:
+            overrides = cache[code] = _overrides(ISSUE_COLORS.get(code), solid_id)
+        view.SetElementOverrides(element_id, overrides)
+    return len(targets)
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""Перебор помещений (пространств, зон) модели и их общие свойства."""
+from . import api
+from . import timing
+
+
+def spatial_elements(doc, category_name="OST_Rooms"):
+    """Экземпляры категории OST_Rooms / OST_MEPSpaces / OST_Areas"""
+    DB = api.db()
+    timing.count("collector_scans")
+    return DB.FilteredElementCollector(doc)\
+        .OfCategoryId(api.category_id(category_name))\
+        .WhereElementIsNotElementType()
+
+
+def level_namer(doc):
+    """Функция LevelId -> имя уровня с запоминанием"""
+    names = {}
+
+    def level_name(level_id):
+        name = names.get(level_id)
+        if name is None:
+            level = doc.GetElement(level_id)
+            name = names[level_id] = level.Name if level is not None else ""
+        return name
+
+    return level_name
+
+
+def room_name(room):
+    """Наименование помещения (Room.Name в API содержит еще и номер)"""
+    param = room.get_Parameter(api.db().BuiltInParameter.ROOM_NAME)
+    return (param.AsString() if param else None) or ""
+
+
+def room_label(room):
+    """Подпись помещения для отчетов: номер и наименование"""
+    return f"{room.Number} {room_name(room)}".strip()
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""Назначение нагрузок по таблице правил (скрипт 3).
+
+Правило - образцы для наименования, назначения и уровня помещения и
+нагрузка в кг/м². Образец - ключевое слово (без учета регистра) или
+регулярное выражение в косых чертах: /^склад/. Пустой образец подходит к
+любому значению. Срабатывает первое подходящее правило.
+
+Образцы компилируются один раз при загрузке таблицы, результат для
+одинаковых сочетаний (наименование, назначение, уровень) запоминается,
+поэтому на тысячах типовых помещений проверка правил почти не стоит времени.
+"""
+import csv
+import re
+
+from . import api
+from .rooms import level_namer, room_name, spatial_elements
+from .units import load_from_internal, load_to_internal
+
+RULE_COLUMNS = ("Наименование", "Назначение", "Уровень", "Нагрузка")
+TOLERANCE = 1e-6  # кг/м²
+
+
+def _matcher(pattern):
+    """Функция проверки значения по образцу; None - подходит любое"""
+    pattern = (pattern or "").strip()
+    if not pattern:
+        return None
+    if len(pattern) > 2 and pattern.startswith("/") and pattern.endswith("/"):
+        return re.compile(pattern[1:-1], re.IGNORECASE).search
+    keyword = pattern.casefold()
+    return lambda value: keyword in value.casefold()
+
+
+class LoadRule(object):
+    """Строка таблицы правил"""
+
+    __slots__ = ("name", "department", "level", "load", "line")
+
+    def __init__(self, name, department, level, load, line=0):
+        self.name = _matcher(name)
+        self.department = _matcher(department)
+        self.level = _matcher(level)
+        self.load = float(load)
+        self.line = line
+
+    def matches(self, name, department, level):
+        """Подходит ли правило к помещению"""
+        return ((self.name is None or self.name(name))
+                and (self.department is None or self.department(department))
+                and (self.level is None or self.level(level)))
+
+
+class RuleTable(object):
+    """Упорядоченная таблица правил с запоминанием результатов"""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._memo = {}
+
+    def __len__(self):
+        return len(self.rules)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Таблица из строк (наименование, назначение, уровень, нагрузка)"""
+        return cls(LoadRule(*row, line=index) for index, row in enumerate(rows, 1))
+
+    @classmethod
+    def from_csv(cls, path):
+        """Таблица из CSV (UTF-8, разделитель ';' или ',', заголовок RULE_COLUMNS)"""
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            sample = f.read(4096)
+            f.seek(0)
+            delimiter = ";" if sample.count(";") >= sample.count(",") else ","
+            reader = csv.reader(f, delimiter=delimiter)
+            header = [cell.strip() for cell in next(reader, [])]
+            missing = [c for c in RULE_COLUMNS if c not in header]
+            if missing:
+                raise ValueError(f"{path}: нет столбцов {', '.join(missing)}")
+            columns = [header.index(c) for c in RULE_COLUMNS]
+            rules = []
+            for line, row in enumerate(reader, 2):
+                if not any(cell.strip() for cell in row):
+                    continue
+                name, department, level, load = (row[i] if i < len(row) else "" for i in columns)
+                try:
+                    load = float(load.strip().replace(",", "."))
+                except ValueError:
+                    raise ValueError(f"{path}, строка {line}: нагрузка '{load}' не является числом")
+                rules.append(LoadRule(name, department, level, load, line))
+        return cls(rules)
+
+    def resolve(self, name, department, level):
+        """Нагрузка кг/м² первого подходящего правила или None"""
+        key = (name, department, level)
+        memo = self._memo
+        if key in memo:
+            return memo[key]
+        load = None
+        for rule in self.rules:
+            if rule.matches(name, department, level):
+                load = rule.load
+                break
+        memo[key] = load
+        return load
+
+
+class AssignmentReport(object):
+    """Результат сопоставления: что записать, что пропущено"""
+
+    def __init__(self):
+        self.changes = []     # [(ключ, нагрузка кг/м²)]
+        self.unmatched = []   # [ключ]
+        self.skipped = []     # [помещение] без параметра нагрузки или только для чтения
+        self.unchanged = 0
+        self.total = 0
+
+
+def plan_loads(records, table, tolerance=TOLERANCE):
+    """Сопоставление помещений с правилами за один проход.
+
+    records - итерируемое (ключ, наименование, назначение, уровень,
+    текущая нагрузка кг/м² или None). В changes попадают только помещения,
+    у которых значение отличается от требуемого.
+    """
+    report = AssignmentReport()
+    resolve = table.resolve
+    changes = report.changes
+    unmatched = report.unmatched
+    unchanged = 0
+    total = 0
+    for key, name, department, level, current in records:
+        total += 1
+        load = resolve(name, department, level)
+        if load is None:
+            unmatched.append(key)
+        elif current is not None and abs(current - load) <= tolerance:
+            unchanged += 1
+        else:
+            changes.append((key, load))
+    report.unchanged = unchanged
+    report.total = total
+    return report
+
+
+# ===================== REVIT =====================
+def room_records(doc, load_def, category_name="OST_Rooms", skipped=None):
+    """Записи помещений для plan_loads; ключ - (помещение, параметр нагрузки).
+
+    Помещения без параметра нагрузки или с параметром только для чтения
+    добавляются в список skipped.
+    """
+    DB = api.db()
+    department_id = DB.BuiltInParameter.ROOM_DEPARTMENT
+    level_name = level_namer(doc)
+    for room in spatial_elements(doc, category_name):
+        param = room.get_Parameter(load_def)
+        if param is None or param.IsReadOnly:
+            if skipped is not None:
+                skipped.append(room)
+            continue
+        department_param = room.get_Parameter(department_id)
+        yield ((room, param),
+               room_name(room),
+               (department_param.AsString() if department_param else None) or "",
+               level_name(room.LevelId),
+               load_from_internal(param.AsDouble()) if param.HasValue else None)
+
+
+def assign_loads(doc, table, load_def, category_name="OST_Rooms", dry_run=False):
+    """Назначение нагрузок по таблице; запись только отличающихся значений"""
+    skipped = []
+    report = plan_loads(room_records(doc, load_def, category_name, skipped), table)
+    report.skipped = skipped
+    if report.changes and not dry_run:
+        tm = api.transactions()
+        tm.EnsureInTransaction(doc)
+        try:
+            for (room, param), load in report.changes:
+                param.Set(load_to_internal(load))
+        finally:
+            tm.TransactionTaskDone()
+    return report
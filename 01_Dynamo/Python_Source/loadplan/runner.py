@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""Запуск скриптов Python_Source из узлов-загрузчиков .dyn.
+
+Узел Python в .dyn содержит только блок НАСТРОЙКИ и вызов run(): код
+скрипта читается из Python_Source, компилируется один раз и хранится в
+кэше модуля вместе со значениями настроек по умолчанию. Повторные запуски
+узла (и других узлов того же движка) не перечитывают и не компилируют
+скрипт, а пакет loadplan уже загружен в sys.modules. Файл скрипта
+перекомпилируется, если изменились время его изменения или размер;
+изменения в самом пакете loadplan подхватываются после перезапуска Dynamo.
+
+Блок НАСТРОЙКИ скрипта - строки от "# === НАСТРОЙКИ ===" до "# ====";
+при выполнении он заменяется пустыми строками (номера строк в трассировке
+совпадают с файлом), а значения берутся из узла или по умолчанию.
+"""
+import os
+import re
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SETTINGS_START = re.compile(r"^# =+ НАСТРОЙКИ =+\s*$")
+_SETTINGS_END = re.compile(r"^# =+\s*$")
+
+# Скомпилированные скрипты: {путь: ScriptCode}
+_scripts = {}
+
+
+class ScriptCode(object):
+    """Скрипт без блока настроек и значения настроек по умолчанию"""
+
+    def __init__(self, path, signature, source):
+        self.path = path
+        self.signature = signature
+        lines = source.splitlines(True)
+        start, end = settings_block(lines)
+        settings_source = "".join(lines[start:end])
+        self.settings_source = settings_source
+        self.defaults = {}
+        exec(compile(settings_source, path, "exec"), {}, self.defaults)
+        body = lines[:start] + ["\n"] * (end - start) + lines[end:]
+        self.code = compile("".join(body), path, "exec")
+
+
+def settings_block(lines):
+    """(первая, последняя + 1) строки значений блока НАСТРОЙКИ без маркеров"""
+    start = next((i for i, line in enumerate(lines) if _SETTINGS_START.match(line)), None)
+    if start is None:
+        raise ValueError("В скрипте нет блока НАСТРОЙКИ")
+    end = next((i for i in range(start + 1, len(lines)) if _SETTINGS_END.match(lines[i])), None)
+    if end is None:
+        raise ValueError("Блок НАСТРОЙКИ скрипта не закрыт строкой '# ===='")
+    return start + 1, end
+
+
+def script_path(name):
+    """Путь к скрипту Python_Source по имени (с .py или без)"""
+    if not name.endswith(".py"):
+        name += ".py"
+    return os.path.join(SCRIPTS_DIR, name)
+
+
+def load(name):
+    """ScriptCode из кэша; перекомпилируется при изменении файла"""
+    path = script_path(name)
+    stat = os.stat(path)
+    signature = (stat.st_mtime, stat.st_size)
+    script = _scripts.get(path)
+    if script is None or script.signature != signature:
+        with open(path, encoding="utf-8") as f:
+            script = _scripts[path] = ScriptCode(path, signature, f.read())
+    return script
+
+
+def run(name, scope):
+    """Выполнение скрипта name с настройками и входами узла; OUT скрипта.
+
+    scope - globals() узла Dynamo: из него берутся IN, UnwrapElement и
+    настройки, объявленные в блоке НАСТРОЙКИ скрипта. Настройки, которых
+    нет в узле (.dyn старой версии), получают значения по умолчанию.
+    """
+    script = load(name)
+    namespace = dict(script.defaults)
+    for key in script.defaults:
+        if key in scope:
+            namespace[key] = scope[key]
+    namespace.update({
+        "__file__": script.path,
+        "__name__": "__dynamo__",
+        "IN": scope.get("IN", [None]),
+    })
+    if "UnwrapElement" in scope:
+        namespace["UnwrapElement"] = scope["UnwrapElement"]
+    exec(script.code, namespace)
+    return namespace.get("OUT")
+
+
+def clear():
+    """Сброс кэша скомпилированных скриптов"""
+    _scripts.clear()
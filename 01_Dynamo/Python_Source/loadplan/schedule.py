@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""Спецификация нагрузок (скрипт 1): проверка категории и создание."""
+from . import api
+from . import timing
+
+# Категории, для которых строится спецификация нагрузок (см. MANUAL,
+# "Работа со связанными файлами": для связей - пространства)
+SCHEDULE_CATEGORIES = ("OST_Rooms", "OST_MEPSpaces", "OST_Areas")
+
+# Результаты проверки категорий на время сессии Revit
+_schedulable = {}
+
+
+def category_allows_schedules(category_id):
+    """Поддерживает ли категория спецификации (без создания элементов)"""
+    allowed = _schedulable.get(category_id)
+    if allowed is None:
+        try:
+            allowed = bool(api.db().ViewSchedule.IsValidCategoryForSchedule(category_id))
+        except Exception:
+            timing.count("exceptions_swallowed")
+            allowed = False
+        _schedulable[category_id] = allowed
+    return allowed
+
+
+def schedule_category(doc, name):
+    """Категория спецификации по имени BuiltInCategory из SCHEDULE_CATEGORIES"""
+    if name not in SCHEDULE_CATEGORIES:
+        raise ValueError(f"Категория {name} не поддерживается: ожидается одна из {', '.join(SCHEDULE_CATEGORIES)}")
+    return api.category(doc, name)
+
+
+def create_schedule(doc, category, name):
+    """Единственный вызов ViewSchedule.CreateSchedule для категории.
+
+    Спецификации зон требуют схему зонирования - берется первая в проекте.
+    """
+    DB = api.db()
+    if not category_allows_schedules(category.Id):
+        raise Exception(f"Категория '{category.Name}' не поддерживает создание спецификаций")
+
+    if category.Id == DB.ElementId(DB.BuiltInCategory.OST_Areas):
+        timing.count("collector_scans")
+        area_scheme_id = DB.FilteredElementCollector(doc).OfClass(DB.AreaScheme).FirstElementId()
+        if area_scheme_id == DB.ElementId.InvalidElementId:
+            raise Exception("В проекте нет схем зонирования для спецификации зон")
+        schedule = DB.ViewSchedule.CreateSchedule(doc, category.Id, area_scheme_id)
+    else:
+        schedule = DB.ViewSchedule.CreateSchedule(doc, category.Id)
+    timing.count("elements_created")
+    schedule.Name = name
+    return schedule
+
+
+# ===================== ПОЛЯ СПЕЦИФИКАЦИИ =====================
+MM_PER_FOOT = 304.8
+NOTE_FIELD_NAME = "Примечание"
+
+
+class FieldSpec(object):
+    """Требуемое поле спецификации.
+
+    parameter - имя BuiltInParameter ("ROOM_NUMBER"), ElementId параметра
+    проекта или None для вычисляемого поля с именем name.
+    """
+
+    def __init__(self, parameter, heading, width_mm, alignment="Left",
+                 accuracy=None, name=None, formula=None):
+        self.parameter = parameter
+        self.heading = heading
+        self.width_mm = width_mm
+        self.alignment = alignment
+        self.accuracy = accuracy
+        self.name = name
+        self.formula = formula
+
+
+def load_field_specs(load_param_def, param_name):
+    """Поля спецификации нагрузок по ГОСТ 21.501-2018 (форма 2)"""
+    specs = [
+        FieldSpec("ROOM_NUMBER", "№ п/п", 30),
+        FieldSpec("ROOM_NAME", "Наименование помещения", 150),
+    ]
+    if load_param_def is not None:
+        specs.append(FieldSpec(load_param_def.Id, "Нагрузка, кг/м²", 60,
+                               alignment="Right", accuracy=0.1))
+    else:
+        specs.append(FieldSpec(
+            None, NOTE_FIELD_NAME, 200, name=NOTE_FIELD_NAME,
+            formula="\"Параметр '" + param_name + "' не найден. Добавьте его из общего файла параметров\""))
+    return specs
+
+
+def _parameter_id(spec):
+    DB = api.db()
+    if isinstance(spec.parameter, str):
+        return DB.ElementId(getattr(DB.BuiltInParameter, spec.parameter))
+    return spec.parameter
+
+
+def _update_field(field, spec, changes):
+    """Запись только отличающихся свойств поля"""
+    DB = api.db()
+    label = spec.heading
+    if field.ColumnHeading != spec.heading:
+        field.ColumnHeading = spec.heading
+        changes.append(f"'{label}': заголовок")
+
+    width = spec.width_mm / MM_PER_FOOT
+    if abs(field.Width - width) > 1e-6:
+        field.Width = width
+        changes.append(f"'{label}': ширина {spec.width_mm} мм")
+
+    alignment = getattr(DB.HorizontalAlignmentStyle, spec.alignment)
+    if field.HorizontalAlignment != alignment:
+        field.HorizontalAlignment = alignment
+        changes.append(f"'{label}': выравнивание")
+
+    if spec.accuracy is not None:
+        options = field.GetFormatOptions()
+        if options.UseDefault or abs(options.Accuracy - spec.accuracy) > 1e-9:
+            options.UseDefault = False
+            options.Accuracy = spec.accuracy
+            field.SetFormatOptions(options)
+            changes.append(f"'{label}': точность {spec.accuracy}")
+
+
+def reconcile_fields(schedule_def, specs, remove_names=()):
+    """Приведение полей ScheduleDefinition к specs без пересоздания.
+
+    Пользовательские поля, сортировка и фильтры сохраняются: добавляются
+    только недостающие поля, у существующих меняются только отличающиеся
+    свойства. Вычисляемые поля из remove_names удаляются. Возвращает
+    (изменения, предупреждения); для актуальной спецификации - пустые списки.
+    """
+    DB = api.db()
+    by_parameter = {}
+    by_name = {}
+    for index in range(schedule_def.GetFieldCount()):
+        field = schedule_def.GetField(index)
+        if field.IsCalculatedField:
+            by_name[field.GetName()] = field
+        else:
+            by_parameter.setdefault(field.ParameterId, field)
+
+    changes = []
+    warnings = []
+    for spec in specs:
+        try:
+            if spec.parameter is None:
+                field = by_name.get(spec.name)
+                if field is None:
+                    field = schedule_def.AddCalculatedField(spec.name)
+                    field.Formula = spec.formula
+                    changes.append(f"добавлено поле '{spec.heading}'")
+            else:
+                parameter_id = _parameter_id(spec)
+                field = by_parameter.get(parameter_id)
+                if field is None:
+                    field = schedule_def.AddField(DB.ScheduleFieldType.Instance, parameter_id)
+                    changes.append(f"добавлено поле '{spec.heading}'")
+            _update_field(field, spec, changes)
+        except Exception as e:
+            timing.count("exceptions_swallowed")
+            warnings.append(f"Поле '{spec.heading}': {str(e)}")
+
+    for name in remove_names:
+        field = by_name.get(name)
+        if field is not None:
+            schedule_def.RemoveField(field.FieldId)
+            changes.append(f"удалено поле '{name}'")
+    return changes, warnings
+
+
+# ===================== СВОДКА НАГРУЗОК =====================
+def ensure_summary_schedule(doc, category, name, existing=None):
+    """Спецификация-сводка: итоги пишутся текстом в заголовок таблицы.
+
+    Тело спецификации пустое - единственное (скрытое) поле площади
+    отфильтровано условием "меньше нуля". Возвращает (спецификация, создана).
+    """
+    if existing is not None:
+        return existing, False
+    DB = api.db()
+    schedule = create_schedule(doc, category, name)
+    schedule_def = schedule.Definition
+    schedule_def.ShowTitle = True
+    schedule_def.ShowHeaders = False
+    schedule_def.IsItemized = False
+    area_field = schedule_def.AddField(DB.ScheduleFieldType.Instance,
+                                       DB.ElementId(DB.BuiltInParameter.ROOM_AREA))
+    area_field.IsHidden = True
+    schedule_def.AddFilter(DB.ScheduleFilter(area_field.FieldId, DB.ScheduleFilterType.LessThan, 0.0))
+    return schedule, True
+
+
+def summary_table_matches(schedule, rows):
+    """Заголовок уже содержит rows (проверка без транзакции)"""
+    DB = api.db()
+    section = schedule.GetTableData().GetSectionData(DB.SectionType.Header)
+    width = max(len(row) for row in rows) if rows else 1
+    if section.NumberOfRows - 1 != len(rows) or section.NumberOfColumns < width:
+        return False
+    return all(section.GetCellText(index + 1, column) == (row[column] if column < len(row) else "")
+               for index, row in enumerate(rows) for column in range(width))
+
+
+def write_summary_table(schedule, rows):
+    """Строки rows в заголовок спецификации под строкой названия.
+
+    Строки и столбцы добавляются/удаляются по разнице, записываются только
+    отличающиеся ячейки. Возвращает число записанных ячеек.
+    """
+    DB = api.db()
+    section = schedule.GetTableData().GetSectionData(DB.SectionType.Header)
+    width = max(len(row) for row in rows) if rows else 1
+    while section.NumberOfColumns < width:
+        section.InsertColumn(section.NumberOfColumns)
+    while section.NumberOfRows - 1 < len(rows):
+        section.InsertRow(section.NumberOfRows)
+    while section.NumberOfRows - 1 > len(rows):
+        section.RemoveRow(section.NumberOfRows - 1)
+
+    written = 0
+    for index, row in enumerate(rows):
+        for column in range(width):
+            text = row[column] if column < len(row) else ""
+            if section.GetCellText(index + 1, column) != text:
+                section.SetCellText(index + 1, column, text)
+                written += 1
+    return written
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""Файл общих параметров (ФОП) и проверка привязки параметра к проекту.
+
+ФОП - текст с табуляциями (обычно UTF-16 с BOM): строки "*META", "*GROUP",
+"*PARAM" задают порядок столбцов, строки META/GROUP/PARAM - данные.
+Разбор выполняется на чистом Python без Revit и запоминается по пути,
+времени изменения и размеру файла, поэтому корпоративный ФОП на тысячи
+параметров читается один раз за сессию.
+
+audit_binding() сверяет параметр из ФОП с привязками проекта (один проход
+ForwardIterator в snapshot) и сообщает о расхождениях имени, GUID, типа
+привязки и категорий; bind_parameter() исправляет их одной записью
+ParameterBindings.
+"""
+import codecs
+import os
+
+from . import api
+from . import timing
+from .snapshot import get_snapshot, invalidate
+
+# Пусто в настройках скриптов - этот файл
+DEFAULT_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))), "02_Resources", "SharedParameters.txt")
+BIND_CATEGORIES = ("OST_Rooms", "OST_MEPSpaces", "OST_Areas")
+
+# Разобранные файлы: {путь: ((mtime, размер), SharedParameterFile)}
+_cache = {}
+
+
+# ===================== РАЗБОР ФОП =====================
+class SharedParameter(object):
+    """Строка PARAM файла общих параметров"""
+
+    __slots__ = ("guid", "name", "datatype", "datacategory", "group", "visible",
+                 "description", "user_modifiable", "hide_when_no_value", "line")
+
+    def __init__(self, guid, name, datatype="", datacategory="", group="", visible=True,
+                 description="", user_modifiable=True, hide_when_no_value=False, line=0):
+        self.guid = guid.lower()
+        self.name = name
+        self.datatype = datatype
+        self.datacategory = datacategory
+        self.group = group
+        self.visible = visible
+        self.description = description
+        self.user_modifiable = user_modifiable
+        self.hide_when_no_value = hide_when_no_value
+        self.line = line
+
+
+class SharedParameterFile(object):
+    """Параметры ФОП с индексами по GUID и имени"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.version = None
+        self.groups = {}       # id группы -> имя
+        self.parameters = []
+        self.by_guid = {}      # guid (нижний регистр) -> SharedParameter
+        self.by_name = {}      # имя -> [SharedParameter] (имена могут повторяться)
+        self.warnings = []
+
+    def __len__(self):
+        return len(self.parameters)
+
+    def find(self, name=None, guid=None):
+        """Параметр по GUID (приоритетно) или по единственному имени; иначе None"""
+        if guid:
+            return self.by_guid.get(str(guid).lower())
+        found = self.by_name.get(name, ())
+        return found[0] if len(found) == 1 else None
+
+
+PARAM_COLUMNS = ("GUID", "NAME", "DATATYPE", "DATACATEGORY", "GROUP", "VISIBLE",
+                 "DESCRIPTION", "USERMODIFIABLE", "HIDEWHENNOVALUE")
+
+
+def _flag(value, default):
+    value = value.strip()
+    return default if value == "" else value == "1"
+
+
+def parse(text, path=None):
+    """SharedParameterFile из текста ФОП"""
+    result = SharedParameterFile(path)
+    headers = {}    # запись -> {столбец: индекс}
+    rows = []       # (номер строки, [значения PARAM_COLUMNS])
+    param_index = None
+    for number, line in enumerate(text.splitlines(), 1):
+        if not line or line[0] == "#":
+            continue
+        cells = line.split("\t")
+        kind = cells[0]
+        if kind == "PARAM" and param_index is not None:
+            if len(cells) < width:
+                cells.extend([""] * (width - len(cells)))
+            rows.append((number, [cells[i] for i in param_index]))
+        elif kind.startswith("*"):
+            header = headers[kind[1:]] = {name: i for i, name in enumerate(cells)}
+            if kind == "*PARAM":
+                # Отсутствующие столбцы читаются как пустые (индекс за концом строки)
+                width = len(cells) + 1
+                param_index = [header.get(name, len(cells)) for name in PARAM_COLUMNS]
+        elif kind == "META" and "META" in headers:
+            i = headers["META"].get("VERSION")
+            result.version = cells[i] if i is not None and i < len(cells) else None
+        elif kind == "GROUP" and "GROUP" in headers:
+            header = headers["GROUP"]
+            cells.extend([""] * (len(header) - len(cells)))
+            result.groups[cells[header.get("ID", 1)]] = cells[header.get("NAME", 2)]
+        else:
+            result.warnings.append(f"Строка {number}: неизвестная запись '{kind}'")
+
+    # Группы могут идти после параметров - имена подставляются в конце
+    groups = result.groups
+    by_guid, by_name = result.by_guid, result.by_name
+    for number, (guid, name, datatype, datacategory, group, visible, description,
+                 modifiable, hide) in rows:
+        if not guid or not name:
+            result.warnings.append(f"Строка {number}: нет GUID или имени параметра")
+            continue
+        parameter = SharedParameter(
+            guid, name, datatype, datacategory, groups.get(group, group),
+            _flag(visible, True), description, _flag(modifiable, True), _flag(hide, False), number)
+        if parameter.guid in by_guid:
+            result.warnings.append(f"Строка {number}: GUID {guid} повторяется")
+            continue
+        result.parameters.append(parameter)
+        by_guid[parameter.guid] = parameter
+        by_name.setdefault(name, []).append(parameter)
+    return result
+
+
+def _decode(data):
+    """Текст ФОП: UTF-16/UTF-8 по BOM, без BOM - UTF-16 при нулевых байтах"""
+    if data.startswith(codecs.BOM_UTF16_LE) or data.startswith(codecs.BOM_UTF16_BE):
+        return data.decode("utf-16")
+    if data.startswith(codecs.BOM_UTF8):
+        return data[len(codecs.BOM_UTF8):].decode("utf-8")
+    if b"\x00" in data[:200]:
+        return data.decode("utf-16-le")
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("cp1251")
+
+
+def read_file(path=None):
+    """Разобранный ФОП из кэша; перечитывается при изменении файла"""
+    path = os.path.abspath(path or DEFAULT_FILE)
+    stat = os.stat(path)
+    signature = (stat.st_mtime, stat.st_size)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == signature:
+        timing.count("shared_file_cache_hits")
+        return cached[1]
+    with open(path, "rb") as f:
+        parsed = parse(_decode(f.read()), path)
+    _cache[path] = (signature, parsed)
+    return parsed
+
+
+def resolve_guid(name, path=None):
+    """GUID параметра name из ФОП или None (нет файла, параметра или имя неоднозначно)"""
+    try:
+        parameter = read_file(path).find(name)
+    except (OSError, UnicodeDecodeError):
+        return None
+    return parameter.guid if parameter is not None else None
+
+
+# ===================== ПРОВЕРКА ПРИВЯЗКИ =====================
+class BindingAudit(object):
+    """Расхождения параметра из ФОП с привязками проекта"""
+
+    def __init__(self, parameter, path):
+        self.parameter = parameter          # SharedParameter из ФОП
+        self.path = path                    # путь ФОП
+        self.definition = None              # привязанное определение (по GUID)
+        self.binding = None
+        self.problems = []                  # неисправимые автоматически
+        self.missing_categories = []        # имена BuiltInCategory
+        self.type_binding = False
+
+    @property
+    def bound(self):
+        return self.definition is not None
+
+    @property
+    def needs_binding(self):
+        """bind_parameter() может исправить привязку"""
+        return not self.problems and (not self.bound or bool(self.missing_categories))
+
+    def messages(self):
+        p = self.parameter
+        result = list(self.problems)
+        if not self.bound and not self.problems:
+            result.append(f"Параметр '{p.name}' не привязан к проекту")
+        elif self.missing_categories:
+            result.append(f"Параметр '{p.name}' не привязан к категориям: {', '.join(self.missing_categories)}")
+        if not result:
+            result.append(f"Привязка параметра '{p.name}' соответствует ФОП")
+        return result
+
+
+def audit_binding(doc, shared_file, name, guid=None, categories=BIND_CATEGORIES):
+    """Сверка параметра name (guid) из ФОП с doc.ParameterBindings"""
+    DB = api.db()
+    parameter = shared_file.find(name, guid)
+    if parameter is None:
+        found = shared_file.by_name.get(name, [])
+        if guid and found:
+            raise Exception(f"В ФОП параметр '{name}' имеет GUID {found[0].guid}, а не {guid}")
+        if len(found) > 1:
+            raise Exception(f"В ФОП несколько параметров '{name}' - укажите GUID")
+        raise Exception(f"Параметр '{name}' ({guid or 'без GUID'}) не найден в ФОП {shared_file.path}")
+
+    audit = BindingAudit(parameter, shared_file.path)
+    if parameter.name != name:
+        audit.problems.append(f"В ФОП параметр {parameter.guid} называется '{parameter.name}', "
+                              f"в настройках - '{name}'")
+
+    snap = get_snapshot(doc)
+    entry = snap.bindings_by_guid.get(parameter.guid)
+    by_name = snap.bindings.get(parameter.name)
+    if entry is None and by_name is not None:
+        guid_by_key = {key.Id: guid for guid, (key, _) in snap.bindings_by_guid.items()}
+        other = guid_by_key.get(by_name[0].Id)
+        audit.problems.append(
+            f"В проекте параметр '{parameter.name}' привязан с другим GUID ({other})" if other else
+            f"В проекте есть параметр проекта '{parameter.name}' (не общий) - удалите его или переименуйте")
+        return audit
+    if entry is None:
+        audit.missing_categories = list(categories)
+        return audit
+
+    audit.definition, audit.binding = entry
+    if audit.definition.Name != parameter.name:
+        audit.problems.append(f"В проекте параметр {parameter.guid} называется "
+                              f"'{audit.definition.Name}', в ФОП - '{parameter.name}'")
+    if isinstance(audit.binding, DB.TypeBinding):
+        audit.type_binding = True
+        audit.problems.append(f"Параметр '{parameter.name}' привязан к типам, а не к экземплярам")
+    for category_name in categories:
+        category = api.category(doc, category_name)
+        if category is not None and not audit.binding.Categories.Contains(category):
+            audit.missing_categories.append(category_name)
+    return audit
+
+
+def _external_definition(app, path, parameter):
+    """ExternalDefinition из ФОП; прежний файл общих параметров восстанавливается"""
+    previous = app.SharedParametersFilename
+    app.SharedParametersFilename = path
+    try:
+        definition_file = app.OpenSharedParameterFile()
+        if definition_file is None:
+            raise Exception(f"Revit не смог открыть ФОП {path}")
+        group = definition_file.Groups.get_Item(parameter.group)
+        definition = group.Definitions.get_Item(parameter.name) if group is not None else None
+        if definition is None:
+            raise Exception(f"Параметр '{parameter.name}' не найден в группе '{parameter.group}' ФОП")
+        return definition
+    finally:
+        app.SharedParametersFilename = previous or ""
+
+
+def bind_parameter(doc, audit, categories=BIND_CATEGORIES):
+    """Привязка к экземплярам categories (с сохранением прежних категорий).
+
+    Вызывается внутри транзакции; возвращает True, если привязка записана.
+    Снимок документа сбрасывается сразу: TaskDone в Dynamo не фиксирует
+    транзакцию, и DocumentChanged до конца запуска не придет.
+    """
+    if not audit.needs_binding:
+        return False
+    DB = api.db()
+    category_set = DB.CategorySet()
+    if audit.binding is not None:
+        for category in audit.binding.Categories:
+            category_set.Insert(category)
+    for category_name in categories:
+        category = api.category(doc, category_name)
+        if category is not None:
+            category_set.Insert(category)
+    binding = DB.InstanceBinding(category_set)
+
+    if audit.bound:
+        written = doc.ParameterBindings.ReInsert(audit.definition, binding)
+    else:
+        definition = _external_definition(doc.Application, audit.path, audit.parameter)
+        written = doc.ParameterBindings.Insert(definition, binding)
+    if not written:
+        raise Exception(f"Revit отклонил привязку параметра '{audit.parameter.name}'")
+    invalidate(doc)
+    return True
+
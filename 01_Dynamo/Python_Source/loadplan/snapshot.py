@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""Снимок документа для обоих скриптов.
+
+Спецификации, листы, виды, основные надписи и элементы параметров
+собираются одним проходом коллектора, привязки параметров - одним
+проходом ForwardIterator(). Снимок хранится в кэше модуля и переживает
+повторные запуски из Dynamo Player; обработчик DocumentChanged сбрасывает
+его, только если изменились элементы, из которых он собран. Другие модули
+получают те же события через add_listener() (например, qc - для повторной
+проверки только измененных помещений).
+"""
+from . import api
+from . import timing
+
+_cache = {}
+_subscribed = set()
+_listeners = []
+
+
+def _key(obj):
+    """Ключ документа/приложения в кэше"""
+    try:
+        return obj.GetHashCode()
+    except AttributeError:
+        return id(obj)
+
+
+class DocumentSnapshot(object):
+    """Словари элементов документа, собранные за один проход"""
+
+    def __init__(self, doc):
+        DB = api.db()
+        self.schedules = {}       # имя -> ViewSchedule
+        self.sheets = {}          # номер -> ViewSheet
+        self.views = {}           # имя -> [View] (имена уникальны только в пределах типа вида)
+        self.title_blocks = {}    # "Семейство: Типоразмер" -> FamilySymbol
+        self.bindings = {}        # имя параметра -> (InternalDefinition, Binding)
+        self.bindings_by_guid = {}  # GUID общего параметра -> (InternalDefinition, Binding)
+        self.element_ids = set()
+
+        element_filter = DB.LogicalOrFilter(
+            DB.LogicalOrFilter(DB.ElementClassFilter(DB.View),
+                               DB.ElementClassFilter(DB.ParameterElement)),
+            DB.ElementCategoryFilter(DB.BuiltInCategory.OST_TitleBlocks))
+
+        guids = {}
+        timing.count("collector_scans")
+        for element in DB.FilteredElementCollector(doc).WherePasses(element_filter):
+            if isinstance(element, DB.View):
+                if element.IsTemplate:
+                    continue
+                if isinstance(element, DB.ViewSchedule):
+                    self.schedules[element.Name] = element
+                elif isinstance(element, DB.ViewSheet):
+                    self.sheets[element.SheetNumber] = element
+                else:
+                    self.views.setdefault(element.Name, []).append(element)
+            elif isinstance(element, DB.ParameterElement):
+                if isinstance(element, DB.SharedParameterElement):
+                    guids[element.Id] = element.GuidValue.ToString()
+            elif isinstance(element, DB.ElementType):
+                self.title_blocks[f"{element.FamilyName}: {element.Name}"] = element
+            else:
+                continue
+            self.element_ids.add(element.Id)
+
+        iterator = doc.ParameterBindings.ForwardIterator()
+        while iterator.MoveNext():
+            entry = (iterator.Key, iterator.Current)
+            self.bindings[iterator.Key.Name] = entry
+            guid = guids.get(iterator.Key.Id)
+            if guid is not None:
+                self.bindings_by_guid[guid] = entry
+
+    # ===================== ЗАПРОСЫ =====================
+    def schedule(self, name, category_id=None):
+        """Спецификация по имени (и категории) или None"""
+        schedule = self.schedules.get(name)
+        if schedule is not None and category_id is not None \
+                and schedule.Definition.CategoryId != category_id:
+            return None
+        return schedule
+
+    def first_title_block(self):
+        """Первый загруженный типоразмер основной надписи или None"""
+        for title_block in self.title_blocks.values():
+            return title_block
+        return None
+
+    def parameter(self, name=None, guid=None):
+        """Определение привязанного параметра по имени и/или GUID или None"""
+        if guid is not None:
+            entry = self.bindings_by_guid.get(guid)
+            if entry is None or (name is not None and entry[0].Name != name):
+                return None
+            return entry[0]
+        entry = self.bindings.get(name)
+        return entry[0] if entry is not None else None
+
+    def all_views(self):
+        """Все виды, кроме листов и спецификаций"""
+        for views in self.views.values():
+            for view in views:
+                yield view
+
+    def view_names(self):
+        """Занятые имена видов"""
+        return set(self.views)
+
+    def sheet_names(self):
+        """Занятые имена листов"""
+        return {sheet.Name for sheet in self.sheets.values()}
+
+    # ===================== АКТУАЛЬНОСТЬ =====================
+    def is_affected(self, doc, args):
+        """Затрагивают ли изменения из DocumentChanged элементы снимка"""
+        DB = api.db()
+        ids = self.element_ids
+        title_blocks_id = DB.ElementId(DB.BuiltInCategory.OST_TitleBlocks)
+        for element_id in args.GetModifiedElementIds():
+            if element_id in ids:
+                return True
+        for element_id in args.GetDeletedElementIds():
+            if element_id in ids:
+                return True
+        for element_id in args.GetAddedElementIds():
+            element = doc.GetElement(element_id)
+            if isinstance(element, (DB.View, DB.ParameterElement)):
+                return True
+            if isinstance(element, DB.ElementType) and element.Category is not None \
+                    and element.Category.Id == title_blocks_id:
+                return True
+        return False
+
+
+# ===================== КЭШ =====================
+def _on_document_changed(sender, args):
+    """Сброс снимка, если изменения его касаются"""
+    doc = args.GetDocument()
+    key = _key(doc)
+    snapshot = _cache.get(key)
+    if snapshot is not None and snapshot.is_affected(doc, args):
+        del _cache[key]
+    for listener in _listeners:
+        listener(doc, args)
+
+
+def _subscribe(doc):
+    """Подписка на DocumentChanged (один раз на приложение)"""
+    app = doc.Application
+    key = _key(app)
+    if key not in _subscribed:
+        app.DocumentChanged += _on_document_changed
+        _subscribed.add(key)
+
+
+def add_listener(doc, listener):
+    """Вызов listener(doc, args) на каждое DocumentChanged (регистрация однократная)"""
+    _subscribe(doc)
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def get_snapshot(doc, refresh=False):
+    """Снимок документа из кэша; refresh=True - собрать заново"""
+    key = _key(doc)
+    snapshot = None if refresh else _cache.get(key)
+    if snapshot is None:
+        _subscribe(doc)
+        with timing.span("snapshot"):
+            snapshot = _cache[key] = DocumentSnapshot(doc)
+    else:
+        timing.count("snapshot_cache_hits")
+    return snapshot
+
+
+def invalidate(doc=None):
+    """Сброс снимка документа (None - всех документов)"""
+    if doc is None:
+        _cache.clear()
+    else:
+        _cache.pop(_key(doc), None)
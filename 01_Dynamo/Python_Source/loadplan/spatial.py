@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""Перенос нагрузок из помещений связанной модели в пространства (скрипт 5).
+
+Границы помещений связи переводятся в координаты основной модели и
+раскладываются по ячейкам равномерной сетки, отдельно для каждого уровня.
+Для пространства проверяются только помещения из ячейки его точки
+размещения: сначала по габариту, затем точно - точка в многоугольнике.
+Вместо перебора O(помещения × пространства) на пространство приходится
+несколько проверок.
+"""
+import bisect
+
+from . import api
+from . import timing
+from .rooms import spatial_elements
+from .units import load_from_internal, load_to_internal
+
+DEFAULT_CELL_SIZE = 10.0   # футы, если размер ячейки не из чего оценить
+LEVEL_TOLERANCE = 0.5      # футы, допуск совпадения отметок уровней
+TOLERANCE = 1e-6           # кг/м²
+
+
+# ===================== ГЕОМЕТРИЯ =====================
+def point_in_loops(x, y, loops):
+    """Точка внутри контуров по правилу четности (внутренние контуры - отверстия)"""
+    inside = False
+    for pts in loops:
+        j = len(pts) - 1
+        for i in range(len(pts)):
+            xi, yi = pts[i]
+            xj, yj = pts[j]
+            if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+                inside = not inside
+            j = i
+    return inside
+
+
+class Footprint(object):
+    """Контуры помещения в плане с габаритом и нагрузкой"""
+
+    __slots__ = ("key", "loops", "load", "min_x", "min_y", "max_x", "max_y")
+
+    def __init__(self, key, loops, load=None):
+        self.key = key
+        self.loops = loops
+        self.load = load
+        xs = [x for pts in loops for x, _ in pts]
+        ys = [y for pts in loops for _, y in pts]
+        self.min_x, self.max_x = min(xs), max(xs)
+        self.min_y, self.max_y = min(ys), max(ys)
+
+    def contains(self, x, y):
+        if x < self.min_x or x > self.max_x or y < self.min_y or y > self.max_y:
+            return False
+        return point_in_loops(x, y, self.loops)
+
+
+def suggest_cell_size(footprints):
+    """Размер ячейки - медиана большего размера габаритов помещений"""
+    sizes = sorted(max(f.max_x - f.min_x, f.max_y - f.min_y) for f in footprints)
+    if not sizes or sizes[len(sizes) // 2] <= 0:
+        return DEFAULT_CELL_SIZE
+    return sizes[len(sizes) // 2]
+
+
+class GridIndex(object):
+    """Равномерная сетка: ячейка -> помещения, чей габарит ее задевает"""
+
+    def __init__(self, footprints, cell_size=None):
+        footprints = list(footprints)
+        self.cell_size = cell_size or suggest_cell_size(footprints)
+        self.cells = {}
+        for footprint in footprints:
+            self.insert(footprint)
+
+    def _cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, footprint):
+        x0, y0 = self._cell(footprint.min_x, footprint.min_y)
+        x1, y1 = self._cell(footprint.max_x, footprint.max_y)
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cells.setdefault((cx, cy), []).append(footprint)
+
+    def query(self, x, y):
+        """Помещения, содержащие точку"""
+        return [f for f in self.cells.get(self._cell(x, y), ()) if f.contains(x, y)]
+
+
+def brute_force_query(footprints, x, y):
+    """Полный перебор (эталон для сравнения с GridIndex)"""
+    return [f for f in footprints if f.contains(x, y)]
+
+
+class LevelIndex(object):
+    """Сетки помещений по отметкам уровней"""
+
+    def __init__(self, items, tolerance=LEVEL_TOLERANCE, cell_size=None):
+        """items - итерируемое (отметка, Footprint)"""
+        groups = {}
+        for elevation, footprint in items:
+            groups.setdefault(round(elevation / tolerance), []).append(footprint)
+        self.tolerance = tolerance
+        self.count = sum(len(group) for group in groups.values())
+        self.keys = sorted(groups)
+        self.grids = [GridIndex(groups[key], cell_size) for key in self.keys]
+
+    def __len__(self):
+        return self.count
+
+    def grid(self, elevation):
+        """Сетка уровня с ближайшей отметкой в пределах допуска или None"""
+        key = elevation / self.tolerance
+        position = bisect.bisect_left(self.keys, key)
+        best = None
+        for i in (position - 1, position):
+            if 0 <= i < len(self.keys) and abs(self.keys[i] - key) <= 1:
+                if best is None or abs(self.keys[i] - key) < abs(self.keys[best] - key):
+                    best = i
+        return self.grids[best] if best is not None else None
+
+    def query(self, elevation, x, y):
+        grid = self.grid(elevation)
+        return grid.query(x, y) if grid is not None else []
+
+
+# ===================== СОПОСТАВЛЕНИЕ =====================
+class TransferReport(object):
+    """Итог сопоставления пространств с помещениями связи"""
+
+    def __init__(self):
+        self.changes = []     # [(ключ, нагрузка кг/м²)]
+        self.unchanged = 0
+        self.unmatched = []   # [ключ]
+        self.ambiguous = []   # [(ключ, [ключи помещений])]
+        self.no_load = []     # [(ключ, ключ помещения)]
+        self.skipped = []     # [пространство] без параметра нагрузки или только для чтения
+        self.total = 0
+
+
+def plan_transfer(spaces, index, tolerance=TOLERANCE):
+    """Сопоставление пространств с помещениями за один проход.
+
+    spaces - итерируемое (ключ, отметка, x, y, текущая нагрузка или None);
+    x/y None - пространство не размещено. Несколько помещений в точке с
+    разными нагрузками - неоднозначность, пространство пропускается.
+    """
+    report = TransferReport()
+    for key, elevation, x, y, current in spaces:
+        report.total += 1
+        if x is None:
+            report.unmatched.append(key)
+            continue
+        found = index.query(elevation, x, y)
+        if not found:
+            report.unmatched.append(key)
+            continue
+        loads = {f.load for f in found}
+        if len(loads) > 1:
+            report.ambiguous.append((key, [f.key for f in found]))
+            continue
+        load = loads.pop()
+        if load is None:
+            report.no_load.append((key, found[0].key))
+        elif current is not None and abs(current - load) <= tolerance:
+            report.unchanged += 1
+        else:
+            report.changes.append((key, load))
+    return report
+
+
+# ===================== REVIT =====================
+def link_instances(doc, name_filter=None):
+    """Загруженные экземпляры связей; name_filter - функция от имени"""
+    DB = api.db()
+    timing.count("collector_scans")
+    links = []
+    for link in DB.FilteredElementCollector(doc).OfClass(DB.RevitLinkInstance):
+        if link.GetLinkDocument() is None:
+            continue
+        if name_filter is not None and not name_filter(link.Name):
+            continue
+        links.append(link)
+    return links
+
+
+def _room_loops(room, transform, options):
+    loops = []
+    for loop in room.GetBoundarySegments(options) or []:
+        pts = []
+        for segment in loop:
+            points = list(segment.GetCurve().Tessellate())
+            for point in points[:-1]:
+                point = transform.OfPoint(point)
+                pts.append((point.X, point.Y))
+        if len(pts) >= 3:
+            loops.append(pts)
+    return loops
+
+
+def linked_footprints(link, param_guid, param_name):
+    """(отметка в основной модели, Footprint) помещений связи"""
+    DB = api.db()
+    link_doc = link.GetLinkDocument()
+    transform = link.GetTotalTransform()
+    options = DB.SpatialElementBoundaryOptions()
+    guid = DB.Guid(param_guid) if param_guid else None
+    for room in spatial_elements(link_doc, "OST_Rooms"):
+        if room.Area <= 0:
+            continue  # не размещено или не окружено
+        loops = _room_loops(room, transform, options)
+        if not loops:
+            continue
+        param = room.get_Parameter(guid) if guid is not None else None
+        if param is None:
+            param = room.LookupParameter(param_name)
+        load = load_from_internal(param.AsDouble()) if param is not None and param.HasValue else None
+        level = room.Level
+        elevation = (level.Elevation if level is not None else 0.0) + transform.Origin.Z
+        yield elevation, Footprint((link.Name, room.Number), loops, load)
+
+
+def space_records(doc, load_def, skipped=None):
+    """Записи пространств для plan_transfer; ключ - (пространство, параметр).
+
+    Пространства без параметра нагрузки или с параметром только для чтения
+    добавляются в список skipped.
+    """
+    for space in spatial_elements(doc, "OST_MEPSpaces"):
+        param = space.get_Parameter(load_def)
+        if param is None or param.IsReadOnly:
+            if skipped is not None:
+                skipped.append(space)
+            continue
+        location = space.Location
+        point = getattr(location, "Point", None)
+        level = space.Level
+        elevation = level.Elevation if level is not None else (point.Z if point is not None else 0.0)
+        current = load_from_internal(param.AsDouble()) if param.HasValue else None
+        if point is None:
+            yield (space, param), elevation, None, None, current
+        else:
+            yield (space, param), elevation, point.X, point.Y, current
+
+
+def transfer_loads(doc, load_def, param_guid, param_name, links, dry_run=False):
+    """Нагрузки пространств из помещений связей; запись только отличающихся"""
+    with timing.span("index"):
+        index = LevelIndex(item for link in links
+                           for item in linked_footprints(link, param_guid, param_name))
+    with timing.span("match"):
+        skipped = []
+        report = plan_transfer(space_records(doc, load_def, skipped), index)
+        report.skipped = skipped
+    if report.changes and not dry_run:
+        tm = api.transactions()
+        tm.EnsureInTransaction(doc)
+        try:
+            with timing.span("write"):
+                for (space, param), load in report.changes:
+                    param.Set(load_to_internal(load))
+        finally:
+            tm.TransactionTaskDone()
+    return report
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""Замеры фаз и счетчики обращений к API для OUT["timings"].
+
+Скрипт вызывает start() в начале и finish() в конце; между ними код
+пакета оборачивает шаги в span() и отмечает события через count():
+сканы коллекторов, созданные элементы, перехваченные исключения.
+Без start() (или при start(False)) span() возвращает общий пустой
+контекст, а count() сразу выходит, так что замеры почти ничего не стоят.
+
+finish() может дописать результат строкой JSON в журнал (JSONL), чтобы
+собирать запуски всей команды в один файл.
+"""
+import datetime
+import json
+import os
+import time
+
+_recorder = None
+
+
+class _NullSpan(object):
+    """Пустой контекст для выключенных замеров"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+    """Замер одной фазы; вложенные фазы получают путь "внешняя/внутренняя" """
+
+    __slots__ = ("recorder", "name", "path", "started")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        stack = self.recorder.stack
+        stack.append(self.name)
+        self.path = "/".join(stack)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter() - self.started
+        recorder = self.recorder
+        recorder.stack.pop()
+        entry = recorder.spans.get(self.path)
+        if entry is None:
+            recorder.spans[self.path] = [elapsed, 1]
+        else:
+            entry[0] += elapsed
+            entry[1] += 1
+        return False
+
+
+class Recorder(object):
+    """Накопленные замеры одного запуска скрипта"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}      # путь -> [секунды, вызовы]
+        self.counters = {}
+        self.stack = []
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def as_dict(self):
+        """{"total_ms", "spans": {путь: {"ms", "calls"}}, "counters"}"""
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "spans": {path: {"ms": round(seconds * 1000, 3), "calls": calls}
+                      for path, (seconds, calls) in self.spans.items()},
+            "counters": dict(self.counters),
+        }
+
+
+def start(enabled=True):
+    """Начало замеров запуска; enabled=False - замеры выключены"""
+    global _recorder
+    _recorder = Recorder() if enabled else None
+    return _recorder
+
+
+def span(name):
+    """Контекст замера фазы name"""
+    recorder = _recorder
+    if recorder is None:
+        return _NULL_SPAN
+    return recorder.span(name)
+
+
+def count(name, n=1):
+    """Увеличение счетчика name"""
+    recorder = _recorder
+    if recorder is not None:
+        recorder.count(name, n)
+
+
+def finish(log_path=None, **context):
+    """Итог замеров для OUT["timings"] ({} если выключены).
+
+    log_path - файл JSONL, куда дописывается строка с итогом и context
+    (имя скрипта, документ и т.п.). Ошибка записи журнала не прерывает
+    скрипт: она попадает в поле "log_error".
+    """
+    global _recorder
+    recorder = _recorder
+    _recorder = None
+    if recorder is None:
+        return {}
+    result = recorder.as_dict()
+    if log_path:
+        record = {"time": datetime.datetime.now().isoformat(timespec="seconds"),
+                  "user": os.environ.get("USERNAME") or os.environ.get("USER", "")}
+        record.update(context)
+        record.update(result)
+        try:
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except (IOError, OSError) as e:
+            result["log_error"] = str(e)
+    return result
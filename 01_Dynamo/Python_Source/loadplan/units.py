@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""Перевод единиц: Revit хранит значения во внутренних единицах (футы, кг).
+
+Параметр нагрузки имеет тип MASS_PER_UNIT_AREA, внутреннее значение -
+кг/фут², в интерфейсе и таблицах СП - кг/м².
+"""
+
+SQ_M_PER_SQ_FT = 0.09290304  # 1 фут² в м²
+
+
+def load_to_internal(kg_per_m2):
+    """кг/м² -> внутренние единицы (кг/фут²)"""
+    return kg_per_m2 * SQ_M_PER_SQ_FT
+
+
+def load_from_internal(value):
+    """Внутренние единицы (кг/фут²) -> кг/м²"""
+    return value / SQ_M_PER_SQ_FT
+
+
+def area_from_internal(value):
+    """Площадь: фут² -> м²"""
+    return value * SQ_M_PER_SQ_FT
@@ -0,0 +1,622 @@
+# -*- coding: utf-8 -*-
+"""Генерация планов нагрузок, листов и видовых экранов (скрипт 2).
+
+generate_load_plans() обрабатывает любое число планов этажей в одной
+транзакции: каждый план - в своей подтранзакции, регенерация документа
+выполняется один раз в конце пакета. Цветовая схема нагрузок строится
+один раз на пакет и назначается всем планам (см. colors).
+
+Планы и спецификация размещаются на листе по раскладке (см. layout): по
+размерам подрезки вида и таблицы, без регенерации. При plans_per_sheet,
+отличном от 1, виды уровней создаются по одному, а затем раскладываются
+по общим листам.
+
+В режиме обновления (settings.update) созданные виды и листы запоминаются
+вместе с отпечатком уровня (см. fingerprint). Повторный запуск пропускает
+уровни с прежним отпечатком, а для измененных настраивает заново
+существующие вид и лист вместо создания копий.
+"""
+import re
+
+from . import api
+from . import colors
+from . import fingerprint
+from . import layout
+from . import snapshot
+from . import timing
+from .naming import NameRegistry
+
+# === НАСТРОЙКИ ПО УМОЛЧАНИЮ ===
+SUFFIX = "_НАГРУЗКИ"
+SHEET_PREFIX = "Н-"
+DEFAULT_SHEET_NAME = "План нагрузок"
+MIN_SHEET_NAME_LENGTH = 3
+LOAD_PARAMETER_GUID = "88aea8e7-1818-4d65-8037-5c445ba7c5c3"  # GUID из SharedParameters.txt
+LOAD_PARAMETER_NAME = "ADSK_Нагрузка_Полезная"
+SCHEDULE_NAME = "00_Контроль нагрузок (Авто)"
+CATEGORY_NAME = "OST_Rooms"  # OST_MEPSpaces - пространства по связанной архитектуре
+COLOR_SCHEME = True   # схема и легенда автоматически (Revit 2022+)
+COLOR_RANGES = None   # нижние границы диапазонов, кг/м²; None - по значениям
+UPDATE = True         # обновлять ранее созданные виды и листы, а не копировать
+PLANS_PER_SHEET = 1   # планов на листе; 0 - сколько поместится
+# ==============================
+
+
+class PlanSettings(object):
+    """Настройки генерации; значения по умолчанию - константы модуля"""
+
+    def __init__(self, **overrides):
+        self.suffix = SUFFIX
+        self.sheet_prefix = SHEET_PREFIX
+        self.default_sheet_name = DEFAULT_SHEET_NAME
+        self.min_sheet_name_length = MIN_SHEET_NAME_LENGTH
+        self.load_parameter_guid = LOAD_PARAMETER_GUID
+        self.load_parameter_name = LOAD_PARAMETER_NAME
+        self.schedule_name = SCHEDULE_NAME
+        self.category_name = CATEGORY_NAME
+        self.color_scheme = COLOR_SCHEME
+        self.color_ranges = COLOR_RANGES
+        self.legend_title = colors.LEGEND_TITLE
+        self.update = UPDATE
+        self.fingerprint_file = None  # None - рядом с файлом модели
+        self.plans_per_sheet = PLANS_PER_SHEET
+        for key, value in overrides.items():
+            if not hasattr(self, key):
+                raise ValueError(f"Неизвестная настройка: {key}")
+            setattr(self, key, value)
+
+
+class _BatchContext(object):
+    """Элементы, общие для всех видов пакета (ищутся один раз)"""
+
+    def __init__(self, doc, settings):
+        snap = snapshot.get_snapshot(doc)
+        self.doc = doc
+        self.settings = settings
+        self.load_param_def = snap.parameter(
+            settings.load_parameter_name, settings.load_parameter_guid)
+        self.title_block = snap.first_title_block()
+        self.schedule = snap.schedule(settings.schedule_name)
+        self.view_names = NameRegistry(snap.view_names())
+        self.sheet_numbers = NameRegistry(snap.sheets)
+        self.sheet_names = NameRegistry(snap.sheet_names(), pattern="{base} {n}")
+        self.color_scheme = None
+        self.color_scheme_error = None
+        self.store = None
+        self.scheme_key = ()
+        self.fingerprints = {}
+        self._placed = None
+        self._frame = None
+        self._schedule_box = None
+
+    def sheet_layouts(self, sheet, plans, per_sheet=None):
+        """Раскладка планов [(ключ, вид)] по листам с основной надписью пакета.
+
+        Поле листа берется из Outline первого листа пакета, размер
+        спецификации считается один раз.
+        """
+        if self._frame is None:
+            self._frame = layout.SheetFrame.from_outline(sheet.Outline)
+        if self._schedule_box is None and self.schedule is not None:
+            try:
+                self._schedule_box = ("schedule",) + layout.schedule_size(self.schedule)
+            except Exception:
+                timing.count("exceptions_swallowed")
+                self._schedule_box = ("schedule", 0.0, 0.0)
+        boxes = [(key,) + layout.plan_size(view) for key, view in plans]
+        return layout.layout_sheets(self._frame, boxes, self._schedule_box, per_sheet)
+
+    def prepare_update(self):
+        """Записи прошлых запусков и отпечатки уровней (режим обновления)"""
+        settings = self.settings
+        fingerprint.discard_pending(self.doc)
+        self.store = fingerprint.FingerprintStore(
+            settings.fingerprint_file or fingerprint.default_path(self.doc))
+        self.scheme_key = (
+            settings.category_name, settings.load_parameter_name, settings.load_parameter_guid or "",
+            bool(settings.color_scheme), tuple(settings.color_ranges or ()), settings.legend_title)
+        self.fingerprints = fingerprint.level_fingerprints(
+            self.doc, self.load_param_def, settings.category_name, self.scheme_key)
+
+    def level_fingerprint(self, source_view):
+        level = source_view.GenLevel
+        value = self.fingerprints.get(level.Id) if level is not None else None
+        return value or fingerprint.empty_fingerprint(self.scheme_key)
+
+    def existing_plan(self, source_view):
+        """(запись, вид, лист) прошлого запуска; без записи - вид по имени
+        с суффиксом и его лист (планы, созданные до режима обновления)"""
+        doc = self.doc
+        record = self.store.get(source_view.UniqueId)
+        if record is not None:
+            view = doc.GetElement(record["view"]) if record.get("view") else None
+            sheet = doc.GetElement(record["sheet"]) if record.get("sheet") else None
+            return record, view, sheet
+        DB = api.db()
+        view = next((v for v in snapshot.get_snapshot(doc).views.get(
+            source_view.Name + self.settings.suffix, [])
+            if v.ViewType == DB.ViewType.FloorPlan), None)
+        if view is None:
+            return None, None, None
+        if self._placed is None:
+            self._placed = fingerprint.placed_sheets(doc)
+        sheet_id = self._placed.get(view.Id)
+        return None, view, doc.GetElement(sheet_id) if sheet_id is not None else None
+
+    def prepare_color_scheme(self):
+        """Схема заливки по нагрузкам, общая для всех видов пакета"""
+        settings = self.settings
+        if not settings.color_scheme:
+            return
+        if not colors.available():
+            self.color_scheme_error = "цветовые схемы через API доступны с Revit 2022"
+            return
+        try:
+            values = () if settings.color_ranges else colors.distinct_loads(
+                self.doc, self.load_param_def, settings.category_name)
+            entries = colors.scheme_entries(values, settings.color_ranges)
+            self.color_scheme, _ = colors.ensure_load_scheme(
+                self.doc, self.load_param_def, entries, by_range=bool(settings.color_ranges),
+                category_name=settings.category_name, title=settings.legend_title)
+        except Exception as e:
+            timing.count("exceptions_swallowed")
+            self.color_scheme_error = str(e)
+
+
+# ===================== ПОИСК ЭЛЕМЕНТОВ =====================
+def collect_floor_plans(doc, name_filter=None, suffix=SUFFIX):
+    """Планы этажей документа, отсортированные по отметке уровня.
+
+    name_filter - регулярное выражение (строка) или функция от имени вида.
+    Шаблоны видов и уже созданные планы нагрузок пропускаются.
+    """
+    DB = api.db()
+    if name_filter is None:
+        matches = None
+    elif callable(name_filter):
+        matches = name_filter
+    else:
+        matches = re.compile(name_filter).search
+
+    plans = []
+    for view in snapshot.get_snapshot(doc).all_views():
+        if not isinstance(view, DB.ViewPlan) or view.ViewType != DB.ViewType.FloorPlan:
+            continue
+        if suffix in view.Name:
+            continue
+        if matches is not None and not matches(view.Name):
+            continue
+        plans.append(view)
+
+    def sort_key(view):
+        level = view.GenLevel
+        return (level.Elevation if level is not None else 0.0, view.Name)
+
+    plans.sort(key=sort_key)
+    return plans
+
+
+# ===================== ШАГИ ГЕНЕРАЦИИ =====================
+def create_load_view(ctx, source_view, messages, claims):
+    """Шаг 1-3: копия плана с включенными помещениями и цветовой схемой"""
+    DB = api.db()
+    doc = ctx.doc
+    settings = ctx.settings
+
+    if source_view.ViewType != DB.ViewType.FloorPlan:
+        raise Exception("Вид должен быть планом этажа для создания плана помещений.")
+
+    new_view = doc.GetElement(source_view.Duplicate(DB.ViewDuplicateOption.Duplicate))
+    timing.count("elements_created")
+
+    new_name = ctx.view_names.claim(source_view.Name + settings.suffix)
+    claims.append((ctx.view_names, new_name))
+    new_view.Name = new_name
+    messages.append(f"✅ Вид создан: {new_name}")
+
+    configure_load_view(ctx, new_view, messages)
+    return new_view
+
+
+def configure_load_view(ctx, view, messages):
+    """Шаги 2-3: помещения, цветовое заполнение и параметр схемы на виде.
+
+    Параметры записываются только при отличии от нужного значения, поэтому
+    повторная настройка существующего вида не изменяет его без причины.
+    """
+    DB = api.db()
+    room_param = view.get_Parameter(DB.BuiltInParameter.VIEW_ROOMS)
+    if room_param and not room_param.IsReadOnly:
+        if room_param.AsInteger() != 1:
+            room_param.Set(1)
+        messages.append("✅ Отображение помещений включено")
+    else:
+        raise Exception("Не удалось включить отображение помещений")
+
+    try:
+        fill_param = view.get_Parameter(DB.BuiltInParameter.VIEWER_ZONE_COLOR_FILL)
+        if fill_param and not fill_param.IsReadOnly:
+            if fill_param.AsInteger() != 1:
+                fill_param.Set(1)
+            messages.append("✅ Цветовое заполнение включено")
+
+        cs_param = view.get_Parameter(DB.BuiltInParameter.VIEWER_COLOR_SCHEME_LOCATION)
+        if cs_param and not cs_param.IsReadOnly:
+            if cs_param.AsInteger() != 1:
+                cs_param.Set(1)
+            messages.append("✅ Тип отображения цветовой схемы установлен")
+
+        scheme_param = view.get_Parameter(DB.BuiltInParameter.VIEW_COLOR_SCHEME_PARAMETER)
+        if scheme_param and not scheme_param.IsReadOnly:
+            if scheme_param.AsElementId() != ctx.load_param_def.Id:
+                scheme_param.Set(ctx.load_param_def.Id)
+            messages.append(f"✅ Цветовая схема привязана к параметру '{ctx.settings.load_parameter_name}'")
+    except Exception as e:
+        timing.count("exceptions_swallowed")
+        messages.append(f"⚠️ Ошибка настройки цветовой схемы: {str(e)}")
+
+
+def place_color_legend(ctx, view, messages, reuse=False):
+    """Шаг 3a: общая цветовая схема пакета и легенда на плане.
+
+    reuse - на существующем виде легенда не дублируется.
+    """
+    if ctx.color_scheme is None:
+        if ctx.color_scheme_error:
+            messages.append(f"⚠️ Легенду нужно добавить вручную: {ctx.color_scheme_error}")
+        return None
+    try:
+        legend, created = colors.apply_scheme(
+            ctx.doc, view, ctx.color_scheme, ctx.settings.category_name, reuse_legend=reuse)
+        if created:
+            timing.count("elements_created")
+            messages.append(f"✅ Цветовая схема '{ctx.settings.legend_title}' и легенда размещены")
+        else:
+            messages.append(f"✅ Цветовая схема '{ctx.settings.legend_title}' назначена, легенда уже на виде")
+        return legend
+    except Exception as e:
+        timing.count("exceptions_swallowed")
+        messages.append(f"⚠️ Легенда не размещена: {str(e)}")
+        return None
+
+
+def create_load_sheet(ctx, source_view, messages, claims):
+    """Шаг 4: лист с уникальными номером и именем"""
+    DB = api.db()
+    settings = ctx.settings
+
+    new_sheet = DB.ViewSheet.Create(ctx.doc, ctx.title_block.Id)
+    if new_sheet is None:
+        raise Exception("Не удалось создать лист.")
+    timing.count("elements_created")
+
+    sheet_number = ctx.sheet_numbers.claim(
+        settings.sheet_prefix + source_view.Name[:settings.min_sheet_name_length])
+    claims.append((ctx.sheet_numbers, sheet_number))
+    new_sheet.SheetNumber = sheet_number
+
+    sheet_name = ctx.sheet_names.claim(settings.default_sheet_name)
+    claims.append((ctx.sheet_names, sheet_name))
+    new_sheet.Name = sheet_name
+
+    messages.append(f"✅ Лист создан: {sheet_number} - {sheet_name}")
+    return new_sheet
+
+
+def place_view_on_sheet(ctx, sheet, view, messages, placement):
+    """Шаг 5: план в прямоугольнике раскладки (см. layout)"""
+    DB = api.db()
+    doc = ctx.doc
+    if not DB.Viewport.CanAddViewToSheet(doc, sheet.Id, view.Id):
+        messages.append("⚠️ Вид не может быть размещен на листе")
+        return None
+
+    u, v = layout.viewport_center(placement)
+    vp = DB.Viewport.Create(doc, sheet.Id, view.Id, DB.XYZ(u, v, 0))
+    if vp:
+        timing.count("elements_created")
+        vp.ChangeLabelOffset(DB.XYZ(0.5, -0.5, 0))
+        messages.append(f"✅ Вид размещен на листе {sheet.SheetNumber}")
+        if placement.oversized:
+            messages.append("⚠️ План больше поля листа: уменьшите подрезку или масштаб вида")
+    else:
+        messages.append("⚠️ Вид размещен неудачно")
+    return vp
+
+
+def place_schedule_on_sheet(ctx, sheet, messages, placement):
+    """Шаг 6: спецификация нагрузок в правом верхнем углу поля листа"""
+    DB = api.db()
+    if ctx.schedule is None:
+        messages.append("⚠️ Спецификация не найдена. Создайте её сначала")
+        return None
+    try:
+        u, v = placement.top_left
+        instance = DB.ScheduleSheetInstance.Create(ctx.doc, sheet.Id, ctx.schedule.Id, DB.XYZ(u, v, 0))
+        timing.count("elements_created")
+        messages.append("✅ Спецификация размещена на листе")
+        if placement.oversized:
+            messages.append("⚠️ Спецификация не помещается в поле листа: разделите ее на части")
+        return instance
+    except Exception as e:
+        timing.count("exceptions_swallowed")
+        messages.append(f"⚠️ Ошибка размещения спецификации: {str(e)}")
+        return None
+
+
+# ===================== ПАКЕТНАЯ ГЕНЕРАЦИЯ =====================
+def _result(source_view):
+    return {
+        "source_view": source_view.Name,
+        "status": "error",
+        "action": None,       # created / updated / skipped
+        "view_name": None,
+        "view_id": None,
+        "view_unique_id": None,
+        "sheet_number": None,
+        "sheet_name": None,
+        "sheet_id": None,
+        "sheet_unique_id": None,
+        "legend": False,
+        "messages": [],
+    }
+
+
+def _describe(result, view, sheet):
+    result.update({
+        "view_name": view.Name,
+        "view_id": view.Id.ToString(),
+        "view_unique_id": view.UniqueId,
+        "sheet_number": sheet.SheetNumber,
+        "sheet_name": sheet.Name,
+        "sheet_id": sheet.Id.ToString(),
+        "sheet_unique_id": sheet.UniqueId,
+    })
+    return result
+
+
+def _prepare_view(ctx, source_view, view, messages, claims):
+    """Шаги 1-3a: новый или перенастроенный существующий план и легенда"""
+    existing_view = view is not None
+    with timing.span("view"):
+        if existing_view:
+            configure_load_view(ctx, view, messages)
+        else:
+            view = create_load_view(ctx, source_view, messages, claims)
+    with timing.span("legend"):
+        legend = place_color_legend(ctx, view, messages, reuse=existing_view)
+    return view, legend
+
+
+def _rollback(sub, claims, messages, name, error):
+    sub.RollBack()
+    timing.count("exceptions_swallowed")
+    timing.count("rollbacks")
+    for registry, claimed in claims:
+        registry.release(claimed)
+    messages.append(f"❌ {name}: {str(error)}")
+
+
+def _finish(result, view, sheet, legend, existing_view):
+    _describe(result, view, sheet)
+    result.update({
+        "status": "ok",
+        "action": "updated" if existing_view else "created",
+        "legend": legend is not None,
+    })
+    return result
+
+
+def _generate_one(ctx, source_view, view=None, sheet=None):
+    """Вид, лист и видовые экраны для одного плана; словарь результата.
+
+    view, sheet - существующие план нагрузок и лист (режим обновления):
+    они настраиваются заново, недостающие создаются.
+    """
+    DB = api.db()
+    result = _result(source_view)
+    messages = result["messages"]
+    claims = []
+    existing_view = view is not None
+    new_sheet = sheet is None
+
+    sub = DB.SubTransaction(ctx.doc)
+    sub.Start()
+    try:
+        view, legend = _prepare_view(ctx, source_view, view, messages, claims)
+        with timing.span("sheet"):
+            if new_sheet:
+                sheet = create_load_sheet(ctx, source_view, messages, claims)
+        placed = not new_sheet and view.Id in sheet.GetAllPlacedViews()
+        if placed:
+            messages.append(f"✅ Вид уже размещен на листе {sheet.SheetNumber}")
+        else:
+            with timing.span("layout"):
+                page = ctx.sheet_layouts(sheet, [(0, view)], per_sheet=1)[0]
+            with timing.span("viewport"):
+                place_view_on_sheet(ctx, sheet, view, messages, page.plans[0])
+        with timing.span("schedule"):
+            if new_sheet:
+                place_schedule_on_sheet(ctx, sheet, messages, page.schedule)
+        sub.Commit()
+    except Exception as e:
+        _rollback(sub, claims, messages, source_view.Name, e)
+        return result
+    return _finish(result, view, sheet, legend, existing_view)
+
+
+def _existing(ctx, source_view):
+    """Режим обновления: (результат пропуска или None, вид, лист) уровня"""
+    if ctx.store is None:
+        return None, None, None
+    record, view, sheet = ctx.existing_plan(source_view)
+    if (record is None or view is None or sheet is None
+            or record.get("fingerprint") != ctx.level_fingerprint(source_view)):
+        return None, view, sheet
+
+    result = _describe(_result(source_view), view, sheet)
+    result.update({
+        "status": "ok",
+        "action": "skipped",
+        "legend": bool(record.get("legend")),
+    })
+    result["messages"].append(
+        f"⏭️ {source_view.Name}: нагрузки не изменились, вид '{view.Name}' "
+        f"и лист {sheet.SheetNumber} без изменений")
+    return result, view, sheet
+
+
+def _remember(ctx, source_view, result):
+    """Запись о созданных виде и листе для следующего запуска"""
+    if ctx.store is None or result["status"] != "ok":
+        return
+    ctx.store.set(source_view.UniqueId, {
+        "fingerprint": ctx.level_fingerprint(source_view),
+        "view": result["view_unique_id"],
+        "sheet": result["sheet_unique_id"],
+        "source_name": source_view.Name,
+        "legend": result["legend"],
+    })
+
+
+def _generate_single(ctx, views):
+    """Лист на каждый уровень"""
+    results = []
+    for source_view in views:
+        skipped, view, sheet = _existing(ctx, source_view)
+        if skipped is not None:
+            results.append(skipped)
+            continue
+        result = _generate_one(ctx, source_view, view, sheet)
+        _remember(ctx, source_view, result)
+        results.append(result)
+    return results
+
+
+def _generate_packed(ctx, views, per_sheet):
+    """Несколько уровней на листе: сначала виды, затем листы по раскладке.
+
+    Уровни, у которых уже есть лист (режим обновления), обновляются на
+    своем листе; остальные раскладываются по новым листам в порядке списка.
+    """
+    DB = api.db()
+    results = []
+    pending = []   # (исходный план, вид, легенда, вид существовал, результат)
+    for source_view in views:
+        skipped, view, sheet = _existing(ctx, source_view)
+        if skipped is not None:
+            results.append(skipped)
+            continue
+        if view is not None and sheet is not None:
+            result = _generate_one(ctx, source_view, view, sheet)
+            _remember(ctx, source_view, result)
+            results.append(result)
+            continue
+
+        result = _result(source_view)
+        results.append(result)
+        claims = []
+        sub = DB.SubTransaction(ctx.doc)
+        sub.Start()
+        try:
+            new_view, legend = _prepare_view(ctx, source_view, view, result["messages"], claims)
+            sub.Commit()
+        except Exception as e:
+            _rollback(sub, claims, result["messages"], source_view.Name, e)
+            continue
+        pending.append((source_view, new_view, legend, view is not None, result))
+
+    pages = None
+    index = 0
+    while index < len(pending):
+        first_source, _, _, _, first_result = pending[index]
+        claims = []
+        sub = DB.SubTransaction(ctx.doc)
+        sub.Start()
+        try:
+            with timing.span("sheet"):
+                sheet = create_load_sheet(ctx, first_source, first_result["messages"], claims)
+            if pages is None:
+                with timing.span("layout"):
+                    pages = ctx.sheet_layouts(
+                        sheet, [(i, item[1]) for i, item in enumerate(pending)], per_sheet)
+            page = next(p for p in pages if p.plans[0].key == index)
+            with timing.span("viewport"):
+                for placement in page.plans:
+                    _, view, _, _, result = pending[placement.key]
+                    place_view_on_sheet(ctx, sheet, view, result["messages"], placement)
+            with timing.span("schedule"):
+                place_schedule_on_sheet(ctx, sheet, first_result["messages"], page.schedule)
+            sub.Commit()
+        except Exception as e:
+            _rollback(sub, claims, first_result["messages"], first_source.Name, e)
+            if pages is None:
+                break  # лист не создается - остальные тоже не будут
+            index += len(next(p for p in pages if p.plans[0].key == index).plans)
+            continue
+        for placement in page.plans:
+            source_view, view, legend, existing_view, result = pending[placement.key]
+            _finish(result, view, sheet, legend, existing_view)
+            _remember(ctx, source_view, result)
+        index += len(page.plans)
+
+    for source_view, view, _, _, result in pending:
+        if result["status"] != "ok":
+            result["messages"].append(f"⚠️ Вид '{view.Name}' создан, но не размещен на листе")
+    return results
+
+
+def generate_load_plans(doc, views, settings=None):
+    """Планы нагрузок, листы и видовые экраны для списка планов этажей.
+
+    Все изменения выполняются в одной транзакции Dynamo, регенерация -
+    один раз в конце. Ошибка на одном виде откатывает только его
+    подтранзакцию. В режиме обновления уровни без изменений пропускаются
+    (action "skipped"), а файл отпечатков записывается после фиксации
+    транзакции (fingerprint.save_after_commit).
+    Возвращает список результатов по каждому виду.
+    """
+    settings = settings or PlanSettings()
+    tm = api.transactions()
+    tm.EnsureInTransaction(doc)
+    try:
+        with timing.span("context"):
+            ctx = _BatchContext(doc, settings)
+        if ctx.load_param_def is None:
+            raise Exception(f"Параметр '{settings.load_parameter_name}' не найден. "
+                            "Выполните сначала скрипт создания спецификации.")
+        if ctx.title_block is None:
+            raise Exception("Не найдены загруженные семейства Основных надписей (TitleBlocks).")
+        with timing.span("color_scheme"):
+            ctx.prepare_color_scheme()
+        if settings.update:
+            with timing.span("fingerprints"):
+                ctx.prepare_update()
+
+        with timing.span("plans"):
+            if settings.plans_per_sheet == 1:
+                results = _generate_single(ctx, views)
+            else:
+                results = _generate_packed(ctx, views, settings.plans_per_sheet or None)
+        if any(r["status"] == "ok" and r["action"] != "skipped" for r in results):
+            with timing.span("regenerate"):
+                doc.Regenerate()
+            timing.count("regenerations")
+            snapshot.invalidate(doc)
+    finally:
+        tm.TransactionTaskDone()
+
+    if ctx.store is not None:
+        ctx.store.prune(doc)
+        # Новые виды подтверждают фиксацию; перенастройка существующих видов
+        # повторяема, а их пропажу при откате поймает existing_plan()
+        created = {r["view_id"] for r in results if r["status"] == "ok" and r["action"] == "created"}
+        try:
+            fingerprint.save_after_commit(ctx.store, doc, created)
+        except OSError as e:
+            timing.count("exceptions_swallowed")
+            for r in results:
+                if r["status"] == "ok" and r["action"] != "skipped":
+                    r["messages"].append(f"⚠️ Файл отпечатков не записан ({e}): "
+                                         "при следующем запуске план будет обновлен заново")
+    return results
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Пересборка узлов Python в файлах .dyn из Python_Source.
+
+По умолчанию в узел записывается загрузчик: заголовок и блок НАСТРОЙКИ
+скрипта и вызов loadplan.runner.run(), сам код остается в Python_Source.
+С --embed в узел встраивается полный текст скрипта (для передачи .dyn без
+папки Python_Source; LIB_PATH все равно нужен для пакета loadplan).
+
+    python build_dyn.py            # загрузчики во всех .dyn
+    python build_dyn.py --embed    # полный текст скриптов
+    python build_dyn.py --check    # код возврата 1, если .dyn устарели
+
+Остальное содержимое .dyn (узлы, связи, вид) не меняется.
+"""
+import argparse
+import json
+import os
+import sys
+
+DYNAMO_DIR = os.path.dirname(os.path.abspath(__file__))
+PYTHON_SOURCE = os.path.join(DYNAMO_DIR, "Python_Source")
+sys.path.insert(0, PYTHON_SOURCE)
+
+from loadplan.runner import settings_block  # noqa: E402
+
+# (файл .dyn, скрипт Python_Source)
+DYN_FILES = (
+    ("01_CreateParameters.dyn", "01_setup_params.py"),
+    ("02_CreateLegendView.dyn", "02_create_views.py"),
+    ("03_AssignLoads.dyn", "03_assign_loads.py"),
+    ("04_ExchangeLoads.dyn", "04_exchange_loads.py"),
+    ("05_TransferLoads.dyn", "05_transfer_loads.py"),
+    ("06_CheckLoads.dyn", "06_check_loads.py"),
+    ("07_ExportSheets.dyn", "07_export_sheets.py"),
+)
+
+STUB_TEMPLATE = """{title}
+# Узел-загрузчик (собран build_dyn.py): код - Python_Source/{script}.
+# Здесь меняются только НАСТРОЙКИ; пакет loadplan и скомпилированный
+# скрипт кэшируются между запусками.
+import sys
+
+{settings}
+if not LIB_PATH:
+    raise Exception("Укажите в LIB_PATH путь к папке Python_Source с пакетом loadplan")
+if LIB_PATH not in sys.path:
+    sys.path.append(LIB_PATH)
+from loadplan import runner
+OUT = runner.run("{name}", globals())
+"""
+
+
+def stub_source(script, source):
+    """Код узла-загрузчика для скрипта script по его тексту source"""
+    lines = source.splitlines(True)
+    start, end = settings_block(lines)
+    return STUB_TEMPLATE.format(
+        title=lines[0].rstrip("\n"),
+        script=script,
+        settings="".join(lines[start - 1:end + 1]),
+        name=os.path.splitext(script)[0],
+    )
+
+
+def node_source(script, embed=False):
+    """Код узла Python для .dyn: загрузчик или полный текст скрипта"""
+    with open(os.path.join(PYTHON_SOURCE, script), encoding="utf-8") as f:
+        source = f.read().replace("\r\n", "\n")
+    return source if embed else stub_source(script, source)
+
+
+def python_node(graph):
+    """Первый узел Python графа Dynamo"""
+    for node in graph["Nodes"]:
+        if node.get("NodeType") == "PythonScriptNode":
+            return node
+    raise ValueError("В графе нет узла Python")
+
+
+def build(dyn_name, script, embed=False, check=False):
+    """Обновление узла Python в dyn_name; True, если файл изменился (изменился бы)"""
+    path = os.path.join(DYNAMO_DIR, dyn_name)
+    with open(path, encoding="utf-8", newline="") as f:
+        raw = f.read()
+    graph = json.loads(raw)
+    # Dynamo хранит код узла с переводами строк Windows
+    python_node(graph)["Code"] = node_source(script, embed).replace("\n", "\r\n")
+    result = json.dumps(graph, indent=2, ensure_ascii=False)
+    if result == raw:
+        return False
+    if not check:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(result)
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--embed", action="store_true", help="встроить полный текст скриптов")
+    parser.add_argument("--check", action="store_true", help="только проверить, без записи")
+    args = parser.parse_args(argv)
+
+    outdated = []
+    for dyn_name, script in DYN_FILES:
+        if build(dyn_name, script, args.embed, args.check):
+            outdated.append(dyn_name)
+            print(("устарел: " if args.check else "обновлен: ") + dyn_name)
+    return 1 if args.check and outdated else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
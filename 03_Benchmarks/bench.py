@@ -0,0 +1,524 @@
+# -*- coding: utf-8 -*-
+"""Бенчмарк скриптов 1-7 на синтетической модели (без Revit).
+
+Каждый сценарий запускает скрипт через revitfake.harness на свежей или
+подготовленной модели и фиксирует время, число транзакций и счетчики
+обращений к API (FakeDocument.stats), а также OUT["timings"] скрипта
+(фазы и счетчики loadplan.timing). Счетчики детерминированы, поэтому
+любой их рост - регрессия; время сравнивается с допуском. Кроме того,
+у сценария есть пределы счетчиков, не зависящих от размера модели
+(транзакции, проходы коллекторов) и, для пакетной генерации видов, бюджет
+времени на уровень модели: их превышение - ошибка и без --baseline.
+
+    python bench.py --levels 20 --rooms 50 --json result.json
+    python bench.py --baseline result.json --tolerance 0.5
+    python bench.py --filter spatial --spatial-rooms 5000
+
+Сценарии spatial/* сравнивают сетку loadplan.spatial с полным перебором
+на одном этаже из --spatial-rooms помещений. Сценарии aggregate/*
+сравнивают сводку loadplan.aggregate на NumPy и на чистом Python для
+--aggregate-rooms помещений. Сценарий rules/classify сопоставляет
+--rules-rooms помещений с таблицей 02_Resources/LoadRules.csv
+(loadplan.rules) и завершается ошибкой, если это дольше RULES_BUDGET
+или результат расходится с перебором правил без запоминания. Сценарий layout/pack раскладывает на листы
+A1 планы --layout-levels уровней разного размера (loadplan.layout) и
+проверяет, что прямоугольники не пересекаются. Сценарии raster/* растрируют
+--raster-sheets PDF-заменителей листов A1 (revitfake.printing) с
+--raster-dpi последовательно и в пуле из --raster-workers процессов
+(loadplan.export). Сценарии startup/* замеряют накладные расходы
+запуска узлов Dynamo (повторные запуски скриптов 1 и 6 на модели из одного
+помещения): холодный импорт пакета, узел со встроенным текстом скрипта и
+узел-загрузчик .dyn (см. loadplan.runner).
+
+Код возврата 1, если сценарий завершился ошибкой, превысил пределы
+счетчиков или есть регрессия относительно --baseline.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from revitfake import install, run_dyn, run_script  # noqa: E402
+from revitfake.harness import PYTHON_SOURCE, apply_settings, run_code  # noqa: E402
+from revitfake.model import ROOM_TYPES, build_linked_model, build_model  # noqa: E402
+
+
+class Scenario(object):
+    """Сценарий: подготовка модели и запуски скрипта"""
+
+    def __init__(self, name, script, IN=None, settings=None, prepare=(), model_options=None,
+                 builder=None, limits=None, budget=None):
+        self.name = name
+        self.script = script
+        self.IN = IN
+        self.settings = settings or {}
+        self.prepare = prepare          # [(скрипт, IN, настройки)] - до замера
+        self.model_options = model_options or {}
+        self.builder = builder          # функция(параметры) -> модель; None - build_model
+        self.limits = limits or {}      # {счетчик stats: наибольшее допустимое значение}
+        self.budget = budget            # бюджет времени на уровень модели, с; None - без бюджета
+
+    def build(self, options):
+        model_options = dict(options)
+        model_options.update(self.model_options)
+        if self.builder is not None:
+            return self.builder(model_options)
+        return build_model(**model_options)
+
+
+def _linked(options):
+    return build_linked_model(levels=options["levels"], rooms=options["rooms"], unmatched=2)
+
+
+# Бюджет пакетной генерации видов: секунд на уровень (вид, лист, легенда,
+# спецификация); на имитации уходит около 1.5 мс, запас - на шумные машины
+VIEWS_BUDGET = 0.005
+
+
+def scenarios(workdir):
+    """Сценарии по фазам скриптов"""
+    export_path = os.path.join(workdir, "loads.csv")
+    xlsx_path = os.path.join(workdir, "loads.xlsx")
+    views_settings = {"FINGERPRINT_FILE": os.path.join(workdir, "model.loadplan.json")}
+    views_prepare = ("02_create_views.py", [""], views_settings)
+    export_settings = {"EXPORT_FOLDER": os.path.join(workdir, "sheets"), "DPI": 0}
+    return [
+        Scenario("01_setup/create", "01_setup_params.py",
+                 limits={"transactions": 1, "collector_scans": 3, "binding_scans": 2}),
+        Scenario("01_setup/rerun", "01_setup_params.py",
+                 prepare=[("01_setup_params.py", None, None)],
+                 limits={"transactions": 1, "collector_scans": 2, "binding_scans": 1,
+                         "binding_writes": 0, "schedules_created": 0, "deletes": 0,
+                         "elements_created": 0}),
+        Scenario("02_views/active", "02_create_views.py", settings=views_settings,
+                 model_options={"load_schedule": True},
+                 limits={"transactions": 1, "collector_scans": 5, "regenerations": 1}),
+        Scenario("02_views/batch", "02_create_views.py", IN=[""], settings=views_settings,
+                 model_options={"load_schedule": True},
+                 limits={"transactions": 1, "collector_scans": 5, "regenerations": 1},
+                 budget=VIEWS_BUDGET),
+        Scenario("02_views/packed", "02_create_views.py", IN=[""],
+                 settings=dict(views_settings, PLANS_PER_SHEET=0),
+                 model_options={"load_schedule": True},
+                 limits={"transactions": 1, "collector_scans": 5, "regenerations": 1},
+                 budget=VIEWS_BUDGET),
+        Scenario("02_views/update_rerun", "02_create_views.py", IN=[""], settings=views_settings,
+                 model_options={"load_schedule": True},
+                 prepare=[("02_create_views.py", [""], views_settings)],
+                 limits={"transactions": 1, "collector_scans": 4, "elements_created": 0}),
+        Scenario("03_assign/apply", "03_assign_loads.py",
+                 limits={"transactions": 1, "collector_scans": 2}),
+        Scenario("03_assign/rerun", "03_assign_loads.py",
+                 prepare=[("03_assign_loads.py", None, None)],
+                 limits={"transactions": 0, "collector_scans": 1, "parameter_sets": 0}),
+        Scenario("04_exchange/export_csv", "04_exchange_loads.py", IN=[export_path],
+                 limits={"transactions": 0, "collector_scans": 2}),
+        Scenario("04_exchange/export_xlsx", "04_exchange_loads.py", IN=[xlsx_path],
+                 limits={"transactions": 0, "collector_scans": 2}),
+        Scenario("04_exchange/import_noop", "04_exchange_loads.py", IN=[export_path],
+                 settings={"MODE": "import"},
+                 prepare=[("04_exchange_loads.py", [export_path], None)],
+                 limits={"transactions": 0, "collector_scans": 1, "parameter_sets": 0}),
+        Scenario("05_transfer/apply", "05_transfer_loads.py", builder=_linked,
+                 limits={"transactions": 1, "collector_scans": 3}),
+        Scenario("05_transfer/rerun", "05_transfer_loads.py", builder=_linked,
+                 prepare=[("05_transfer_loads.py", None, None)],
+                 limits={"transactions": 0, "collector_scans": 2, "parameter_sets": 0}),
+        Scenario("06_qc/full", "06_check_loads.py",
+                 limits={"transactions": 1, "collector_scans": 3}),
+        Scenario("06_qc/rerun", "06_check_loads.py",
+                 prepare=[("06_check_loads.py", None, None), ("06_check_loads.py", None, None)],
+                 limits={"transactions": 0, "collector_scans": 0, "override_writes": 0}),
+        Scenario("07_export/pdf", "07_export_sheets.py", settings=dict(export_settings, FORCE=True),
+                 model_options={"load_schedule": True}, prepare=[views_prepare],
+                 limits={"transactions": 0, "collector_scans": 3, "pdf_exports": 1}),
+        Scenario("07_export/rerun", "07_export_sheets.py", settings=export_settings,
+                 model_options={"load_schedule": True},
+                 prepare=[views_prepare, ("07_export_sheets.py", None, export_settings)],
+                 limits={"transactions": 0, "collector_scans": 2, "pdf_exports": 0}),
+    ]
+
+
+def _status(out):
+    if isinstance(out, dict):
+        return out.get("status", "ok")
+    return "ok"
+
+
+def run_scenario(scenario, options, repeat):
+    """Лучшее время из repeat запусков и счетчики лучшего запуска.
+
+    Статус error, если транзакция осталась открытой после запуска (harness
+    фиксирует ее, как Dynamo по завершении графа).
+    """
+    best = None
+    for _ in range(repeat):
+        model = scenario.build(options)
+        install(model.backend, model.doc)
+        for script, IN, settings in scenario.prepare:
+            run_script(script, IN, settings)
+        model.doc.reset_stats()
+
+        start = time.perf_counter()
+        out = run_script(scenario.script, scenario.IN, scenario.settings)
+        elapsed = time.perf_counter() - start
+
+        status = _status(out)
+        if model.doc._open_transactions:
+            status = "error"
+        if best is None or elapsed < best["seconds"]:
+            best = {"seconds": elapsed, "status": status,
+                    "stats": {k: v for k, v in model.doc.stats.items() if v},
+                    "timings": out.get("timings", {}) if isinstance(out, dict) else {}}
+    return best
+
+
+def _floor_footprints(spatial, rooms, seed=0):
+    """Этаж из rooms прямоугольных помещений разного размера (сетка улиц)"""
+    rng = random.Random(seed)
+    footprints = []
+    columns = max(1, int(rooms ** 0.5))
+    for j in range(rooms):
+        x, y = (j % columns) * 30.0, (j // columns) * 30.0
+        w, h = rng.uniform(10, 30), rng.uniform(10, 30)
+        loops = [[(x, y), (x + w, y), (x + w, y + h), (x, y + h)]]
+        footprints.append(spatial.Footprint(j, loops, 400.0))
+    return footprints
+
+
+def bench_spatial(rooms):
+    """Сетка против полного перебора: время и совпадение результатов"""
+    if PYTHON_SOURCE not in sys.path:
+        sys.path.append(PYTHON_SOURCE)
+    from loadplan import spatial
+    footprints = _floor_footprints(spatial, rooms)
+    points = [((f.min_x + f.max_x) / 2, (f.min_y + f.max_y) / 2) for f in footprints]
+
+    start = time.perf_counter()
+    index = spatial.LevelIndex((0.0, f) for f in footprints)
+    grid_hits = [[f.key for f in index.query(0.0, x, y)] for x, y in points]
+    grid_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    brute_hits = [[f.key for f in spatial.brute_force_query(footprints, x, y)] for x, y in points]
+    brute_seconds = time.perf_counter() - start
+
+    status = "success" if grid_hits == brute_hits else "error"
+    return {
+        "spatial/grid": {"seconds": grid_seconds, "status": status, "stats": {}},
+        "spatial/brute_force": {"seconds": brute_seconds, "status": status, "stats": {}},
+    }
+
+
+def _room_columns(aggregate, rooms, levels=40, seed=0):
+    """Столбцы rooms помещений на levels уровнях (как после extract_columns)"""
+    rng = random.Random(seed)
+    columns = aggregate.LoadColumns()
+    columns.level_names = ["Этаж {:02d}".format(i + 1) for i in range(levels)]
+    columns.level_elevations = [i * 12.0 for i in range(levels)]
+    columns.department_names = sorted({department for _, department, _ in ROOM_TYPES})
+    for j in range(rooms):
+        _, department, load = ROOM_TYPES[rng.randrange(len(ROOM_TYPES))]
+        columns.level_codes.append(j % levels)
+        columns.department_codes.append(columns.department_names.index(department))
+        columns.areas.append(rng.uniform(5.0, 80.0))
+        columns.loads.append(float("nan") if load is None else load)
+    return columns
+
+
+def bench_aggregate(rooms):
+    """Сводка нагрузок: NumPy против чистого Python, итоги должны совпасть"""
+    if PYTHON_SOURCE not in sys.path:
+        sys.path.append(PYTHON_SOURCE)
+    from loadplan import aggregate
+    columns = _room_columns(aggregate, rooms)
+    numpy_module = aggregate.np
+    results = {}
+    summaries = {}
+    for name, module in (("aggregate/numpy", numpy_module), ("aggregate/python", None)):
+        if name == "aggregate/numpy" and module is None:
+            continue  # NumPy не установлен
+        aggregate.np = module
+        try:
+            start = time.perf_counter()
+            summaries[name] = aggregate.summary_rows(aggregate.LoadSummary(columns))
+            results[name] = {"seconds": time.perf_counter() - start, "status": "success", "stats": {}}
+        finally:
+            aggregate.np = numpy_module
+    if len(set(map(tuple, summaries.values()))) > 1:
+        for result in results.values():
+            result["status"] = "error"
+    return results
+
+
+RULES_PATH = os.path.normpath(os.path.join(PYTHON_SOURCE, "..", "..", "02_Resources", "LoadRules.csv"))
+RULES_BUDGET = 1.0  # с на сопоставление --rules-rooms помещений
+
+
+def bench_rules(rooms, levels=40, seed=0):
+    """Нагрузки по таблице правил для rooms помещений: бюджет и сверка с перебором"""
+    if PYTHON_SOURCE not in sys.path:
+        sys.path.append(PYTHON_SOURCE)
+    from loadplan import rules
+    rng = random.Random(seed)
+    records = []
+    for j in range(rooms):
+        name, department, load = ROOM_TYPES[rng.randrange(len(ROOM_TYPES))]
+        if rng.random() < 0.3:
+            name = "{} {}".format(name, rng.randrange(1, 200))  # "Склад 12", "Офис 3"
+        current = load if load is not None and rng.random() < 0.5 else None
+        records.append((j, name, department, "Этаж {:02d}".format(j % levels + 1), current))
+
+    start = time.perf_counter()
+    table = rules.RuleTable.from_csv(RULES_PATH)
+    report = rules.plan_loads(records, table)
+    seconds = time.perf_counter() - start
+
+    reference = rules.RuleTable(table.rules)
+    status = "success" if seconds <= RULES_BUDGET else "error"
+    for key, load in report.changes:
+        _, name, department, level, _ = records[key]
+        if next((rule.load for rule in reference.rules if rule.matches(name, department, level)), None) != load:
+            status = "error"
+    if report.total != rooms or len(report.changes) + len(report.unmatched) + report.unchanged != rooms:
+        status = "error"
+    return {"rules/classify": {"seconds": seconds, "status": status,
+                               "stats": {"unique_keys": len({record[1:4] for record in records})}}}
+
+
+def bench_layout(levels, seed=0):
+    """Раскладка планов levels уровней со спецификацией на листы A1"""
+    if PYTHON_SOURCE not in sys.path:
+        sys.path.append(PYTHON_SOURCE)
+    from loadplan import layout
+    rng = random.Random(seed)
+    mm = layout.MM
+    frame = layout.SheetFrame(0.0, 0.0, 841 * mm, 594 * mm)
+    plans = [(i, rng.uniform(150, 420) * mm, rng.uniform(90, 300) * mm) for i in range(levels)]
+    schedule = ("schedule", 250 * mm, 180 * mm)
+
+    start = time.perf_counter()
+    pages = layout.layout_sheets(frame, plans, schedule)
+    seconds = time.perf_counter() - start
+
+    stamp = layout.Placement("stamp", frame.x0 + frame.width - frame.stamp[0], frame.y0, *frame.stamp)
+    status = "success"
+    for page in pages:
+        rects = page.plans + [page.schedule, stamp]
+        for i, a in enumerate(rects):
+            for b in rects[:i]:
+                if (a.x < b.x + b.width - 1e-9 and b.x < a.x + a.width - 1e-9
+                        and a.y < b.y + b.height - 1e-9 and b.y < a.y + a.height - 1e-9):
+                    status = "error"
+    placed = sum(len(page.plans) for page in pages)
+    if placed != levels:
+        status = "error"
+    return {"layout/pack": {"seconds": seconds, "status": status, "stats": {"sheets": len(pages)}}}
+
+
+def bench_raster(sheets, dpi, workers):
+    """Растеризация PDF-заменителей листов A1: подряд и в пуле процессов"""
+    if PYTHON_SOURCE not in sys.path:
+        sys.path.append(PYTHON_SOURCE)
+    from loadplan import export
+    from revitfake.printing import POINTS_PER_FOOT, StandInRasterizer, write_pdf
+    folder = tempfile.mkdtemp(prefix="loadplan-raster-")
+    try:
+        jobs = []
+        for i in range(sheets):
+            pdf = os.path.join(folder, "Н-{}.pdf".format(i + 1))
+            write_pdf(pdf, 841 / 304.8 * POINTS_PER_FOOT, 594 / 304.8 * POINTS_PER_FOOT, "Н-{}".format(i + 1))
+            jobs.append((i, pdf, os.path.splitext(pdf)[0], dpi))
+        results = {}
+        for name, pool_workers in (("raster/serial", 1), ("raster/pool", workers)):
+            start = time.perf_counter()
+            done = export.rasterize_all(jobs, StandInRasterizer(), pool_workers, processes=True)
+            seconds = time.perf_counter() - start
+            ok = len(done) == sheets and all(error is None and len(png) == 1 for png, error in done.values())
+            results[name] = {"seconds": seconds, "status": "success" if ok else "error", "stats": {}}
+        return results
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+# (скрипт, узел .dyn) для startup/*
+STARTUP_SCRIPTS = (("01_setup_params.py", "01_CreateParameters.dyn"),
+                   ("06_check_loads.py", "06_CheckLoads.dyn"))
+
+
+def _purge_loadplan():
+    for name in list(sys.modules):
+        if name == "loadplan" or name.startswith("loadplan."):
+            del sys.modules[name]
+
+
+def bench_startup(repeat):
+    """Запуск узлов: холодный (пакет не загружен), встроенный скрипт, загрузчик"""
+    model = build_model(levels=1, rooms=1, load_schedule=True, bind_load_parameter=True)
+    install(model.backend, model.doc)
+    embedded = []
+    for script, _ in STARTUP_SCRIPTS:
+        with open(os.path.join(PYTHON_SOURCE, script), encoding="utf-8") as f:
+            source = apply_settings(f.read(), {"LIB_PATH": PYTHON_SOURCE})
+        embedded.append((source, "<{}>".format(script)))
+    # Модель приводится к состоянию повторного запуска; скрипт 6 - первым,
+    # пока активен план этажа (скрипт 1 активирует спецификацию)
+    for script, _ in reversed(STARTUP_SCRIPTS):
+        run_script(script)
+
+    def measure(run):
+        best, status = None, "success"
+        for _ in range(repeat):
+            start = time.perf_counter()
+            outs = run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+            if any(_status(out) == "error" for out in outs):
+                status = "error"
+        return {"seconds": best, "status": status, "stats": {}}
+
+    def cold():
+        _purge_loadplan()
+        install(model.backend, model.doc)
+        return [run_dyn(dyn) for _, dyn in STARTUP_SCRIPTS]
+
+    results = {"startup/cold_import": measure(cold)}
+    results["startup/embedded"] = measure(
+        lambda: [run_code(source, path) for source, path in embedded])
+    results["startup/stub"] = measure(lambda: [run_dyn(dyn) for _, dyn in STARTUP_SCRIPTS])
+    return results
+
+
+def check_limits(scenario, result, levels):
+    """Превышения пределов счетчиков и бюджета времени сценария: [описание]"""
+    violations = ["{}: {} > {}".format(key, result["stats"].get(key, 0), limit)
+                  for key, limit in sorted(scenario.limits.items())
+                  if result["stats"].get(key, 0) > limit]
+    if scenario.budget is not None and result["seconds"] > scenario.budget * levels:
+        violations.append("время: {:.3f} > {:.3f} с ({} уровней)".format(
+            result["seconds"], scenario.budget * levels, levels))
+    return violations
+
+
+def compare(results, baseline, tolerance):
+    """Регрессии относительно baseline: [(сценарий, описание)]"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for key, value in result["stats"].items():
+            if value > reference["stats"].get(key, 0):
+                regressions.append((name, "{}: {} -> {}".format(key, reference["stats"].get(key, 0), value)))
+        if result["seconds"] > reference["seconds"] * (1 + tolerance):
+            regressions.append((name, "время: {:.3f} -> {:.3f} с".format(reference["seconds"], result["seconds"])))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", type=int, default=10)
+    parser.add_argument("--rooms", type=int, default=50, help="помещений на уровне")
+    parser.add_argument("--schedules", type=int, default=20, help="посторонних спецификаций")
+    parser.add_argument("--sheets", type=int, default=50, help="посторонних листов")
+    parser.add_argument("--spatial-rooms", type=int, default=5000,
+                        help="помещений на этаже для spatial/* (0 - пропустить)")
+    parser.add_argument("--aggregate-rooms", type=int, default=100000,
+                        help="помещений для aggregate/* (0 - пропустить)")
+    parser.add_argument("--rules-rooms", type=int, default=50000,
+                        help="помещений для rules/classify (0 - пропустить)")
+    parser.add_argument("--layout-levels", type=int, default=60,
+                        help="уровней для layout/pack (0 - пропустить)")
+    parser.add_argument("--raster-sheets", type=int, default=8,
+                        help="листов для raster/* (0 - пропустить)")
+    parser.add_argument("--raster-dpi", type=int, default=40)
+    parser.add_argument("--raster-workers", type=int, default=0, help="процессов (0 - по числу ядер)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--filter", default="", help="подстрока имени сценария")
+    parser.add_argument("--json", help="файл для результатов")
+    parser.add_argument("--baseline", help="результаты для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="допуск по времени (0.5 = +50%%)")
+    args = parser.parse_args(argv)
+
+    options = {"levels": args.levels, "rooms": args.rooms,
+               "schedules": args.schedules, "sheets": args.sheets}
+    workdir = tempfile.mkdtemp(prefix="loadplan-bench-")
+    results = {}
+    violations = []
+    try:
+        for scenario in scenarios(workdir):
+            if args.filter not in scenario.name:
+                continue
+            result = results[scenario.name] = run_scenario(scenario, options, args.repeat)
+            stats = result["stats"]
+            print("{:<28} {:>9.1f} мс  {:<8} транзакций: {}  сканов: {}  создано: {}".format(
+                scenario.name, result["seconds"] * 1000, result["status"],
+                stats.get("transactions", 0), stats.get("collector_scans", 0),
+                stats.get("elements_created", 0)))
+            violations.extend((scenario.name, message) for message in check_limits(scenario, result, args.levels))
+        if args.spatial_rooms and any(args.filter in name for name in ("spatial/grid", "spatial/brute_force")):
+            spatial_results = bench_spatial(args.spatial_rooms)
+            for name, result in spatial_results.items():
+                results[name] = result
+                print("{:<28} {:>9.1f} мс  {:<8} помещений: {}".format(
+                    name, result["seconds"] * 1000, result["status"], args.spatial_rooms))
+        if args.aggregate_rooms and any(args.filter in name for name in ("aggregate/numpy", "aggregate/python")):
+            for name, result in bench_aggregate(args.aggregate_rooms).items():
+                results[name] = result
+                print("{:<28} {:>9.1f} мс  {:<8} помещений: {}".format(
+                    name, result["seconds"] * 1000, result["status"], args.aggregate_rooms))
+        if args.rules_rooms and args.filter in "rules/classify":
+            for name, result in bench_rules(args.rules_rooms).items():
+                results[name] = result
+                print("{:<28} {:>9.1f} мс  {:<8} помещений: {}  сочетаний: {}".format(
+                    name, result["seconds"] * 1000, result["status"], args.rules_rooms,
+                    result["stats"]["unique_keys"]))
+        if args.layout_levels and args.filter in "layout/pack":
+            for name, result in bench_layout(args.layout_levels).items():
+                results[name] = result
+                print("{:<28} {:>9.1f} мс  {:<8} уровней: {}  листов: {}".format(
+                    name, result["seconds"] * 1000, result["status"], args.layout_levels,
+                    result["stats"]["sheets"]))
+        if args.raster_sheets and any(args.filter in name for name in ("raster/serial", "raster/pool")):
+            for name, result in bench_raster(args.raster_sheets, args.raster_dpi,
+                                             args.raster_workers).items():
+                results[name] = result
+                print("{:<28} {:>9.1f} мс  {:<8} листов: {}  dpi: {}".format(
+                    name, result["seconds"] * 1000, result["status"], args.raster_sheets,
+                    args.raster_dpi))
+        if any(args.filter in name for name in ("startup/cold_import", "startup/embedded", "startup/stub")):
+            for name, result in bench_startup(max(args.repeat, 10)).items():
+                results[name] = result
+                print("{:<28} {:>9.1f} мс  {:<8} узлов: {}".format(
+                    name, result["seconds"] * 1000, result["status"], len(STARTUP_SCRIPTS)))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"options": options, "results": results}, f, ensure_ascii=False, indent=2)
+
+    for name, message in violations:
+        print("ПРЕВЫШЕНИЕ {}: {}".format(name, message))
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for name, message in regressions:
+            print("РЕГРЕССИЯ {}: {}".format(name, message))
+        if regressions:
+            return 1
+    failed = [name for name, result in results.items() if result["status"] == "error"]
+    for name in failed:
+        print("ОШИБКА: сценарий {} завершился со статусом error".format(name))
+    return 1 if failed or violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
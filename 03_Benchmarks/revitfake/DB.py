@@ -0,0 +1,1744 @@
+# -*- coding: utf-8 -*-
+"""Имитация Autodesk.Revit.DB: подмножество API, которое использует loadplan.
+
+Документ и элементы живут в памяти. Каждый вызов API, меняющий модель,
+учитывается в FakeDocument.stats, что позволяет сравнивать число обращений
+к Revit между версиями кода.
+"""
+import itertools
+import os
+import uuid
+
+
+# ===================== ПЕРЕЧИСЛЕНИЯ =====================
+class _Enum(object):
+    """Значение перечисления .NET"""
+
+    def __init__(self, type_name, name, value):
+        self.type_name = type_name
+        self.name = name
+        self.value = value
+
+    def __repr__(self):
+        return "{}.{}".format(self.type_name, self.name)
+
+    def ToString(self):
+        return self.name
+
+    def __int__(self):
+        return self.value
+
+
+class _EnumType(object):
+    """Перечисление, значения которого создаются при первом обращении"""
+
+    def __init__(self, name, start=1):
+        self._name = name
+        self._values = {}
+        self._counter = itertools.count(start)
+
+    def __getattr__(self, item):
+        if item.startswith("_"):
+            raise AttributeError(item)
+        value = self._values.get(item)
+        if value is None:
+            value = self._values[item] = _Enum(self._name, item, next(self._counter))
+        return value
+
+
+BuiltInParameter = _EnumType("BuiltInParameter", start=-1000000)
+BuiltInCategory = _EnumType("BuiltInCategory", start=-2000000)
+ViewType = _EnumType("ViewType")
+ViewDuplicateOption = _EnumType("ViewDuplicateOption")
+ScheduleFieldType = _EnumType("ScheduleFieldType")
+ScheduleFieldDisplayType = _EnumType("ScheduleFieldDisplayType")
+HorizontalAlignmentStyle = _EnumType("HorizontalAlignmentStyle")
+SectionType = _EnumType("SectionType")
+ScheduleFilterType = _EnumType("ScheduleFilterType")
+StorageType = _EnumType("StorageType")
+ExportPaperFormat = _EnumType("ExportPaperFormat")
+ZoomType = _EnumType("ZoomType")
+ColorDepthType = _EnumType("ColorDepthType")
+PDFExportQualityType = _EnumType("PDFExportQualityType")
+PaperPlacementType = _EnumType("PaperPlacementType")
+
+
+# ===================== ГЕОМЕТРИЯ =====================
+class XYZ(object):
+    """Точка/вектор"""
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.X = float(x)
+        self.Y = float(y)
+        self.Z = float(z)
+
+    def __eq__(self, other):
+        return isinstance(other, XYZ) and (self.X, self.Y, self.Z) == (other.X, other.Y, other.Z)
+
+    def __hash__(self):
+        return hash((self.X, self.Y, self.Z))
+
+    def __repr__(self):
+        return "XYZ({}, {}, {})".format(self.X, self.Y, self.Z)
+
+    def Add(self, other):
+        return XYZ(self.X + other.X, self.Y + other.Y, self.Z + other.Z)
+
+    def Subtract(self, other):
+        return XYZ(self.X - other.X, self.Y - other.Y, self.Z - other.Z)
+
+
+class UV(object):
+    """Точка на плоскости"""
+
+    def __init__(self, u=0.0, v=0.0):
+        self.U = float(u)
+        self.V = float(v)
+
+
+class Outline(object):
+    """Прямоугольник листа (Min/Max)"""
+
+    def __init__(self, min_pt, max_pt):
+        self.Min = min_pt
+        self.Max = max_pt
+
+
+class Transform(object):
+    """Перенос (поворот связей не имитируется)"""
+
+    def __init__(self, origin=None):
+        self.Origin = origin or XYZ()
+
+    @staticmethod
+    def CreateTranslation(vector):
+        return Transform(vector)
+
+    def OfPoint(self, point):
+        return point.Add(self.Origin)
+
+
+Transform.Identity = Transform()
+
+
+class BoundingBoxXYZ(object):
+    """Габарит (подрезка вида); Min/Max - в системе координат Transform"""
+
+    def __init__(self, min_pt=None, max_pt=None, transform=None):
+        self.Min = min_pt or XYZ()
+        self.Max = max_pt or XYZ()
+        self.Transform = transform or Transform.Identity
+
+
+# ===================== ИДЕНТИФИКАТОРЫ =====================
+class ElementId(object):
+    """Идентификатор элемента"""
+
+    def __init__(self, value):
+        if isinstance(value, _Enum):
+            value = value.value
+        self.IntegerValue = int(value)
+        self.Value = self.IntegerValue
+
+    def __eq__(self, other):
+        return isinstance(other, ElementId) and other.IntegerValue == self.IntegerValue
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.IntegerValue)
+
+    def __repr__(self):
+        return "ElementId({})".format(self.IntegerValue)
+
+    def ToString(self):
+        return str(self.IntegerValue)
+
+    @staticmethod
+    def _invalid():
+        return ElementId(-1)
+
+
+ElementId.InvalidElementId = ElementId(-1)
+
+
+class Guid(object):
+    """System.Guid"""
+
+    def __init__(self, value):
+        self._value = str(value).lower()
+
+    def ToString(self):
+        return self._value
+
+    def __eq__(self, other):
+        return isinstance(other, Guid) and other._value == self._value
+
+    def __hash__(self):
+        return hash(self._value)
+
+    def __repr__(self):
+        return "Guid({})".format(self._value)
+
+
+# ===================== ПАРАМЕТРЫ =====================
+class Definition(object):
+    """Определение параметра"""
+
+    def __init__(self, name):
+        self.Name = name
+
+
+class ExternalDefinition(Definition):
+    """Определение из файла общих параметров"""
+
+    def __init__(self, name, guid=None):
+        Definition.__init__(self, name)
+        self.GUID = Guid(guid or uuid.uuid4())
+
+
+class InternalDefinition(Definition):
+    """Определение параметра проекта (ключ doc.ParameterBindings)"""
+
+    def __init__(self, name, element_id):
+        Definition.__init__(self, name)
+        self.Id = element_id
+
+
+class Parameter(object):
+    """Значение параметра элемента"""
+
+    def __init__(self, element, key, value=None, read_only=False, definition=None):
+        self._element = element
+        self._key = key
+        self._value = value
+        self.IsReadOnly = read_only
+        self.Definition = definition
+        guid = getattr(definition, "GUID", None)
+        self.IsShared = guid is not None
+        if guid is not None:
+            self.GUID = guid
+
+    @property
+    def HasValue(self):
+        return self._value is not None
+
+    @property
+    def StorageType(self):
+        if isinstance(self._value, ElementId):
+            return StorageType.ElementId
+        if isinstance(self._value, str):
+            return StorageType.String
+        if isinstance(self._value, int) and not isinstance(self._value, bool):
+            return StorageType.Integer
+        return StorageType.Double
+
+    def Set(self, value):
+        if self.IsReadOnly:
+            raise InvalidOperationException("Параметр только для чтения")
+        doc = self._element.Document
+        doc._require_transaction("Parameter.Set")
+        doc.stats["parameter_sets"] += 1
+        doc._journal_change(self._element)
+        self._value = value
+        return True
+
+    def AsDouble(self):
+        return float(self._value) if self._value is not None else 0.0
+
+    def AsInteger(self):
+        return int(self._value) if self._value is not None else 0
+
+    def AsString(self):
+        return None if self._value is None else str(self._value)
+
+    def AsValueString(self):
+        return self.AsString()
+
+    def AsElementId(self):
+        return self._value if isinstance(self._value, ElementId) else ElementId.InvalidElementId
+
+
+# ===================== ИСКЛЮЧЕНИЯ =====================
+class ArgumentException(Exception):
+    """System.ArgumentException"""
+
+
+class InvalidOperationException(Exception):
+    """Autodesk.Revit.Exceptions.InvalidOperationException"""
+
+
+# ===================== ЭЛЕМЕНТЫ =====================
+class Category(object):
+    """Категория модели"""
+
+    def __init__(self, bic, name, allows_schedules=True):
+        self.Id = ElementId(bic)
+        self.BuiltInCategory = bic
+        self.Name = name
+        self.AllowsBoundParameters = True
+        self._allows_schedules = allows_schedules
+
+    @staticmethod
+    def GetCategory(doc, bic):
+        return doc._category(bic)
+
+
+class Element(object):
+    """Базовый элемент модели"""
+
+    _category_bic = None
+
+    def __init__(self, doc, name=""):
+        self.Document = doc
+        self.Id = doc._new_id()
+        self.UniqueId = str(uuid.uuid4())
+        self._name = name
+        self._params = {}
+        self.Category = doc._category(self._category_bic) if self._category_bic else None
+        doc._add(self)
+
+    # --- имя ---
+    @property
+    def Name(self):
+        return self._name
+
+    @Name.setter
+    def Name(self, value):
+        self.Document._require_transaction("Name")
+        self._check_name(value)
+        self.Document._journal_change(self)
+        self._name = value
+
+    def _check_name(self, value):
+        pass
+
+    # --- параметры ---
+    def _param(self, key, value=None, read_only=False, definition=None):
+        param = Parameter(self, key, value, read_only, definition)
+        self._params[key] = param
+        return param
+
+    def get_Parameter(self, key):
+        if isinstance(key, Definition):
+            return self.LookupParameter(key.Name)
+        if isinstance(key, Guid):
+            for param in self._params.values():
+                if getattr(param, "GUID", None) == key:
+                    return param
+            return None
+        return self._params.get(key)
+
+    def LookupParameter(self, name):
+        for key, param in self._params.items():
+            if isinstance(key, str) and key == name:
+                return param
+            if param.Definition is not None and param.Definition.Name == name:
+                return param
+        return None
+
+    @property
+    def Parameters(self):
+        return list(self._params.values())
+
+    def GetTypeId(self):
+        return getattr(self, "_type_id", ElementId.InvalidElementId)
+
+    def __repr__(self):
+        return "<{} {} '{}'>".format(type(self).__name__, self.Id.IntegerValue, self._name)
+
+
+class ElementType(Element):
+    """Типоразмер"""
+
+
+class FamilySymbol(ElementType):
+    """Типоразмер семейства (основная надпись)"""
+
+    def __init__(self, doc, name, category_bic, width=2.76, height=1.38, family_name="Основная надпись"):
+        self._category_bic = category_bic
+        Element.__init__(self, doc, name)
+        self.FamilyName = family_name
+        # Размер рамки листа, футы (A1 по умолчанию)
+        self.SheetWidth = width
+        self.SheetHeight = height
+
+
+class Level(Element):
+    """Уровень"""
+
+    def __init__(self, doc, name, elevation):
+        Element.__init__(self, doc, name)
+        self.Elevation = float(elevation)
+
+
+class Location(object):
+    """Базовый класс положения"""
+
+
+class LocationPoint(Location):
+    """Точка вставки"""
+
+    def __init__(self, point):
+        self.Point = point
+
+
+class BoundarySegment(object):
+    """Сегмент границы помещения"""
+
+    def __init__(self, start, end):
+        self._curve = Line.CreateBound(start, end)
+
+    def GetCurve(self):
+        return self._curve
+
+
+class Line(object):
+    """Отрезок"""
+
+    def __init__(self, start, end):
+        self._start = start
+        self._end = end
+
+    @staticmethod
+    def CreateBound(start, end):
+        return Line(start, end)
+
+    def GetEndPoint(self, index):
+        return self._start if index == 0 else self._end
+
+    def Tessellate(self):
+        return [self._start, self._end]
+
+
+class SpatialElementBoundaryOptions(object):
+    """Параметры получения границ"""
+
+
+class SpatialElement(Element):
+    """Помещение/пространство/зона"""
+
+    def __init__(self, doc, level, number, name, area=0.0, boundary=None, department=""):
+        Element.__init__(self, doc, name)
+        self.Level = level
+        self.LevelId = level.Id if level is not None else ElementId.InvalidElementId
+        self._boundary = boundary or []
+        self._param(BuiltInParameter.ROOM_NUMBER, number)
+        self._param(BuiltInParameter.ROOM_NAME, name)
+        self._param(BuiltInParameter.ROOM_DEPARTMENT, department)
+        self._param(BuiltInParameter.ROOM_AREA, float(area), read_only=True)
+        self._param(BuiltInParameter.ROOM_LEVEL_ID, self.LevelId, read_only=True)
+        if self._boundary:
+            xs = [p.X for p in self._boundary]
+            ys = [p.Y for p in self._boundary]
+            self.Location = LocationPoint(XYZ(sum(xs) / len(xs), sum(ys) / len(ys),
+                                              level.Elevation if level is not None else 0.0))
+        else:
+            self.Location = None
+
+    @property
+    def Number(self):
+        return self._params[BuiltInParameter.ROOM_NUMBER].AsString()
+
+    @property
+    def Area(self):
+        return self._params[BuiltInParameter.ROOM_AREA].AsDouble()
+
+    @property
+    def Name(self):
+        return self._params[BuiltInParameter.ROOM_NAME].AsString()
+
+    @Name.setter
+    def Name(self, value):
+        self._params[BuiltInParameter.ROOM_NAME].Set(value)
+
+    @property
+    def Perimeter(self):
+        pts = self._boundary
+        return sum(((pts[i].X - pts[i - 1].X) ** 2 + (pts[i].Y - pts[i - 1].Y) ** 2) ** 0.5
+                   for i in range(len(pts)))
+
+    def GetBoundarySegments(self, options):
+        pts = self._boundary
+        if not pts:
+            return []
+        loop = [BoundarySegment(pts[i], pts[(i + 1) % len(pts)]) for i in range(len(pts))]
+        return [loop]
+
+    def IsPointInRoom(self, point):
+        return _point_in_polygon(point.X, point.Y, self._boundary)
+
+
+def _point_in_polygon(x, y, pts):
+    inside = False
+    n = len(pts)
+    j = n - 1
+    for i in range(n):
+        xi, yi = pts[i].X, pts[i].Y
+        xj, yj = pts[j].X, pts[j].Y
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+class Room(SpatialElement):
+    """Помещение"""
+    _category_bic = BuiltInCategory.OST_Rooms
+
+
+class Space(SpatialElement):
+    """Пространство (MEP)"""
+    _category_bic = BuiltInCategory.OST_MEPSpaces
+
+
+class AreaScheme(Element):
+    """Схема зонирования"""
+
+
+class Area(SpatialElement):
+    """Зона"""
+    _category_bic = BuiltInCategory.OST_Areas
+
+
+class RevitLinkInstance(Element):
+    """Экземпляр связанной модели"""
+
+    def __init__(self, doc, name, link_doc, transform=None):
+        Element.__init__(self, doc, name)
+        self._link_doc = link_doc
+        self._transform = transform or Transform.Identity
+
+    def GetLinkDocument(self):
+        return self._link_doc
+
+    def GetTotalTransform(self):
+        return self._transform
+
+
+# ===================== ВИДЫ =====================
+class View(Element):
+    """Вид"""
+
+    view_type = None
+
+    def __init__(self, doc, name, scale=100):
+        Element.__init__(self, doc, name)
+        self.ViewType = self.view_type
+        self.IsTemplate = False
+        self.Scale = scale
+        self.CropBox = BoundingBoxXYZ()
+        self.CropBoxActive = False
+        self._color_schemes = {}
+        self._overrides = {}
+
+    def GetElementOverrides(self, element_id):
+        return self._overrides.get(element_id.IntegerValue, OverrideGraphicSettings())
+
+    def SetElementOverrides(self, element_id, overrides):
+        self.Document._require_transaction("View.SetElementOverrides")
+        self.Document.stats["override_writes"] += 1
+        self.Document._journal_change(self)
+        self._overrides = dict(self._overrides)
+        self._overrides[element_id.IntegerValue] = overrides
+
+    def GetColorFillSchemeId(self, category_id):
+        return self._color_schemes.get(category_id, ElementId.InvalidElementId)
+
+    def SetColorFillSchemeId(self, category_id, scheme_id):
+        self.Document._require_transaction("View.SetColorFillSchemeId")
+        self.Document._journal_change(self)
+        self._color_schemes = dict(self._color_schemes)
+        self._color_schemes[category_id] = scheme_id
+
+    def _check_name(self, value):
+        for other in self.Document._elements.values():
+            if other is not self and isinstance(other, View) \
+                    and not isinstance(other, ViewSheet) and other.ViewType == self.ViewType \
+                    and other._name == value:
+                raise ArgumentException("Имя вида уже используется: " + value)
+
+
+class ViewPlan(View):
+    """План этажа"""
+
+    view_type = ViewType.FloorPlan
+
+    def __init__(self, doc, name, level=None, scale=100):
+        View.__init__(self, doc, name, scale)
+        self.GenLevel = level
+        self._param(BuiltInParameter.VIEW_ROOMS, 0)
+        self._param(BuiltInParameter.VIEWER_ZONE_COLOR_FILL, 0)
+        self._param(BuiltInParameter.VIEWER_COLOR_SCHEME_LOCATION, 0)
+        self._param(BuiltInParameter.VIEW_COLOR_SCHEME_PARAMETER, ElementId.InvalidElementId)
+
+    def Duplicate(self, option):
+        doc = self.Document
+        doc._require_transaction("View.Duplicate")
+        doc.stats["duplicates"] += 1
+        name = self._name
+        copy_no = 1
+        names = {v._name for v in doc._elements.values() if isinstance(v, ViewPlan)}
+        while "{} Копия {}".format(name, copy_no) in names:
+            copy_no += 1
+        new_view = ViewPlan(doc, "{} Копия {}".format(name, copy_no), self.GenLevel, self.Scale)
+        new_view.CropBox = BoundingBoxXYZ(self.CropBox.Min, self.CropBox.Max, self.CropBox.Transform)
+        new_view.CropBoxActive = self.CropBoxActive
+        return new_view.Id
+
+
+class ViewSheet(View):
+    """Лист"""
+
+    view_type = ViewType.DrawingSheet
+
+    def __init__(self, doc, title_block, number):
+        View.__init__(self, doc, "Без имени", scale=1)
+        self._number = number
+        self.TitleBlockId = title_block.Id
+        width = getattr(title_block, "SheetWidth", 2.76)
+        height = getattr(title_block, "SheetHeight", 1.38)
+        self.Outline = Outline(UV(0, 0), UV(width, height))
+        self._param(BuiltInParameter.SHEET_NUMBER, number)
+
+    def _check_name(self, value):
+        pass
+
+    @property
+    def SheetNumber(self):
+        return self._number
+
+    @SheetNumber.setter
+    def SheetNumber(self, value):
+        doc = self.Document
+        doc._require_transaction("SheetNumber")
+        for other in doc._elements.values():
+            if other is not self and isinstance(other, ViewSheet) and other._number == value:
+                raise ArgumentException("Номер листа уже используется: " + value)
+        doc._journal_change(self)
+        self._number = value
+
+    @staticmethod
+    def Create(doc, title_block_id):
+        doc._require_transaction("ViewSheet.Create")
+        doc.stats["sheets_created"] += 1
+        title_block = doc.GetElement(title_block_id)
+        number = "A{}".format(doc._next_sheet_no())
+        return ViewSheet(doc, title_block, number)
+
+    def GetAllPlacedViews(self):
+        return [vp.ViewId for vp in self.Document._elements.values()
+                if isinstance(vp, Viewport) and vp.SheetId == self.Id]
+
+    def GetAllViewports(self):
+        return [vp.Id for vp in self.Document._elements.values()
+                if isinstance(vp, Viewport) and vp.SheetId == self.Id]
+
+
+class Viewport(Element):
+    """Видовой экран на листе"""
+
+    def __init__(self, doc, sheet_id, view_id, point):
+        Element.__init__(self, doc, "")
+        self.SheetId = sheet_id
+        self.ViewId = view_id
+        self._center = point
+        self.LabelOffset = XYZ()
+
+    @staticmethod
+    def CanAddViewToSheet(doc, sheet_id, view_id):
+        for vp in doc._elements.values():
+            if isinstance(vp, Viewport) and vp.ViewId == view_id:
+                return False
+        return isinstance(doc.GetElement(view_id), ViewPlan)
+
+    @staticmethod
+    def Create(doc, sheet_id, view_id, point):
+        doc._require_transaction("Viewport.Create")
+        if not Viewport.CanAddViewToSheet(doc, sheet_id, view_id):
+            raise ArgumentException("Вид нельзя разместить на листе")
+        doc.stats["viewports_created"] += 1
+        return Viewport(doc, sheet_id, view_id, point)
+
+    def GetBoxCenter(self):
+        return self._center
+
+    def SetBoxCenter(self, point):
+        self.Document._journal_change(self)
+        self._center = point
+
+    def ChangeLabelOffset(self, offset):
+        self.LabelOffset = offset
+
+
+class ScheduleSheetInstance(Element):
+    """Спецификация, размещенная на листе"""
+
+    def __init__(self, doc, sheet_id, schedule_id, point):
+        Element.__init__(self, doc, "")
+        self.OwnerViewId = sheet_id
+        self.ScheduleId = schedule_id
+        self.Point = point
+
+    @staticmethod
+    def Create(doc, sheet_id, schedule_id, point):
+        doc._require_transaction("ScheduleSheetInstance.Create")
+        if not isinstance(doc.GetElement(schedule_id), ViewSchedule):
+            raise ArgumentException("Элемент не является спецификацией")
+        doc.stats["schedule_instances_created"] += 1
+        return ScheduleSheetInstance(doc, sheet_id, schedule_id, point)
+
+
+# ===================== ЦВЕТОВЫЕ СХЕМЫ =====================
+class Color(object):
+    """Цвет RGB"""
+
+    def __init__(self, red, green, blue):
+        self.Red = red
+        self.Green = green
+        self.Blue = blue
+        self.IsValid = True
+
+
+class FillPattern(object):
+    """Штриховка"""
+
+    def __init__(self, name, solid=False):
+        self.Name = name
+        self.IsSolidFill = solid
+
+
+class FillPatternElement(Element):
+    """Элемент штриховки"""
+
+    def __init__(self, doc, name, solid=False):
+        Element.__init__(self, doc, name)
+        self._pattern = FillPattern(name, solid)
+
+    def GetFillPattern(self):
+        return self._pattern
+
+
+class OverrideGraphicSettings(object):
+    """Переопределение графики элемента на виде"""
+
+    def __init__(self):
+        self.SurfaceForegroundPatternId = ElementId.InvalidElementId
+        self.SurfaceForegroundPatternColor = None
+        self.ProjectionLineColor = None
+
+    def SetSurfaceForegroundPatternId(self, pattern_id):
+        self.SurfaceForegroundPatternId = pattern_id
+        return self
+
+    def SetSurfaceForegroundPatternColor(self, color):
+        self.SurfaceForegroundPatternColor = color
+        return self
+
+    def SetProjectionLineColor(self, color):
+        self.ProjectionLineColor = color
+        return self
+
+
+class ColorFillSchemeEntry(object):
+    """Запись цветовой схемы"""
+
+    def __init__(self, storage_type):
+        self.StorageType = storage_type
+        self.Color = Color(0, 0, 0)
+        self.FillPatternId = ElementId.InvalidElementId
+        self.IsInUse = False
+        self.IsVisible = True
+        self.Caption = ""
+        self._value = None
+
+    def GetDoubleValue(self):
+        return self._value
+
+    def SetDoubleValue(self, value):
+        self._value = value
+
+    def _copy(self):
+        entry = ColorFillSchemeEntry(self.StorageType)
+        entry.__dict__.update(self.__dict__)
+        return entry
+
+
+class ColorFillScheme(Element):
+    """Цветовая схема категории"""
+
+    def __init__(self, doc, name, category_id):
+        Element.__init__(self, doc, name)
+        self.CategoryId = category_id
+        self.Title = name
+        self.ParameterDefinition = ElementId.InvalidElementId
+        self.IsByRange = False
+        self._entries = []
+
+    def Duplicate(self, name):
+        self.Document._require_transaction("ColorFillScheme.Duplicate")
+        return ColorFillScheme(self.Document, name, self.CategoryId).Id
+
+    def __setattr__(self, key, value):
+        if key in ("ParameterDefinition", "IsByRange", "Title") and key in self.__dict__:
+            self.Document._require_transaction("ColorFillScheme." + key)
+            self.Document._journal_change(self)
+            if key != "Title" and self.__dict__[key] != value:
+                object.__setattr__(self, "_entries", [])
+        object.__setattr__(self, key, value)
+
+    def GetEntries(self):
+        return [entry._copy() for entry in self._entries]
+
+    def _write(self, entries):
+        self.Document._require_transaction("ColorFillScheme entries")
+        self.Document._journal_change(self)
+        self.Document.stats["scheme_entry_writes"] += 1
+        object.__setattr__(self, "_entries", entries)
+
+    def AddEntry(self, entry):
+        if any(e._value == entry._value for e in self._entries):
+            raise ArgumentException("Запись уже существует")
+        self._write(self._entries + [entry._copy()])
+
+    def UpdateEntry(self, entry):
+        self._write([entry._copy() if e._value == entry._value else e for e in self._entries])
+
+    def RemoveEntry(self, entry):
+        self._write([e for e in self._entries if e._value != entry._value])
+
+
+class ColorFillLegend(Element):
+    """Легенда цветовой схемы на виде"""
+
+    def __init__(self, doc, view_id, category_id, origin):
+        Element.__init__(self, doc, "")
+        self.OwnerViewId = view_id
+        self.CategoryId = category_id
+        self.Origin = origin
+
+    @staticmethod
+    def Create(doc, view_id, category_id, origin):
+        doc._require_transaction("ColorFillLegend.Create")
+        view = doc.GetElement(view_id)
+        if view.GetColorFillSchemeId(category_id) == ElementId.InvalidElementId:
+            raise ArgumentException("У вида нет цветовой схемы для категории")
+        doc.stats["legends_created"] += 1
+        return ColorFillLegend(doc, view_id, category_id, origin)
+
+
+# ===================== СПЕЦИФИКАЦИИ =====================
+class ScheduleFieldId(object):
+    """Идентификатор поля спецификации"""
+
+    def __init__(self, value):
+        self.IntegerValue = value
+
+    def __eq__(self, other):
+        return isinstance(other, ScheduleFieldId) and other.IntegerValue == self.IntegerValue
+
+    def __hash__(self):
+        return hash(self.IntegerValue)
+
+
+class ScheduleField(object):
+    """Поле спецификации; запись свойств учитывается в stats"""
+
+    _tracked = ("ColumnHeading", "Width", "DisplayType", "HorizontalAlignment",
+                "Formula", "IsHidden")
+
+    def __init__(self, definition, field_id, field_type, parameter_id, name):
+        object.__setattr__(self, "_definition", definition)
+        object.__setattr__(self, "FieldId", field_id)
+        object.__setattr__(self, "FieldType", field_type)
+        object.__setattr__(self, "ParameterId", parameter_id)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "ColumnHeading", name)
+        object.__setattr__(self, "Width", 0.0833)
+        object.__setattr__(self, "DisplayType", ScheduleFieldDisplayType.Standard)
+        object.__setattr__(self, "HorizontalAlignment", HorizontalAlignmentStyle.Left)
+        object.__setattr__(self, "Formula", None)
+        object.__setattr__(self, "IsHidden", False)
+        object.__setattr__(self, "IsCalculatedField", field_type == ScheduleFieldType.Formula)
+        object.__setattr__(self, "_format", FormatOptions())
+
+    def __setattr__(self, key, value):
+        if key in self._tracked:
+            doc = self._definition._schedule.Document
+            doc._require_transaction("ScheduleField." + key)
+            doc.stats["field_writes"] += 1
+        object.__setattr__(self, key, value)
+
+    def GetName(self):
+        return self._name
+
+    def GetFormatOptions(self):
+        options = self._format
+        return FormatOptions(options.UseDefault, options.Accuracy)
+
+    def SetFormatOptions(self, options):
+        doc = self._definition._schedule.Document
+        doc._require_transaction("ScheduleField.SetFormatOptions")
+        doc.stats["field_writes"] += 1
+        object.__setattr__(self, "_format", FormatOptions(options.UseDefault, options.Accuracy))
+
+
+class FormatOptions(object):
+    """Формат отображения чисел"""
+
+    def __init__(self, use_default=True, accuracy=0.01):
+        self.UseDefault = use_default
+        self.Accuracy = accuracy
+
+
+class ScheduleDefinition(object):
+    """Определение спецификации"""
+
+    def __init__(self, schedule, category_id):
+        self._schedule = schedule
+        self.CategoryId = category_id
+        self._fields = []
+        self._ids = itertools.count(1)
+        self.ShowTitle = True
+        self.ShowHeaders = True
+        self.ShowGridLines = True
+        self.IsItemized = True
+        self._filters = []
+
+    def _doc(self):
+        return self._schedule.Document
+
+    def GetFieldOrder(self):
+        return [f.FieldId for f in self._fields]
+
+    def GetFieldCount(self):
+        return len(self._fields)
+
+    def GetField(self, key):
+        if isinstance(key, int):
+            return self._fields[key]
+        for field in self._fields:
+            if field.FieldId == key:
+                return field
+        raise ArgumentException("Поле не найдено")
+
+    def GetFieldId(self, index):
+        return self._fields[index].FieldId
+
+    def AddField(self, field_type, parameter_id):
+        doc = self._doc()
+        doc._require_transaction("AddField")
+        doc.stats["field_adds"] += 1
+        name = doc._parameter_name(parameter_id)
+        field = ScheduleField(self, ScheduleFieldId(next(self._ids)), field_type, parameter_id, name)
+        self._fields.append(field)
+        return field
+
+    def AddCalculatedField(self, name):
+        doc = self._doc()
+        doc._require_transaction("AddField")
+        doc.stats["field_adds"] += 1
+        field = ScheduleField(self, ScheduleFieldId(next(self._ids)),
+                              ScheduleFieldType.Formula, ElementId.InvalidElementId, name)
+        self._fields.append(field)
+        return field
+
+    def RemoveField(self, field_id):
+        doc = self._doc()
+        doc._require_transaction("RemoveField")
+        doc.stats["field_removes"] += 1
+        self._fields = [f for f in self._fields if f.FieldId != field_id]
+
+    def SetFieldOrder(self, order):
+        doc = self._doc()
+        doc._require_transaction("SetFieldOrder")
+        doc.stats["field_reorders"] += 1
+        by_id = {f.FieldId: f for f in self._fields}
+        self._fields = [by_id[i] for i in order]
+
+    def Refresh(self):
+        self._doc().stats["schedule_refreshes"] += 1
+
+    def AddFilter(self, schedule_filter):
+        self._doc()._require_transaction("AddFilter")
+        self._filters.append(schedule_filter)
+
+    def GetFilterCount(self):
+        return len(self._filters)
+
+    def GetFilter(self, index):
+        return self._filters[index]
+
+
+class ScheduleFilter(object):
+    """Фильтр спецификации"""
+
+    def __init__(self, field_id, filter_type, value):
+        self.FieldId = field_id
+        self.FilterType = filter_type
+        self.Value = value
+
+
+class TableSectionData(object):
+    """Секция таблицы спецификации"""
+
+    def __init__(self, schedule, rows):
+        self._schedule = schedule
+        self.NumberOfRows = rows
+
+    @property
+    def NumberOfColumns(self):
+        return self._schedule.Definition.GetFieldCount()
+
+    def SetColumnWidth(self, index, width):
+        self._schedule.Document.stats["column_width_writes"] += 1
+
+    def GetColumnWidth(self, index):
+        return self._schedule.Definition.GetField(index).Width
+
+    def GetRowHeight(self, index):
+        return 0.0215
+
+
+class HeaderSectionData(object):
+    """Заголовок спецификации: строка названия и произвольные текстовые ячейки"""
+
+    def __init__(self, schedule):
+        self._schedule = schedule
+        self._cells = [[schedule.Name]]
+
+    @property
+    def NumberOfRows(self):
+        return len(self._cells)
+
+    @property
+    def NumberOfColumns(self):
+        return len(self._cells[0])
+
+    def _write(self, method):
+        doc = self._schedule.Document
+        doc._require_transaction("TableSectionData." + method)
+        doc.stats["header_cell_writes"] += 1
+
+    def InsertRow(self, index):
+        self._write("InsertRow")
+        self._cells.insert(index, [""] * self.NumberOfColumns)
+
+    def RemoveRow(self, index):
+        self._write("RemoveRow")
+        del self._cells[index]
+
+    def InsertColumn(self, index):
+        self._write("InsertColumn")
+        for row in self._cells:
+            row.insert(index, "")
+
+    def GetCellText(self, row, column):
+        return self._cells[row][column]
+
+    def SetCellText(self, row, column, text):
+        self._write("SetCellText")
+        self._cells[row][column] = text
+
+
+class TableData(object):
+    """Таблица спецификации"""
+
+    def __init__(self, schedule):
+        self._schedule = schedule
+
+    def GetSectionData(self, section_type):
+        if section_type == SectionType.Body:
+            rows = len(self._schedule.Document._by_category(self._schedule.Definition.CategoryId))
+            return TableSectionData(self._schedule, rows)
+        if section_type == SectionType.Header:
+            return self._schedule._header
+        return TableSectionData(self._schedule, 1)
+
+
+class ViewSchedule(View):
+    """Спецификация"""
+
+    view_type = ViewType.Schedule
+
+    def __init__(self, doc, category_id):
+        View.__init__(self, doc, "Спецификация", scale=1)
+        self.Definition = ScheduleDefinition(self, category_id)
+        self._header = HeaderSectionData(self)
+
+    @staticmethod
+    def CreateSchedule(doc, category_id, area_scheme_id=None):
+        doc._require_transaction("ViewSchedule.CreateSchedule")
+        doc.stats["schedules_created"] += 1
+        category = doc._category_by_id(category_id)
+        if category is None or not category._allows_schedules:
+            raise ArgumentException("Категория не поддерживает спецификации")
+        if category_id == ElementId(BuiltInCategory.OST_Areas) and area_scheme_id is None:
+            raise ArgumentException("Для спецификации зон нужна схема зонирования")
+        schedule = ViewSchedule(doc, category_id)
+        schedule._name = "Спецификация {}".format(schedule.Id.IntegerValue)
+        return schedule
+
+    @staticmethod
+    def IsValidCategoryForSchedule(category_id):
+        return category_id.IntegerValue in _SCHEDULABLE
+
+    def GetTableData(self):
+        return TableData(self)
+
+
+_SCHEDULABLE = set()
+
+
+# ===================== ПРИВЯЗКИ ПАРАМЕТРОВ =====================
+class CategorySet(object):
+    """Набор категорий привязки"""
+
+    def __init__(self):
+        self._items = []
+
+    def Insert(self, category):
+        if category not in self._items:
+            self._items.append(category)
+        return True
+
+    def Contains(self, category):
+        return category in self._items
+
+    @property
+    def Size(self):
+        return len(self._items)
+
+    @property
+    def IsEmpty(self):
+        return not self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+class ElementBinding(object):
+    """Привязка параметра к категориям"""
+
+    def __init__(self, categories=None):
+        self.Categories = categories or CategorySet()
+
+
+class InstanceBinding(ElementBinding):
+    """Привязка к экземплярам"""
+
+
+class TypeBinding(ElementBinding):
+    """Привязка к типам"""
+
+
+class _BindingIterator(object):
+    """DefinitionBindingMapIterator"""
+
+    def __init__(self, items, stats):
+        self._items = items
+        self._index = -1
+        self._stats = stats
+
+    def MoveNext(self):
+        self._index += 1
+        self._stats["binding_steps"] += 1
+        return self._index < len(self._items)
+
+    def Reset(self):
+        self._index = -1
+
+    @property
+    def Key(self):
+        return self._items[self._index][0]
+
+    @property
+    def Current(self):
+        return self._items[self._index][1]
+
+
+class BindingMap(object):
+    """doc.ParameterBindings; ключи - InternalDefinition"""
+
+    def __init__(self, doc):
+        self._doc = doc
+        self._items = []
+
+    def ForwardIterator(self):
+        self._doc.stats["binding_scans"] += 1
+        return _BindingIterator(list(self._items), self._doc.stats)
+
+    def _find(self, definition):
+        for index, (key, _) in enumerate(self._items):
+            if key is definition or key.Name == definition.Name:
+                return index
+        return -1
+
+    def Contains(self, definition):
+        return self._find(definition) >= 0
+
+    def get_Item(self, definition):
+        index = self._find(definition)
+        return self._items[index][1] if index >= 0 else None
+
+    def Insert(self, definition, binding, group=None):
+        self._doc._require_transaction("ParameterBindings.Insert")
+        if self.Contains(definition):
+            return False
+        self._doc.stats["binding_writes"] += 1
+        self._items.append((self._doc._internal_definition(definition), binding))
+        return True
+
+    def ReInsert(self, definition, binding, group=None):
+        self._doc._require_transaction("ParameterBindings.ReInsert")
+        self._doc.stats["binding_writes"] += 1
+        index = self._find(definition)
+        key = self._doc._internal_definition(definition)
+        if index >= 0:
+            key = self._items[index][0]
+            self._items[index] = (key, binding)
+        else:
+            self._items.append((key, binding))
+        self._doc._journal_change(self._doc.GetElement(key.Id))
+        return True
+
+    def Remove(self, definition):
+        self._doc._require_transaction("ParameterBindings.Remove")
+        index = self._find(definition)
+        if index < 0:
+            return False
+        self._doc.stats["binding_writes"] += 1
+        del self._items[index]
+        return True
+
+    @property
+    def Size(self):
+        return len(self._items)
+
+
+class ParameterElement(Element):
+    """Элемент параметра проекта"""
+
+    def __init__(self, doc, name):
+        Element.__init__(self, doc, name)
+        self._definition = InternalDefinition(name, self.Id)
+
+    def GetDefinition(self):
+        return self._definition
+
+
+class SharedParameterElement(ParameterElement):
+    """Элемент общего параметра"""
+
+    def __init__(self, doc, name, guid):
+        ParameterElement.__init__(self, doc, name)
+        self.GuidValue = guid
+
+    @staticmethod
+    def Lookup(doc, guid):
+        for element in doc._elements.values():
+            if isinstance(element, SharedParameterElement) and element.GuidValue == guid:
+                return element
+        return None
+
+
+# ===================== ТРАНЗАКЦИИ =====================
+class SubTransaction(object):
+    """Подтранзакция: откат удаляет созданные элементы и возвращает изменения"""
+
+    def __init__(self, doc):
+        self._doc = doc
+        self._journal = None
+
+    def Start(self):
+        self._doc._require_transaction("SubTransaction.Start")
+        self._journal = self._doc._push_journal()
+        return TransactionStatus.Started
+
+    def Commit(self):
+        self._doc._pop_journal(self._journal, rollback=False)
+        return TransactionStatus.Committed
+
+    def RollBack(self):
+        self._doc._pop_journal(self._journal, rollback=True)
+        self._doc.stats["rollbacks"] += 1
+        return TransactionStatus.RolledBack
+
+    def Dispose(self):
+        pass
+
+
+TransactionStatus = _EnumType("TransactionStatus")
+
+
+class Transaction(object):
+    """Транзакция документа"""
+
+    def __init__(self, doc, name=""):
+        self._doc = doc
+        self.Name = name
+
+    def Start(self):
+        self._doc._open_transactions += 1
+        self._doc.stats["transactions"] += 1
+        return TransactionStatus.Started
+
+    def Commit(self):
+        self._doc._open_transactions -= 1
+        self._doc._fire_changed()
+        return TransactionStatus.Committed
+
+    def RollBack(self):
+        self._doc._open_transactions -= 1
+        return TransactionStatus.RolledBack
+
+
+# ===================== СОБЫТИЯ =====================
+class _Event(object):
+    """Событие .NET (подписка через += / -=)"""
+
+    def __init__(self):
+        self._handlers = []
+
+    def __iadd__(self, handler):
+        self._handlers.append(handler)
+        return self
+
+    def __isub__(self, handler):
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+        return self
+
+    def fire(self, sender, args):
+        for handler in list(self._handlers):
+            handler(sender, args)
+
+
+class DocumentChangedEventArgs(object):
+    """Аргументы события DocumentChanged"""
+
+    def __init__(self, doc, added, modified, deleted):
+        self._doc = doc
+        self._added = list(added)
+        self._modified = list(modified)
+        self._deleted = list(deleted)
+
+    def GetDocument(self):
+        return self._doc
+
+    def GetAddedElementIds(self):
+        return list(self._added)
+
+    def GetModifiedElementIds(self):
+        return list(self._modified)
+
+    def GetDeletedElementIds(self):
+        return list(self._deleted)
+
+
+class _NamedItems(object):
+    """Definitions / DefinitionGroups: get_Item по имени"""
+
+    def __init__(self, items):
+        self._items = items
+
+    def get_Item(self, name):
+        return self._items.get(name)
+
+    def __iter__(self):
+        return iter(self._items.values())
+
+
+class DefinitionGroup(object):
+    """Группа файла общих параметров"""
+
+    def __init__(self, name):
+        self.Name = name
+        self.Definitions = _NamedItems({})
+
+
+class DefinitionFile(object):
+    """Открытый файл общих параметров (разбор только GROUP и PARAM)"""
+
+    def __init__(self, path):
+        self.Filename = path
+        with open(path, encoding="utf-16") as f:
+            rows = [line.rstrip("\r\n").split("\t") for line in f]
+        groups = {row[1]: DefinitionGroup(row[2]) for row in rows if row[0] == "GROUP"}
+        for row in rows:
+            if row[0] == "PARAM" and row[5] in groups:
+                groups[row[5]].Definitions._items[row[2]] = ExternalDefinition(row[2], row[1])
+        self.Groups = _NamedItems({group.Name: group for group in groups.values()})
+
+
+class Application(object):
+    """Приложение Revit (источник событий и файл общих параметров)"""
+
+    def __init__(self):
+        self.DocumentChanged = _Event()
+        self.SharedParametersFilename = ""
+
+    def OpenSharedParameterFile(self):
+        if not self.SharedParametersFilename:
+            return None
+        try:
+            return DefinitionFile(self.SharedParametersFilename)
+        except (OSError, UnicodeError, IndexError):
+            return None
+
+
+# ===================== ЭКСПОРТ =====================
+class TableCellCombinedParameterData(object):
+    """Часть правила имени файла экспорта (параметр категории)"""
+
+    def __init__(self):
+        self.CategoryId = ElementId.InvalidElementId
+        self.ParamId = ElementId.InvalidElementId
+        self.Prefix = ""
+        self.Suffix = ""
+        self.Separator = ""
+        self.SampleValue = ""
+
+    @staticmethod
+    def Create():
+        return TableCellCombinedParameterData()
+
+
+class PDFExportOptions(object):
+    """Настройки экспорта PDF (Revit 2022+)"""
+
+    def __init__(self):
+        self.Combine = True
+        self.FileName = ""
+        self.PaperFormat = ExportPaperFormat.Default
+        self.PaperPlacement = PaperPlacementType.Center
+        self.ZoomType = ZoomType.FitToPage
+        self.ZoomPercentage = 100
+        self.ColorDepth = ColorDepthType.Color
+        self.ExportQuality = PDFExportQualityType.DPI300
+        self.HideCropBoundaries = False
+        self.HideReferencePlane = False
+        self.HideScopeBoxes = False
+        self.HideUnreferencedViewTags = False
+        self._naming_rule = []
+
+    def GetNamingRule(self):
+        return list(self._naming_rule)
+
+    def SetNamingRule(self, rule):
+        self._naming_rule = list(rule)
+
+
+# ===================== ДОКУМЕНТ =====================
+_STAT_KEYS = (
+    "collector_scans", "elements_scanned", "binding_scans", "binding_steps",
+    "binding_writes", "get_element", "regenerations", "transactions", "rollbacks",
+    "duplicates", "sheets_created", "viewports_created", "schedule_instances_created",
+    "schedules_created", "deletes", "parameter_sets", "field_adds", "field_removes",
+    "field_writes", "field_reorders", "schedule_refreshes", "column_width_writes",
+    "elements_created", "scheme_entry_writes", "legends_created", "header_cell_writes",
+    "override_writes", "pdf_exports", "pdf_files",
+)
+
+
+_document_hashes = itertools.count(1)
+
+
+class FakeDocument(object):
+    """Документ Revit в памяти"""
+
+    def __init__(self, title="Fake", application=None):
+        self.Title = title
+        self.PathName = ""
+        self.IsWorkshared = False
+        self.IsFamilyDocument = False
+        self.Application = application or Application()
+        self._elements = {}
+        self._categories = {}
+        self._ids = itertools.count(100000)
+        self._sheet_no = itertools.count(101)
+        self._journals = []
+        self._open_transactions = 0
+        self._pending = ([], [], [])
+        self._hash = next(_document_hashes)
+        self.ParameterBindings = BindingMap(self)
+        self.ActiveView = None
+        self.stats = dict.fromkeys(_STAT_KEYS, 0)
+        for bic, name, schedulable in (
+                (BuiltInCategory.OST_Rooms, "Помещения", True),
+                (BuiltInCategory.OST_MEPSpaces, "Пространства", True),
+                (BuiltInCategory.OST_Areas, "Зоны", True),
+                (BuiltInCategory.OST_TitleBlocks, "Основные надписи", False),
+                (BuiltInCategory.OST_Views, "Виды", False),
+                (BuiltInCategory.OST_Sheets, "Листы", True)):
+            self._categories[bic.value] = Category(bic, name, schedulable)
+            if schedulable:
+                _SCHEDULABLE.add(bic.value)
+
+    # --- служебное ---
+    def reset_stats(self):
+        for key in self.stats:
+            self.stats[key] = 0
+
+    def _new_id(self):
+        return ElementId(next(self._ids))
+
+    def _next_sheet_no(self):
+        return next(self._sheet_no)
+
+    def _category(self, bic):
+        if bic is None:
+            return None
+        category = self._categories.get(bic.value)
+        if category is None:
+            category = self._categories[bic.value] = Category(bic, bic.name)
+        return category
+
+    def _category_by_id(self, category_id):
+        return self._categories.get(category_id.IntegerValue)
+
+    def _by_category(self, category_id):
+        return [e for e in self._elements.values()
+                if e.Category is not None and e.Category.Id == category_id
+                and not isinstance(e, ElementType)]
+
+    def _internal_definition(self, definition):
+        if isinstance(definition, InternalDefinition):
+            return definition
+        if isinstance(definition, ExternalDefinition):
+            element = SharedParameterElement.Lookup(self, definition.GUID)
+            if element is None:
+                element = SharedParameterElement(self, definition.Name, definition.GUID)
+        else:
+            element = ParameterElement(self, definition.Name)
+        return element.GetDefinition()
+
+    def _parameter_name(self, parameter_id):
+        element = self._elements.get(parameter_id.IntegerValue)
+        if isinstance(element, ParameterElement):
+            return element.Name
+        return str(parameter_id.IntegerValue)
+
+    def GetHashCode(self):
+        return self._hash
+
+    @property
+    def IsModifiable(self):
+        return self._open_transactions > 0
+
+    def _require_transaction(self, what):
+        if self._open_transactions <= 0:
+            raise InvalidOperationException(
+                "Изменение модели вне транзакции: " + what)
+
+    def _add(self, element):
+        self._elements[element.Id.IntegerValue] = element
+        self.stats["elements_created"] += 1
+        if self._journals:
+            self._journals[-1]["created"].append(element.Id)
+        self._pending[0].append(element.Id)
+
+    def _journal_change(self, element):
+        if self._journals:
+            changed = self._journals[-1]["changed"]
+            key = element.Id.IntegerValue
+            if key not in changed:
+                changed[key] = (element, dict(element.__dict__),
+                                {k: p._value for k, p in element._params.items()})
+        self._pending[1].append(element.Id)
+
+    def _push_journal(self):
+        journal = {"created": [], "changed": {}}
+        self._journals.append(journal)
+        return journal
+
+    def _pop_journal(self, journal, rollback):
+        self._journals.remove(journal)
+        if rollback:
+            for element_id in journal["created"]:
+                self._elements.pop(element_id.IntegerValue, None)
+            for element, state, values in journal["changed"].values():
+                element.__dict__.update(state)
+                for key, value in values.items():
+                    element._params[key]._value = value
+        elif self._journals:
+            parent = self._journals[-1]
+            parent["created"].extend(journal["created"])
+            for key, value in journal["changed"].items():
+                parent["changed"].setdefault(key, value)
+
+    def _fire_changed(self):
+        added, modified, deleted = self._pending
+        self._pending = ([], [], [])
+        if added or modified or deleted:
+            self.Application.DocumentChanged.fire(
+                self.Application, DocumentChangedEventArgs(self, added, modified, deleted))
+
+    # --- API документа ---
+    def GetElement(self, element_id):
+        self.stats["get_element"] += 1
+        if isinstance(element_id, str):
+            for element in self._elements.values():
+                if element.UniqueId == element_id:
+                    return element
+            return None
+        return self._elements.get(element_id.IntegerValue)
+
+    def Delete(self, element_id):
+        self._require_transaction("Delete")
+        self.stats["deletes"] += 1
+        self._elements.pop(element_id.IntegerValue, None)
+        self._pending[2].append(element_id)
+        return [element_id]
+
+    def Regenerate(self):
+        self._require_transaction("Regenerate")
+        self.stats["regenerations"] += 1
+
+    def Export(self, folder, view_ids, options):
+        """Экспорт листов в PDF-заменители (revitfake.printing), как Revit 2022+:
+        Combine=False - файл на лист по правилу имени, иначе options.FileName"""
+        from .printing import POINTS_PER_FOOT, write_pdf
+        if not isinstance(options, PDFExportOptions):
+            raise ArgumentException("Имитируется только экспорт PDF")
+        sheets = [self.GetElement(view_id) for view_id in view_ids]
+        if not sheets or any(not isinstance(sheet, ViewSheet) for sheet in sheets):
+            raise ArgumentException("Экспортируются только листы")
+        if self._open_transactions > 0:
+            raise InvalidOperationException("Экспорт при открытой транзакции")
+        self.stats["pdf_exports"] += 1
+        number_id = ElementId(BuiltInParameter.SHEET_NUMBER)
+        by_number = any(rule.ParamId == number_id for rule in options.GetNamingRule())
+        files = [[sheet] for sheet in sheets] if not options.Combine else [sheets]
+        for group in files:
+            sheet = group[0]
+            if options.Combine:
+                name = options.FileName or self.Title
+            elif by_number:
+                name = sheet.SheetNumber
+            else:
+                name = "{} - Лист - {} - {}".format(self.Title, sheet.SheetNumber, sheet.Name)
+            outline = sheet.Outline
+            write_pdf(os.path.join(folder, name + ".pdf"),
+                      (outline.Max.U - outline.Min.U) * POINTS_PER_FOOT,
+                      (outline.Max.V - outline.Min.V) * POINTS_PER_FOOT,
+                      " ".join(s.SheetNumber for s in group))
+            self.stats["pdf_files"] += 1
+        return True
+
+
+# ===================== КОЛЛЕКТОР =====================
+class ElementFilter(object):
+    """Базовый фильтр элементов"""
+
+    def PassesFilter(self, element):
+        return self._passes(element)
+
+
+class ElementClassFilter(ElementFilter):
+    """Фильтр по классу"""
+
+    def __init__(self, cls):
+        self._cls = cls
+
+    def _passes(self, element):
+        return isinstance(element, self._cls)
+
+
+class ElementCategoryFilter(ElementFilter):
+    """Фильтр по категории"""
+
+    def __init__(self, bic):
+        self._value = bic.value if isinstance(bic, _Enum) else bic.IntegerValue
+
+    def _passes(self, element):
+        return element.Category is not None and element.Category.Id.IntegerValue == self._value
+
+
+class ElementIsElementTypeFilter(ElementFilter):
+    """Фильтр типоразмеров (inverted=True - экземпляры)"""
+
+    def __init__(self, inverted=False):
+        self._inverted = inverted
+
+    def _passes(self, element):
+        return isinstance(element, ElementType) != self._inverted
+
+
+class LogicalOrFilter(ElementFilter):
+    """Логическое ИЛИ фильтров"""
+
+    def __init__(self, *filters):
+        if len(filters) == 1:
+            filters = tuple(filters[0])
+        self._filters = filters
+
+    def _passes(self, element):
+        return any(f._passes(element) for f in self._filters)
+
+
+class LogicalAndFilter(LogicalOrFilter):
+    """Логическое И фильтров"""
+
+    def _passes(self, element):
+        return all(f._passes(element) for f in self._filters)
+
+
+class FilteredElementCollector(object):
+    """Коллектор: фильтры применяются при переборе, каждый перебор - скан"""
+
+    def __init__(self, doc, view_id=None):
+        self._doc = doc
+        self._filters = []
+        if view_id is not None:
+            self._filters.append(lambda e: getattr(e, "OwnerViewId", None) == view_id)
+
+    def _add(self, predicate):
+        self._filters.append(predicate)
+        return self
+
+    def OfClass(self, cls):
+        return self._add(lambda e: isinstance(e, cls))
+
+    def OfCategory(self, bic):
+        return self._add(lambda e: e.Category is not None and e.Category.Id.IntegerValue == bic.value)
+
+    def OfCategoryId(self, category_id):
+        return self._add(lambda e: e.Category is not None and e.Category.Id == category_id)
+
+    def WherePasses(self, element_filter):
+        return self._add(element_filter._passes)
+
+    def WhereElementIsElementType(self):
+        return self._add(lambda e: isinstance(e, ElementType))
+
+    def WhereElementIsNotElementType(self):
+        return self._add(lambda e: not isinstance(e, ElementType))
+
+    def __iter__(self):
+        doc = self._doc
+        doc.stats["collector_scans"] += 1
+        filters = self._filters
+        for element in list(doc._elements.values()):
+            doc.stats["elements_scanned"] += 1
+            if all(f(element) for f in filters):
+                yield element
+
+    def ToElements(self):
+        return list(self)
+
+    def ToElementIds(self):
+        return [e.Id for e in self]
+
+    def FirstElement(self):
+        for element in self:
+            return element
+        return None
+
+    def FirstElementId(self):
+        element = self.FirstElement()
+        return element.Id if element is not None else ElementId.InvalidElementId
+
+    def GetElementCount(self):
+        return sum(1 for _ in self)
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""Имитация Revit API для запуска скриптов вне Revit.
+
+DB - подмножество Autodesk.Revit.DB, которое используют скрипты и пакет
+loadplan; FakeBackend подставляется в loadplan.api.use_backend();
+harness запускает скрипты Python_Source как узел Python Dynamo.
+"""
+from .backend import FakeBackend
+from .harness import install, run_dyn, run_script
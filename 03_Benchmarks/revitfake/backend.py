@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Бэкенд loadplan.api поверх имитации Revit API"""
+from . import DB
+
+
+class _TransactionManagerInstance(object):
+    """RevitServices.Transactions.TransactionManager.Instance
+
+    Как в Dynamo, TransactionTaskDone транзакцию не фиксирует: она остается
+    открытой до ForceCloseTransaction или конца запуска (commit() из
+    harness), и только тогда приходит DocumentChanged.
+    """
+
+    def __init__(self):
+        self._doc = None
+        self.stats = {"ensure": 0, "task_done": 0, "force_close": 0}
+
+    def EnsureInTransaction(self, doc):
+        self.stats["ensure"] += 1
+        if self._doc is None:
+            self._doc = doc
+            doc._open_transactions += 1
+            doc.stats["transactions"] += 1
+
+    def TransactionTaskDone(self):
+        self.stats["task_done"] += 1
+
+    def ForceCloseTransaction(self):
+        self.stats["force_close"] += 1
+        self.commit()
+
+    def commit(self):
+        """Фиксация открытой транзакции (конец запуска графа)"""
+        if self._doc is not None:
+            doc = self._doc
+            self._doc = None
+            doc._open_transactions -= 1
+            doc._fire_changed()
+
+
+class _TransactionManager(object):
+    """RevitServices.Transactions.TransactionManager"""
+
+    def __init__(self):
+        self.Instance = _TransactionManagerInstance()
+
+
+class _GenericList(object):
+    """System.Collections.Generic.List: List[T](items) - список Python"""
+
+    def __getitem__(self, item_type):
+        return list
+
+
+class FakeBackend(object):
+    """Бэкенд для loadplan.api.use_backend()"""
+
+    def __init__(self):
+        self.DB = DB
+        self.List = _GenericList()
+        self.TransactionManager = _TransactionManager()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""Запуск скриптов Python_Source как узла Python в Dynamo.
+
+install() подменяет модули clr, Autodesk.Revit.* и RevitServices.*
+имитацией, run_script() выполняет файл скрипта с глобальными IN и
+UnwrapElement и возвращает его OUT, run_dyn() - код узла Python из .dyn
+(загрузчик или встроенный скрипт), run_code() - произвольный код узла.
+Открытая TransactionManager транзакция фиксируется в конце run_code(),
+как Dynamo фиксирует ее по завершении запуска графа.
+"""
+import json
+import os
+import re
+import sys
+import types
+
+from . import DB
+
+DYNAMO_DIR = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "01_Dynamo"))
+PYTHON_SOURCE = os.path.join(DYNAMO_DIR, "Python_Source")
+
+_backend = None  # бэкенд последнего install()
+
+
+class _UIDocument(object):
+    """ActiveUIDocument: активный вид документа"""
+
+    def __init__(self, doc):
+        self.Document = doc
+
+    @property
+    def ActiveView(self):
+        return self.Document.ActiveView
+
+    @ActiveView.setter
+    def ActiveView(self, view):
+        self.Document.ActiveView = view
+
+
+def install(backend, doc):
+    """Подмена модулей Revit/Dynamo имитацией для документа doc"""
+    global _backend
+    _backend = backend
+    clr = types.ModuleType("clr")
+    clr.AddReference = lambda name: None
+
+    autodesk = types.ModuleType("Autodesk")
+    revit = types.ModuleType("Autodesk.Revit")
+    ui = types.ModuleType("Autodesk.Revit.UI")
+    autodesk.Revit = revit
+    revit.DB = DB
+    revit.UI = ui
+
+    services = types.ModuleType("RevitServices")
+    persistence = types.ModuleType("RevitServices.Persistence")
+    transactions = types.ModuleType("RevitServices.Transactions")
+    ui_app = types.SimpleNamespace(ActiveUIDocument=_UIDocument(doc))
+    persistence.DocumentManager = types.SimpleNamespace(
+        Instance=types.SimpleNamespace(CurrentDBDocument=doc, CurrentUIApplication=ui_app))
+    transactions.TransactionManager = backend.TransactionManager
+    services.Persistence = persistence
+    services.Transactions = transactions
+
+    sys.modules.update({
+        "clr": clr,
+        "Autodesk": autodesk,
+        "Autodesk.Revit": revit,
+        "Autodesk.Revit.DB": DB,
+        "Autodesk.Revit.UI": ui,
+        "RevitServices": services,
+        "RevitServices.Persistence": persistence,
+        "RevitServices.Transactions": transactions,
+    })
+    if PYTHON_SOURCE not in sys.path:
+        sys.path.append(PYTHON_SOURCE)
+    from loadplan import api
+    api.use_backend(backend)
+
+
+def apply_settings(source, settings):
+    """Замена значений в блоке НАСТРОЙКИ скрипта (как правка в Dynamo)"""
+    for name, value in settings.items():
+        pattern = re.compile(r"^{} = .*$".format(re.escape(name)), re.MULTILINE)
+        if not pattern.search(source):
+            raise KeyError("В скрипте нет настройки " + name)
+        source = pattern.sub(lambda match: "{} = {!r}".format(name, value), source, count=1)
+    return source
+
+
+def run_code(source, path, IN=None, file_name=None):
+    """Выполнение кода узла Python; file_name - __file__ (в Dynamo его нет)"""
+    scope = {
+        "__name__": "__dynamo__",
+        "IN": list(IN) if IN is not None else [None],
+        "UnwrapElement": lambda element: element,
+    }
+    if file_name is not None:
+        scope["__file__"] = file_name
+    try:
+        exec(compile(source, path, "exec"), scope)
+    finally:
+        if _backend is not None:
+            _backend.TransactionManager.Instance.commit()
+    return scope.get("OUT")
+
+
+def run_script(name, IN=None, settings=None):
+    """Выполнение скрипта Python_Source/name; возвращает OUT.
+
+    settings - {имя настройки: значение} для блока НАСТРОЙКИ скрипта.
+    """
+    path = os.path.join(PYTHON_SOURCE, name)
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    if settings:
+        source = apply_settings(source, settings)
+    return run_code(source, path, IN, path)
+
+
+def dyn_code(name):
+    """Код узла Python из 01_Dynamo/name"""
+    path = os.path.join(DYNAMO_DIR, name)
+    with open(path, encoding="utf-8") as f:
+        graph = json.load(f)
+    for node in graph["Nodes"]:
+        if node.get("NodeType") == "PythonScriptNode":
+            return node["Code"].replace("\r\n", "\n")
+    raise ValueError("В графе нет узла Python: " + name)
+
+
+def run_dyn(name, IN=None, settings=None):
+    """Выполнение узла Python из 01_Dynamo/name как в Dynamo (без __file__).
+
+    LIB_PATH по умолчанию - Python_Source.
+    """
+    settings = dict(settings or {})
+    settings.setdefault("LIB_PATH", PYTHON_SOURCE)
+    source = apply_settings(dyn_code(name), settings)
+    return run_code(source, "<{}>".format(name), IN, None)
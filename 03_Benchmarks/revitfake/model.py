@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""Синтетическая модель: N уровней, M помещений на уровне, K спецификаций и листов.
+
+build_linked_model() строит пару "связь с помещениями + основная модель с
+пространствами" для переноса нагрузок (скрипт 5).
+
+Модель детерминирована (random.Random(seed)), поэтому число обращений к
+API при одинаковых параметрах совпадает от запуска к запуску.
+"""
+import random
+
+from . import DB
+from .backend import FakeBackend
+
+LOAD_PARAMETER_NAME = "ADSK_Нагрузка_Полезная"
+LOAD_PARAMETER_GUID = "88aea8e7-1818-4d65-8037-5c445ba7c5c3"
+LOAD_SCHEDULE_NAME = "00_Контроль нагрузок (Авто)"
+SQ_M_PER_SQ_FT = 0.09290304
+
+# (наименование, назначение, нагрузка кг/м² или None)
+ROOM_TYPES = (
+    ("Офис", "Административные", 200.0),
+    ("Кабинет", "Административные", 200.0),
+    ("Коридор", "", 400.0),
+    ("Холл", "", 400.0),
+    ("Склад", "Складские", 500.0),
+    ("Архив", "Складские", None),
+    ("Серверная", "Технические", None),
+)
+ROOM_SIZE = 20.0  # сторона квадратного помещения, футы
+LEVEL_HEIGHT = 12.0  # футы
+
+
+def _bind(doc, definition, *bics):
+    categories = DB.CategorySet()
+    for bic in bics:
+        categories.Insert(doc._category(bic))
+    doc.ParameterBindings.Insert(definition, DB.InstanceBinding(categories))
+
+
+def _square(x, y):
+    return [DB.XYZ(x, y), DB.XYZ(x + ROOM_SIZE, y),
+            DB.XYZ(x + ROOM_SIZE, y + ROOM_SIZE), DB.XYZ(x, y + ROOM_SIZE)]
+
+
+class SyntheticModel(object):
+    """Документ и ключевые элементы синтетической модели"""
+
+    def __init__(self, backend, doc, levels, plans, rooms, load_definition):
+        self.backend = backend
+        self.doc = doc
+        self.levels = levels
+        self.plans = plans
+        self.rooms = rooms
+        self.load_definition = load_definition
+
+
+def build_model(levels=5, rooms=20, schedules=0, sheets=0, load_schedule=False,
+                bind_load_parameter=True, filled=0.5, seed=0):
+    """Синтетическая модель.
+
+    levels - число уровней (по плану этажа на уровень), rooms - помещений
+    на уровне, schedules/sheets - посторонние спецификации и листы,
+    load_schedule - создать спецификацию нагрузок (как после скрипта 1),
+    filled - доля помещений с заполненной нагрузкой.
+    """
+    rng = random.Random(seed)
+    backend = FakeBackend()
+    doc = DB.FakeDocument("Синтетическая модель")
+    rooms_category = doc._category(DB.BuiltInCategory.OST_Rooms)
+
+    doc._open_transactions += 1
+    try:
+        load_definition = DB.ExternalDefinition(LOAD_PARAMETER_NAME, LOAD_PARAMETER_GUID)
+        if bind_load_parameter:
+            _bind(doc, load_definition, DB.BuiltInCategory.OST_Rooms)
+
+        DB.FamilySymbol(doc, "A1", DB.BuiltInCategory.OST_TitleBlocks, family_name="Основная надпись")
+        DB.FamilySymbol(doc, "A0", DB.BuiltInCategory.OST_TitleBlocks, width=3.9, height=2.76,
+                        family_name="Основная надпись")
+        DB.FillPatternElement(doc, "<Сплошная заливка>", solid=True)
+        DB.ColorFillScheme(doc, "Схема 1", rooms_category.Id)
+        DB.AreaScheme(doc, "Общая площадь")
+
+        level_list, plans, room_list = [], [], []
+        columns = max(1, int(rooms ** 0.5))
+        for i in range(levels):
+            level = DB.Level(doc, "Этаж {:02d}".format(i + 1), i * LEVEL_HEIGHT)
+            level_list.append(level)
+            plan = DB.ViewPlan(doc, "Этаж {:02d}".format(i + 1), level)
+            plan.CropBox = DB.BoundingBoxXYZ(
+                DB.XYZ(0, 0, 0), DB.XYZ(columns * ROOM_SIZE, (rooms // columns + 1) * ROOM_SIZE, 0))
+            plans.append(plan)
+            for j in range(rooms):
+                name, department, load = ROOM_TYPES[rng.randrange(len(ROOM_TYPES))]
+                x, y = (j % columns) * ROOM_SIZE, (j // columns) * ROOM_SIZE
+                room = DB.Room(doc, level, "{}{:03d}".format(i + 1, j + 1), name,
+                               ROOM_SIZE * ROOM_SIZE, _square(x, y), department)
+                if bind_load_parameter:
+                    value = None
+                    if load is not None and rng.random() < filled:
+                        value = load * SQ_M_PER_SQ_FT
+                    room._param(LOAD_PARAMETER_NAME, value, definition=load_definition)
+                room_list.append(room)
+
+        for k in range(schedules):
+            schedule = DB.ViewSchedule.CreateSchedule(doc, rooms_category.Id)
+            schedule._name = "Спецификация помещений {}".format(k + 1)
+        if load_schedule:
+            schedule = DB.ViewSchedule.CreateSchedule(doc, rooms_category.Id)
+            schedule._name = LOAD_SCHEDULE_NAME
+        title_block = DB.FilteredElementCollector(doc).OfCategory(
+            DB.BuiltInCategory.OST_TitleBlocks).FirstElement()
+        for k in range(sheets):
+            sheet = DB.ViewSheet.Create(doc, title_block.Id)
+            sheet._name = "Лист {}".format(k + 1)
+    finally:
+        doc._open_transactions -= 1
+        doc._pending = ([], [], [])
+
+    doc.ActiveView = plans[0] if plans else None
+    doc.reset_stats()
+    return SyntheticModel(backend, doc, level_list, plans, room_list, load_definition)
+
+
+class LinkedModel(object):
+    """Основная модель с пространствами и связь с помещениями"""
+
+    def __init__(self, backend, doc, link_doc, link, spaces, rooms, load_definition):
+        self.backend = backend
+        self.doc = doc
+        self.link_doc = link_doc
+        self.link = link
+        self.spaces = spaces
+        self.rooms = rooms
+        self.load_definition = load_definition
+
+
+def build_linked_model(levels=5, rooms=100, offset=(100.0, 50.0, 0.0), unmatched=0, seed=0):
+    """Связь АР с помещениями (нагрузки заполнены) и основная модель с
+    пространствами на тех же местах; unmatched - пространств на уровне
+    за пределами помещений связи.
+    """
+    rng = random.Random(seed)
+    backend = FakeBackend()
+    load_definition = DB.ExternalDefinition(LOAD_PARAMETER_NAME, LOAD_PARAMETER_GUID)
+    shift = DB.XYZ(*offset)
+    columns = max(1, int(rooms ** 0.5))
+
+    link_doc = DB.FakeDocument("АР")
+    link_doc._open_transactions += 1
+    room_list = []
+    try:
+        _bind(link_doc, load_definition, DB.BuiltInCategory.OST_Rooms)
+        for i in range(levels):
+            level = DB.Level(link_doc, "Этаж {:02d}".format(i + 1), i * LEVEL_HEIGHT)
+            for j in range(rooms):
+                name, department, load = ROOM_TYPES[rng.randrange(len(ROOM_TYPES))]
+                x, y = (j % columns) * ROOM_SIZE, (j // columns) * ROOM_SIZE
+                room = DB.Room(link_doc, level, "{}{:03d}".format(i + 1, j + 1), name,
+                               ROOM_SIZE * ROOM_SIZE, _square(x, y), department)
+                room._param(LOAD_PARAMETER_NAME, None if load is None else load * SQ_M_PER_SQ_FT,
+                            definition=load_definition)
+                room_list.append(room)
+    finally:
+        link_doc._open_transactions -= 1
+        link_doc._pending = ([], [], [])
+
+    doc = DB.FakeDocument("ОВ")
+    doc._open_transactions += 1
+    space_list = []
+    try:
+        _bind(doc, load_definition, DB.BuiltInCategory.OST_MEPSpaces)
+        link = DB.RevitLinkInstance(doc, "АР.rvt : 1 : позиция <Не общедоступное>", link_doc,
+                                    DB.Transform.CreateTranslation(shift))
+        for i in range(levels):
+            level = DB.Level(doc, "Этаж {:02d}".format(i + 1), i * LEVEL_HEIGHT + shift.Z)
+            for j in range(rooms + unmatched):
+                if j < rooms:
+                    x, y = (j % columns) * ROOM_SIZE + shift.X, (j // columns) * ROOM_SIZE + shift.Y
+                else:
+                    x, y = -(j + 1) * ROOM_SIZE, -ROOM_SIZE
+                space = DB.Space(doc, level, "{}{:03d}".format(i + 1, j + 1), "Пространство",
+                                 ROOM_SIZE * ROOM_SIZE, _square(x, y))
+                space._param(LOAD_PARAMETER_NAME, None, definition=load_definition)
+                space_list.append(space)
+    finally:
+        doc._open_transactions -= 1
+        doc._pending = ([], [], [])
+
+    link_doc.reset_stats()
+    doc.reset_stats()
+    return LinkedModel(backend, doc, link_doc, link, space_list, room_list, load_definition)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Заменители PDF и растеризатора для проверки экспорта листов без Revit.
+
+write_pdf() пишет одностраничный PDF размером с лист (его вызывает
+FakeDocument.Export), StandInRasterizer "растрирует" такой PDF в PNG
+нужного разрешения на чистом Python: строки пикселей сжимаются zlib, так
+что работа на страницу растет с dpi, как у настоящей программы, и пул
+процессов loadplan.export можно проверить под Linux.
+"""
+import random
+import re
+import struct
+import zlib
+
+POINTS_PER_FOOT = 864.0  # 12 дюймов по 72 пункта
+
+_MEDIA_BOX = re.compile(rb"/MediaBox\s*\[\s*([\d.]+)\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)\s*\]")
+
+
+def write_pdf(path, width, height, text=""):
+    """Одностраничный PDF width×height (пункты) с надписью text"""
+    label = text.encode("utf-8").hex().upper()
+    content = "BT /F1 24 Tf 36 36 Td <{}> Tj ET".format(label).encode("ascii")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {:.2f} {:.2f}] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>".format(width, height).encode("ascii"),
+        b"<< /Length " + str(len(content)).encode("ascii") + b" >>\nstream\n" + content
+        + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    data = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += str(number).encode("ascii") + b" 0 obj\n" + body + b"\nendobj\n"
+    xref = len(data)
+    data += "xref\n0 {}\n0000000000 65535 f \n".format(len(objects) + 1).encode("ascii")
+    for offset in offsets:
+        data += "{:010d} 00000 n \n".format(offset).encode("ascii")
+    data += "trailer\n<< /Size {} /Root 1 0 R >>\nstartxref\n{}\n%%EOF\n".format(
+        len(objects) + 1, xref).encode("ascii")
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def page_sizes(path):
+    """[(ширина, высота)] страниц PDF в пунктах (по /MediaBox)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    return [(float(x1) - float(x0), float(y1) - float(y0))
+            for x0, y0, x1, y1 in _MEDIA_BOX.findall(data)]
+
+
+def _chunk(kind, data):
+    return (struct.pack(">I", len(data)) + kind + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+
+def write_png(path, width, height, seed=0):
+    """PNG RGB width×height с шумом (несжимаемые строки, как у чертежа с заливками)"""
+    rng = random.Random(seed)
+    stride = width * 3
+    noise = rng.randbytes(stride + 251)
+    rows = b"".join(b"\x00" + noise[(y * 7) % 251:(y * 7) % 251 + stride] for y in range(height))
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(_chunk(b"IDAT", zlib.compress(rows, 6)))
+        f.write(_chunk(b"IEND", b""))
+
+
+class StandInRasterizer(object):
+    """Растеризатор для loadplan.export: страницы PDF -> <prefix>-N.png"""
+
+    name = "stand-in"
+
+    def __call__(self, pdf, prefix, dpi):
+        outputs = []
+        for page, (width, height) in enumerate(page_sizes(pdf), 1):
+            path = "{}-{}.png".format(prefix, page)
+            write_png(path, max(1, int(round(width * dpi / 72.0))),
+                      max(1, int(round(height * dpi / 72.0))), seed=page)
+            outputs.append(path)
+        return outputs
+
+
+if __name__ == "__main__":
+    # Команда для RASTERIZER: python printing.py {pdf} {prefix} {dpi}
+    import sys
+    StandInRasterizer()(sys.argv[1], sys.argv[2], int(sys.argv[3]))
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Проверки сопоставления строк импорта loadplan.exchange (без Revit).
+
+    python 03_Benchmarks/test_exchange.py
+    python -m pytest 03_Benchmarks/test_exchange.py
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "01_Dynamo", "Python_Source")))
+
+from loadplan.exchange import AMBIGUOUS, COLUMNS, RoomIndex, plan_import  # noqa: E402
+
+
+def _index(*rooms):
+    """Индекс из (ключ, номер, уровень, нагрузка); UniqueId - "uid-<ключ>" """
+    index = RoomIndex()
+    for key, number, level, current in rooms:
+        index.add(key, "uid-" + key, number, level, current)
+    return index
+
+
+def _rows(*rows):
+    return [list(COLUMNS)] + [[uid, number, "", level, load] for uid, number, level, load in rows]
+
+
+class FindTest(unittest.TestCase):
+    """Поиск помещения по строке"""
+
+    def test_same_number_and_level(self):
+        index = _index(("a", "101", "Этаж 1", None), ("b", "101", "Этаж 1", None))
+        self.assertIs(index.find("", "101", "Этаж 1"), AMBIGUOUS)
+        self.assertEqual(index.find("uid-b", "101", "Этаж 1"), ("b", None))
+
+    def test_number_on_other_levels(self):
+        index = _index(("a", "101", "Этаж 1", None), ("b", "101", "Этаж 2", None))
+        self.assertEqual(index.find("", "101", "Этаж 2"), ("b", None))
+        self.assertIs(index.find("", "101", "Этаж 3"), AMBIGUOUS)
+
+    def test_unique_number(self):
+        index = _index(("a", "101", "Этаж 1", None))
+        self.assertEqual(index.find("", "101", "Этаж 9"), ("a", None))
+        self.assertIsNone(index.find("", "102", "Этаж 1"))
+
+
+class PlanImportTest(unittest.TestCase):
+    """Отчет импорта"""
+
+    def test_ambiguous_row_is_not_applied(self):
+        index = _index(("a", "101", "Этаж 1", None), ("b", "101", "Этаж 1", None),
+                       ("c", "102", "Этаж 1", None))
+        report = plan_import(_rows(("", "101", "Этаж 1", "400"), ("", "102", "Этаж 1", "200")), index)
+        self.assertEqual(report.changes, [("c", 200.0)])
+        self.assertEqual(report.ambiguous, [(2, "", "101")])
+        self.assertEqual(report.not_found, [])
+
+    def test_duplicate_rows_same_value(self):
+        index = _index(("a", "101", "Этаж 1", None))
+        report = plan_import(_rows(("uid-a", "101", "Этаж 1", "400"), ("", "101", "Этаж 1", "400")), index)
+        self.assertEqual(report.changes, [("a", 400.0)])
+        self.assertEqual(report.duplicates, [(3, 2, "", "101")])
+        self.assertEqual(report.conflicts, 0)
+
+    def test_duplicate_rows_conflict(self):
+        index = _index(("a", "101", "Этаж 1", None), ("b", "102", "Этаж 1", None))
+        report = plan_import(_rows(("uid-a", "", "", "400"), ("", "102", "Этаж 1", "200"),
+                                   ("", "101", "Этаж 1", "500")), index)
+        self.assertEqual(report.changes, [("b", 200.0)])
+        self.assertEqual(report.duplicates, [(4, 2, "", "101")])
+        self.assertEqual(report.conflicts, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
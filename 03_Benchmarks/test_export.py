@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Проверки растеризации loadplan.export (без Revit).
+
+    python 03_Benchmarks/test_export.py
+    python -m pytest 03_Benchmarks/test_export.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.normpath(os.path.join(HERE, "..", "01_Dynamo", "Python_Source")))
+
+from loadplan import export  # noqa: E402
+from revitfake.printing import StandInRasterizer, write_pdf  # noqa: E402
+
+
+class PageFilesTest(unittest.TestCase):
+    """Страницы листа Н-1 не путаются со страницами листа Н-1-2"""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="loadplan-test-")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def _touch(self, *names):
+        for name in names:
+            open(os.path.join(self.folder, name), "wb").close()
+
+    def _names(self, paths):
+        return [os.path.basename(path) for path in paths]
+
+    def test_prefix_of_other_sheet(self):
+        self._touch("Н-1-1.png", "Н-1-2.png", "Н-1-2-1.png", "Н-1-2-2.png", "Н-10-1.png")
+        self.assertEqual(self._names(export.page_files(os.path.join(self.folder, "Н-1"))),
+                         ["Н-1-1.png", "Н-1-2.png"])
+        self.assertEqual(self._names(export.page_files(os.path.join(self.folder, "Н-1-2"))),
+                         ["Н-1-2-1.png", "Н-1-2-2.png"])
+
+    def test_page_order(self):
+        self._touch("Н-1-10.png", "Н-1-2.png", "Н-1-1.png", "Н-1-x.png")
+        self.assertEqual(self._names(export.page_files(os.path.join(self.folder, "Н-1"))),
+                         ["Н-1-1.png", "Н-1-2.png", "Н-1-10.png"])
+
+    def test_rasterize_keeps_other_sheet(self):
+        jobs = []
+        for number in ("Н-1", "Н-1-2"):
+            pdf = os.path.join(self.folder, number + ".pdf")
+            write_pdf(pdf, 200.0, 100.0, number)
+            jobs.append((number, pdf, os.path.splitext(pdf)[0], 10))
+        # Н-1-2 растрируется первым: повторная растеризация Н-1 не должна удалить его PNG
+        for workers in (1, 2):
+            done = export.rasterize_all(jobs[::-1], StandInRasterizer(), workers, processes=False)
+            done.update(export.rasterize_all(jobs[:1], StandInRasterizer(), workers, processes=False))
+            self.assertEqual({key: (self._names(png), error) for key, (png, error) in done.items()},
+                             {"Н-1": (["Н-1-1.png"], None), "Н-1-2": (["Н-1-2-1.png"], None)})
+            for png, _ in done.values():
+                self.assertTrue(all(os.path.exists(path) for path in png))
+
+
+if __name__ == "__main__":
+    unittest.main()
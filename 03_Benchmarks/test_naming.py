@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""Проверки loadplan.naming.NameRegistry (без Revit).
+
+    python 03_Benchmarks/test_naming.py
+    python -m pytest 03_Benchmarks/test_naming.py
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "01_Dynamo", "Python_Source")))
+
+from loadplan.naming import NameRegistry  # noqa: E402
+
+
+class CountingPattern(object):
+    """Шаблон имени, считающий построенные варианты (проверки имени в реестре)"""
+
+    def __init__(self, pattern="{base}_{n}"):
+        self.pattern = pattern
+        self.calls = 0
+
+    def format(self, **values):
+        self.calls += 1
+        return self.pattern.format(**values)
+
+
+class ClaimTest(unittest.TestCase):
+    """Выдача имен и совпадения"""
+
+    def test_free_base(self):
+        registry = NameRegistry()
+        self.assertEqual(registry.claim("План"), "План")
+        self.assertIn("План", registry)
+        self.assertFalse(registry.is_free("План"))
+
+    def test_collisions(self):
+        registry = NameRegistry(["План", "План_1", "План_2"])
+        self.assertEqual(registry.claim("План"), "План_3")
+        self.assertEqual(registry.claim("План"), "План_4")
+        self.assertEqual(len(registry), 5)
+
+    def test_pattern(self):
+        registry = NameRegistry(["Лист"], pattern="{base} {n}")
+        self.assertEqual(registry.claim("Лист"), "Лист 1")
+
+    def test_bases_are_independent(self):
+        registry = NameRegistry(["А", "Б"])
+        self.assertEqual(registry.claim("А"), "А_1")
+        self.assertEqual(registry.claim("Б"), "Б_1")
+        self.assertEqual(registry.claim("А"), "А_2")
+
+
+class ReserveTest(unittest.TestCase):
+    """Занятие конкретного имени"""
+
+    def test_reserve(self):
+        registry = NameRegistry(["План"])
+        self.assertFalse(registry.reserve("План"))
+        self.assertTrue(registry.reserve("Н-1"))
+        self.assertFalse(registry.reserve("Н-1"))
+
+    def test_reserved_suffix_is_skipped(self):
+        registry = NameRegistry(["План"])
+        registry.reserve("План_1")
+        self.assertEqual(registry.claim("План"), "План_2")
+
+    def test_reserved_after_claim_is_skipped(self):
+        registry = NameRegistry(["План"])
+        self.assertEqual(registry.claim("План"), "План_1")
+        registry.reserve("План_2")
+        self.assertEqual(registry.claim("План"), "План_3")
+
+
+class ReleaseTest(unittest.TestCase):
+    """Освобождение имен после отката"""
+
+    def test_release_base(self):
+        registry = NameRegistry()
+        registry.claim("План")
+        registry.release("План")
+        self.assertTrue(registry.is_free("План"))
+        self.assertEqual(registry.claim("План"), "План")
+
+    def test_release_unknown(self):
+        registry = NameRegistry(["План"])
+        registry.release("Вид")
+        self.assertEqual(len(registry), 1)
+
+    def test_released_suffix_is_reused(self):
+        registry = NameRegistry(["План"])
+        self.assertEqual(registry.claim("План"), "План_1")
+        self.assertEqual(registry.claim("План"), "План_2")
+        registry.release("План_2")
+        self.assertEqual(registry.claim("План"), "План_2")
+        self.assertEqual(registry.claim("План"), "План_3")
+
+    def test_lowest_released_suffix_first(self):
+        registry = NameRegistry(["План"])
+        for _ in range(4):
+            registry.claim("План")
+        registry.release("План_3")
+        registry.release("План_1")
+        self.assertEqual(registry.claim("План"), "План_1")
+        self.assertEqual(registry.claim("План"), "План_3")
+        self.assertEqual(registry.claim("План"), "План_5")
+
+    def test_released_preexisting_name(self):
+        registry = NameRegistry(["План", "План_1"])
+        registry.release("План_1")
+        self.assertEqual(registry.claim("План"), "План_1")
+
+
+class ScaleTest(unittest.TestCase):
+    """10 000 имен с одной основой: без перебора занятых номеров.
+
+    Вместо времени считаются построенные по шаблону варианты: при O(1) на
+    выдачу их столько же, сколько выданных имен.
+    """
+
+    def _registry(self, count):
+        pattern = CountingPattern()
+        registry = NameRegistry(["План"], pattern=pattern)
+        names = [registry.claim("План") for _ in range(count)]
+        return registry, pattern, names
+
+    def test_ten_thousand_claims(self):
+        registry, pattern, names = self._registry(10000)
+        self.assertEqual(len(set(names)), 10000)
+        self.assertEqual(names[-1], "План_10000")
+        self.assertEqual(len(registry), 10001)
+        self.assertEqual(pattern.calls, 10000)
+
+    def test_claim_after_releasing_low_suffix(self):
+        registry, pattern, _ = self._registry(10000)
+        registry.release("План_5")
+        registry.release("План_3")
+        pattern.calls = 0
+        self.assertEqual(registry.claim("План"), "План_3")
+        self.assertEqual(registry.claim("План"), "План_5")
+        self.assertEqual(registry.claim("План"), "План_10001")
+        self.assertEqual(pattern.calls, 3)
+
+    def test_released_suffix_reserved_meanwhile(self):
+        registry, pattern, _ = self._registry(10000)
+        registry.release("План_7")
+        registry.reserve("План_7")
+        pattern.calls = 0
+        self.assertEqual(registry.claim("План"), "План_10001")
+        self.assertEqual(pattern.calls, 2)
+
+    def test_ten_thousand_distinct_bases(self):
+        names = ["Вид {}".format(i) for i in range(10000)]
+        registry = NameRegistry(names)
+        claimed = [registry.claim(name) for name in names]
+        self.assertEqual(claimed, [name + "_1" for name in names])
+
+
+if __name__ == "__main__":
+    unittest.main()